@@ -8,6 +8,8 @@ import os
 from dotenv import load_dotenv
 from pathlib import Path
 
+from corsheaders.defaults import default_headers
+
 # Load environment variables from .env
 load_dotenv()
 
@@ -25,6 +27,20 @@ ALLOWED_HOSTS = []
 
 # Clerk
 CLERK_SECRET_KEY = os.getenv("CLERK_SECRET_KEY")
+CLERK_JWKS_URL = os.getenv(
+    "CLERK_JWKS_URL",
+    "https://topical-lemming-46.clerk.accounts.dev/.well-known/jwks.json",
+)
+# Fichier JWKS local (tests / benchmarks) : remplace l'appel réseau à Clerk
+CLERK_JWKS_FILE = os.getenv("CLERK_JWKS_FILE")
+CLERK_JWKS_CACHE_TTL = int(os.getenv("CLERK_JWKS_CACHE_TTL", "300"))
+# Plancher du TTL (un Cache-Control max-age=0 ne force pas un fetch par requête)
+CLERK_JWKS_MIN_TTL = int(os.getenv("CLERK_JWKS_MIN_TTL", "30"))
+CLERK_JWKS_REFETCH_COOLDOWN = int(os.getenv("CLERK_JWKS_REFETCH_COOLDOWN", "30"))
+# Nombre max de tokens déjà vérifiés gardés en mémoire (0 = désactivé)
+CLERK_TOKEN_CACHE_SIZE = int(os.getenv("CLERK_TOKEN_CACHE_SIZE", "1024"))
+# Durée (secondes) pendant laquelle un UserProfile est servi depuis le cache
+CLERK_PROFILE_CACHE_TIMEOUT = int(os.getenv("CLERK_PROFILE_CACHE_TIMEOUT", "300"))
 
 
 # Application definition
@@ -44,6 +60,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',  # <-- AJOUTÉ EN PREMIER
+    'core.middleware.QueryBudgetMiddleware',  # inactif sauf QUERY_BUDGET_ENABLED
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -51,6 +68,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.PrimaryPinMiddleware',
 ]
 
 ROOT_URLCONF = 'backend.urls'
@@ -75,13 +93,86 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 
 # Database
 
+# 🔥 PRAGMA exécutés à chaque nouvelle connexion SQLite (init_command) :
+# WAL = les lectures ne bloquent plus les écritures (et inversement)
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    # Négatif = taille en KiB (64 Mo par défaut)
+    "cache_size": -int(os.getenv("SQLITE_CACHE_SIZE_KB", str(64 * 1024))),
+    "temp_store": "MEMORY",
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # 0 = une connexion par requête (défaut Django). Connexions
+        # persistantes (WSGI) : DB_CONN_MAX_AGE=60, à mesurer avec
+        # benchmark_sqlite --config persistent ; inutile sous ASGI
+        'CONN_MAX_AGE': int(os.getenv("DB_CONN_MAX_AGE", "0")),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'init_command': ";".join(
+                f"PRAGMA {name}={value}" for name, value in SQLITE_PRAGMAS.items()
+            ),
+            # BEGIN IMMEDIATE : pas de "database is locked" quand une
+            # transaction qui a lu veut ensuite écrire (update_status)
+            'transaction_mode': os.getenv("SQLITE_TRANSACTION_MODE", "IMMEDIATE"),
+        },
     }
 }
 
+# Réplique en lecture : listes du catalogue et des réservations
+# (core.db_router). Par défaut le même fichier que "default" : toutes
+# les lectures restent alors sur la primaire.
+# En local : DATABASE_REPLICA_NAME=replica.sqlite3 puis
+# `manage.py sync_replica --interval 2` (réplication avec retard).
+DATABASES['replica'] = {
+    **DATABASES['default'],
+    'NAME': os.getenv("DATABASE_REPLICA_NAME", DATABASES['default']['NAME']),
+    # Tests : la réplique est la base de test "default"
+    'TEST': {'MIRROR': 'default'},
+}
+
+DATABASE_ROUTERS = ['core.db_router.PrimaryReplicaRouter']
+
+# Après une écriture (utilisateur ou catalogue), ses lectures restent sur
+# la primaire pendant ce délai. Cache partagé (Redis...) nécessaire avec
+# plusieurs process.
+REPLICA_PIN_SECONDS = int(os.getenv("REPLICA_PIN_SECONDS", "5"))
+
+
+# =========================
+# Cache
+# =========================
+# "default" : profils, versions du catalogue, arbre des catégories.
+#   Doit être partagé entre les process en production (check --deploy,
+#   core.E001) : LocMem ne convient qu'à un serveur mono-process.
+# "catalog" : réponses JSON rendues de l'API catalogue (peut rester local :
+#   les clés incluent la version lue dans "default")
+# Ex. file-based : CATALOG_CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache
+#                  CATALOG_CACHE_LOCATION=/var/tmp/minette-catalog
+
+LOCMEM_CACHE = "django.core.cache.backends.locmem.LocMemCache"
+
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", LOCMEM_CACHE),
+        "LOCATION": os.getenv("CACHE_LOCATION", "minette-default"),
+    },
+    "catalog": {
+        "BACKEND": os.getenv("CATALOG_CACHE_BACKEND", LOCMEM_CACHE),
+        "LOCATION": os.getenv("CATALOG_CACHE_LOCATION", "minette-catalog"),
+        "TIMEOUT": int(os.getenv("CATALOG_CACHE_TIMEOUT", "3600")),
+        "OPTIONS": {"MAX_ENTRIES": 5000},
+    },
+}
+
+CATALOG_CACHE_ALIAS = "catalog"
+
 
 # Password validation
 
@@ -113,6 +204,13 @@ STATIC_URL = 'static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Media servis par Django (core.media.serve_media) ; à désactiver si un
+# serveur web ou un CDN s'en charge
+SERVE_MEDIA = os.getenv("SERVE_MEDIA", str(DEBUG)).lower() in ("1", "true", "yes")
+
+# Threads générant les variantes des photos (0 = génération synchrone)
+IMAGE_VARIANT_WORKERS = int(os.getenv("IMAGE_VARIANT_WORKERS", "2"))
+
 
 # =========================
 # Django defaults
@@ -131,6 +229,42 @@ REST_FRAMEWORK = {
     ),
 }
 
+# Pagination par curseur des listes (core.pagination.KeysetPagination)
+API_PAGE_SIZE = int(os.getenv("API_PAGE_SIZE", "20"))
+API_MAX_PAGE_SIZE = int(os.getenv("API_MAX_PAGE_SIZE", "100"))
+
+# Budget de requêtes SQL par vue (core.middleware.QueryBudgetMiddleware)
+QUERY_BUDGET_ENABLED = os.getenv("QUERY_BUDGET_ENABLED", "false").lower() in ("1", "true", "yes")
+QUERY_BUDGET_DEFAULT = int(os.getenv("QUERY_BUDGET_DEFAULT", "10"))
+# Cache froid : arbre des catégories reconstruit (1), profil Clerk relu
+# puis mis à jour (2)
+QUERY_BUDGET_MARGIN = int(os.getenv("QUERY_BUDGET_MARGIN", "2"))
+QUERY_BUDGETS = {
+    # url_name -> nombre max de requêtes : comptes (cache chaud) de
+    # RouteQueryCountTests + la même marge pour toutes les routes
+    url_name: count + QUERY_BUDGET_MARGIN
+    for url_name, count in {
+        "category-list": 0,
+        "resource-list": 5,
+        "resource-search": 5,
+        "resource-detail": 4,
+        "protected": 0,
+        "reservation-create": 10,
+        "my-reservations": 3,
+        "admin-reservations": 3,
+        "admin-reservation-update-status": 4,
+        "admin-reservation-bulk-update-status": 7,
+        "admin-reservation-export": 3,
+        "admin-stats": 2,
+    }.items()
+}
+
+# Durée de vie des Idempotency-Key (POST /api/reservations/), en secondes
+IDEMPOTENCY_KEY_TTL = int(os.getenv("IDEMPOTENCY_KEY_TTL", str(24 * 3600)))
+# Clé réservée sans réponse au-delà de ce délai (crash entre le claim et
+# l'enregistrement de la réponse) : libérée au prochain essai
+IDEMPOTENCY_IN_PROGRESS_TIMEOUT = int(os.getenv("IDEMPOTENCY_IN_PROGRESS_TIMEOUT", "60"))
+
 
 # =========================
 # CORS
@@ -138,4 +272,9 @@ REST_FRAMEWORK = {
 
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
-]
\ No newline at end of file
+]
+
+CORS_ALLOW_HEADERS = (
+    *default_headers,
+    "idempotency-key",
+)
\ No newline at end of file
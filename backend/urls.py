@@ -1,17 +1,25 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
-from django.conf.urls.static import static
+
+from core.media import serve_media
 
 urlpatterns = [
     path("admin/", admin.site.urls),
 
     # 🔥 API principale
     path("api/", include("core.urls")),
+
+    # ⚡ Versions async (ASGI / uvicorn)
+    path("api/async/", include("core.async_urls")),
 ]
 
-if settings.DEBUG:
-    urlpatterns += static(
-        settings.MEDIA_URL,
-        document_root=settings.MEDIA_ROOT
-    )
\ No newline at end of file
+# 🔥 Media avec Cache-Control immutable, Range et requêtes conditionnelles
+if settings.SERVE_MEDIA:
+    urlpatterns += [
+        re_path(
+            r"^%s(?P<path>.*)$" % settings.MEDIA_URL.lstrip("/"),
+            serve_media,
+            name="media",
+        ),
+    ]
\ No newline at end of file
@@ -1,5 +1,16 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import (
+    ALL_VAR,
+    IS_FACETS_VAR,
+    IS_POPUP_VAR,
+    ORDER_VAR,
+    PAGE_VAR,
+    TO_FIELD_VAR,
+    ChangeList,
+)
+from django.core.paginator import Paginator
 
+from . import counters
 from .models import (
     UserProfile,
     Category,
@@ -9,6 +20,8 @@ from .models import (
     ResourceOptionValue,
     Reservation,  # 🔥 AJOUTÉ
 )
+from .exports import export_response
+from .search import search_resource_ids
 
 
 # =========================
@@ -71,7 +84,14 @@ class ResourcePhotoInline(admin.TabularInline):
 
 @admin.register(Resource)
 class ResourceAdmin(admin.ModelAdmin):
-    list_display = ("name", "category", "is_active", "created_at")
+    list_display = (
+        "name",
+        "category",
+        "is_active",
+        "reservations_total",
+        "reservations_pending",
+        "created_at",
+    )
     list_filter = ("is_active", "category")
     search_fields = ("name", "description")
     inlines = [
@@ -79,6 +99,14 @@ class ResourceAdmin(admin.ModelAdmin):
         ResourceOptionInline,
     ]
 
+    def get_search_results(self, request, queryset, search_term):
+        # 🔥 Index FTS5 au lieu des scans icontains
+        if not search_term:
+            return queryset, False
+
+        ids = search_resource_ids(search_term, active_only=False)
+        return queryset.filter(pk__in=ids), False
+
 
 # =========================
 # RESOURCE OPTION ADMIN
@@ -116,9 +144,96 @@ class ResourceOptionValueAdmin(admin.ModelAdmin):
 # 🔥 RESERVATION ADMIN
 # =========================
 
+# Paramètres de la changelist sans effet sur le nombre de lignes
+LISTING_PARAMS = {ALL_VAR, IS_FACETS_VAR, IS_POPUP_VAR, ORDER_VAR, PAGE_VAR, TO_FIELD_VAR}
+
+
+class CountedPaginator(Paginator):
+    """
+    Paginator dont le total est fourni (compteurs) : pas de COUNT(*).
+    """
+
+    def __init__(self, *args, count=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if count is not None:
+            self.__dict__["count"] = count
+
+
+class ReservationChangeList(ChangeList):
+    def get_results(self, request):
+        super().get_results(request)
+
+        # "(N au total)" lu dans ReservationStats
+        total = counters.count_reservations()
+        if total is not None:
+            self.full_result_count = total
+            self.show_full_result_count = True
+
+
 @admin.register(Reservation)
 class ReservationAdmin(admin.ModelAdmin):
     list_display = ("id", "resource", "user_clerk_id", "status", "created_at")
     list_filter = ("status", "resource")
     search_fields = ("user_clerk_id",)
-    ordering = ("-created_at",)
\ No newline at end of file
+    ordering = ("-created_at",)
+    actions = ["export_csv", "export_ndjson"]
+    # Total affiché par ReservationChangeList (compteurs)
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        return ReservationChangeList
+
+    def get_counted_total(self, params):
+        """
+        Nombre de lignes de la changelist lu dans les compteurs, si les
+        filtres se limitent au statut et à la ressource. Sinon None (COUNT).
+        """
+        filters = {
+            key: value for key, value in params.items() if key not in LISTING_PARAMS
+        }
+        if set(filters) - {"status__exact", "resource__id__exact"}:
+            return None
+
+        status = filters.get("status__exact")
+        if status is not None and status not in counters.STATUSES:
+            return None
+
+        resource_id = filters.get("resource__id__exact")
+        if resource_id is not None:
+            if not resource_id.isdigit():
+                return None
+            return counters.count_reservations(status, int(resource_id)) or 0
+
+        return counters.count_reservations(status)
+
+    def get_paginator(self, request, queryset, per_page, orphans=0,
+                      allow_empty_first_page=True):
+        return CountedPaginator(
+            queryset,
+            per_page,
+            orphans,
+            allow_empty_first_page,
+            count=self.get_counted_total(request.GET),
+        )
+
+    def save_model(self, request, obj, form, change):
+        # Admin : déjà dans une transaction (changeform_view)
+        before = None
+        if change:
+            before = counters.reservation_key(*Reservation.objects.values_list(
+                "created_at", "resource_id", "status"
+            ).get(pk=obj.pk))
+
+        super().save_model(request, obj, form, change)
+
+        after = counters.reservation_key(obj.created_at, obj.resource_id, obj.status)
+        if before != after:
+            counters.move(before=before, after=after)
+
+    @admin.action(description="Exporter en CSV")
+    def export_csv(self, request, queryset):
+        return export_response(queryset, output="csv")
+
+    @admin.action(description="Exporter en NDJSON")
+    def export_ndjson(self, request, queryset):
+        return export_response(queryset, output="ndjson")
\ No newline at end of file
@@ -0,0 +1,35 @@
+from django.urls import path
+
+from .async_views import (
+    AsyncCategoryListView,
+    AsyncResourceListView,
+    AsyncResourceDetailView,
+    AsyncReservationCreateView,
+    AsyncUserReservationListView,
+)
+
+# 🔥 Mêmes endpoints que core.urls, en vues async (ASGI)
+urlpatterns = [
+    path("categories/", AsyncCategoryListView.as_view(), name="async-category-list"),
+
+    path("resources/", AsyncResourceListView.as_view(), name="async-resource-list"),
+    path(
+        "resources/<int:pk>/",
+        AsyncResourceDetailView.as_view(),
+        name="async-resource-detail",
+    ),
+
+    # 📦 Reservation
+    path(
+        "reservations/",
+        AsyncReservationCreateView.as_view(),
+        name="async-reservation-create",
+    ),
+
+    # 👤 Mes réservations
+    path(
+        "my-reservations/",
+        AsyncUserReservationListView.as_view(),
+        name="async-my-reservations",
+    ),
+]
@@ -0,0 +1,263 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import (
+    AuthenticationFailed,
+    NotAuthenticated,
+    NotFound,
+    ParseError,
+)
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.views import exception_handler
+
+from .authentication import ClerkAuthentication
+from .category_tree import aget_category_tree
+from .db_router import ais_pinned, read_scope, read_scopes, use_replica
+from .facets import get_facets
+from .idempotency import (
+    REPLAYED_HEADER,
+    astore_response,
+    claim,
+    get_idempotency_key,
+    request_hash,
+)
+from .models import Resource
+from .pagination import KeysetPagination
+from .profiles import aprofiles_by_clerk_id
+from .reservations import acreate_reservation
+from .serializers import ResourceSerializer, ReservationSerializer
+from .versions import CATALOG, aget_version, version_datetime
+from .views import ReservationListMixin, ResourceQuerysetMixin
+
+
+# =======================
+# BASE ASYNC (ASGI)
+# =======================
+
+def json_response(data, status=200):
+    return JsonResponse(data, status=status, encoder=JSONEncoder, safe=False)
+
+
+class AsyncAPIView(View):
+    """
+    Vue Django async (pas de thread par requête sous uvicorn). Mêmes
+    authentification, erreurs et format JSON que les vues DRF.
+    """
+
+    authentication_required = False
+    # Lectures sur la réplique (cf. ReplicaReadMixin)
+    replica_reads = False
+    read_pin_scopes = ()
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Comme APIView : authentification par Bearer token, pas de cookie
+        # de session, donc pas de CSRF
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        with read_scope():
+            try:
+                self.user = await self.get_user(request)
+                if self.user is not None:
+                    # Comme DRF : PrimaryPinMiddleware lit request.user
+                    request.user = self.user
+
+                await self.select_read_database(request)
+                return await super().dispatch(request, *args, **kwargs)
+            except Exception as exc:
+                return self.handle_exception(request, exc)
+
+    async def select_read_database(self, request):
+        if not self.replica_reads or request.method not in SAFE_METHODS:
+            return
+
+        if not await ais_pinned(*read_scopes(self.user, self.read_pin_scopes)):
+            use_replica()
+
+    async def get_user(self, request):
+        result = await ClerkAuthentication().aauthenticate(request)
+        user = result[0] if result else None
+
+        if user is None and self.authentication_required:
+            raise NotAuthenticated()
+
+        return user
+
+    def handle_exception(self, request, exc):
+        # Comme APIView sans authenticate_header : 403 plutôt que 401
+        if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+            exc.status_code = 403
+
+        response = exception_handler(exc, {"view": self, "request": request})
+        if response is None:
+            raise exc
+
+        return json_response(response.data, status=response.status_code)
+
+    def get_serializer_context(self):
+        return {"request": self.request}
+
+
+class AsyncCatalogView(ResourceQuerysetMixin, AsyncAPIView):
+    """
+    ETag / Last-Modified du catalogue (cf. CatalogConditionalMixin) :
+    le 304 ne coûte ni ORM ni thread.
+    """
+
+    replica_reads = True
+    read_pin_scopes = (CATALOG,)
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return await super().dispatch(request, *args, **kwargs)
+
+        version = await aget_version(CATALOG)
+        etag = quote_etag(f"{CATALOG}-{version}")
+        last_modified = int(version_datetime(version).timestamp())
+
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if not_modified is not None:
+            return not_modified
+
+        response = await super().dispatch(request, *args, **kwargs)
+
+        if response.status_code == 200:
+            response.headers["ETag"] = etag
+            response.headers["Last-Modified"] = http_date(last_modified)
+            patch_cache_control(response, public=True, no_cache=True)
+
+        return response
+
+    async def serialize_resources(self, resources, **kwargs):
+        # Sérialisation synchrone : l'arbre chargé ici est passé tel quel,
+        # elle ne relit ni la version (cache) ni la base
+        context = self.get_serializer_context()
+        context["category_tree"] = await aget_category_tree()
+
+        return ResourceSerializer(resources, context=context, **kwargs).data
+
+
+# =======================
+# CATALOGUE
+# =======================
+
+class AsyncCategoryListView(AsyncCatalogView):
+    async def get(self, request):
+        tree = await aget_category_tree()
+        return json_response(tree.roots)
+
+
+class AsyncResourceListView(AsyncCatalogView):
+    async def get(self, request):
+        queryset = self.filter_resource_queryset(
+            self.get_resource_queryset(), request.GET
+        )
+
+        paginator = KeysetPagination()
+        page = await paginator.apaginate_queryset(queryset, request)
+
+        data = paginator.get_paginated_data(
+            await self.serialize_resources(page, many=True)
+        )
+        data["facets"] = await sync_to_async(get_facets)(request.GET.get("category"))
+
+        return json_response(data)
+
+
+class AsyncResourceDetailView(AsyncCatalogView):
+    async def get(self, request, pk):
+        try:
+            resource = await self.get_resource_queryset().aget(pk=pk)
+        except Resource.DoesNotExist:
+            raise NotFound()
+
+        return json_response(await self.serialize_resources(resource))
+
+
+# =======================
+# RÉSERVATIONS
+# =======================
+
+class AsyncUserReservationListView(ReservationListMixin, AsyncAPIView):
+    authentication_required = True
+    replica_reads = True
+
+    async def get(self, request):
+        queryset = self.get_reservation_queryset().filter(
+            user_clerk_id=self.user.id
+        )
+
+        paginator = KeysetPagination()
+        page = await paginator.apaginate_queryset(queryset, request)
+
+        context = self.get_serializer_context()
+        context["profiles"] = await aprofiles_by_clerk_id(
+            reservation.user_clerk_id for reservation in page
+        )
+
+        serializer = ReservationSerializer(page, many=True, context=context)
+        return json_response(paginator.get_paginated_data(serializer.data))
+
+
+class AsyncReservationCreateView(ReservationListMixin, AsyncAPIView):
+    authentication_required = True
+
+    async def post(self, request):
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError:
+            raise ParseError()
+
+        # 🔥 Idempotency-Key (cf. core.idempotency.idempotent)
+        record = None
+        key = get_idempotency_key(request)
+
+        if key is not None:
+            record, claimed = await sync_to_async(claim)(
+                self.user.id, key, request_hash(data)
+            )
+            if not claimed:
+                response = json_response(record.response, status=record.status_code)
+                response.headers[REPLAYED_HEADER] = "true"
+                return response
+
+        try:
+            result = await self.create(data)
+        except BaseException:
+            if record is not None:
+                await record.adelete()
+            raise
+
+        if record is not None:
+            await astore_response(record, 201, result)
+
+        return json_response(result, status=201)
+
+    async def create(self, data):
+        serializer = ReservationSerializer(
+            data=data, context=self.get_serializer_context()
+        )
+
+        # Validation (ressource et options : requêtes ORM) dans un thread
+        await sync_to_async(serializer.is_valid)(raise_exception=True)
+
+        reservation = await acreate_reservation(
+            user_clerk_id=self.user.id, **serializer.validated_data
+        )
+
+        # Relecture avec le plan de préchargement des listes
+        reservation = await self.get_reservation_queryset().aget(pk=reservation.pk)
+
+        context = self.get_serializer_context()
+        context["profiles"] = {self.user.id: self.user.profile}
+
+        return ReservationSerializer(reservation, context=context).data
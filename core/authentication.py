@@ -1,11 +1,10 @@
-import requests
+from asgiref.sync import sync_to_async
 from jose import jwt
 from rest_framework import authentication, exceptions
 
-from .models import UserProfile
-
-
-CLERK_JWKS_URL = "https://topical-lemming-46.clerk.accounts.dev/.well-known/jwks.json"
+from .jwks import get_key_store
+from .profiles import aresolve_profile, resolve_profile
+from .token_cache import get_token_cache
 
 
 class ClerkUser:
@@ -20,32 +19,14 @@ class ClerkUser:
 
 
 class ClerkAuthentication(authentication.BaseAuthentication):
-    def authenticate(self, request):
-        auth_header = request.headers.get("Authorization")
-
-        if not auth_header:
-            return None
-
-        parts = auth_header.split()
-
-        if len(parts) != 2 or parts[0].lower() != "bearer":
-            raise exceptions.AuthenticationFailed("Invalid authorization header.")
-
-        token = parts[1]
-
+    def verify_token(self, token):
         try:
             # 1️⃣ Lire le header pour récupérer le KID
             unverified_header = jwt.get_unverified_header(token)
             kid = unverified_header.get("kid")
 
-            # 2️⃣ Récupérer les clés publiques Clerk
-            jwks = requests.get(CLERK_JWKS_URL).json()
-
-            key = None
-            for jwk in jwks["keys"]:
-                if jwk["kid"] == kid:
-                    key = jwk
-                    break
+            # 2️⃣ Récupérer la clé publique Clerk (cache du process)
+            key = get_key_store().get_key(kid)
 
             if key is None:
                 raise exceptions.AuthenticationFailed("Public key not found.")
@@ -61,43 +42,81 @@ class ClerkAuthentication(authentication.BaseAuthentication):
         except Exception:
             raise exceptions.AuthenticationFailed("Invalid token.")
 
+        return payload
+
+    def get_token(self, request):
+        auth_header = request.headers.get("Authorization")
+
+        if not auth_header:
+            return None
+
+        parts = auth_header.split()
+
+        if len(parts) != 2 or parts[0].lower() != "bearer":
+            raise exceptions.AuthenticationFailed("Invalid authorization header.")
+
+        return parts[1]
+
+    @staticmethod
+    def get_claims(payload):
         # 🔥 Données Clerk
         user_id = payload.get("sub")
-        email = payload.get("email")
-        first_name = payload.get("first_name")
-        last_name = payload.get("last_name")
 
         if not user_id:
             raise exceptions.AuthenticationFailed("Invalid Clerk token.")
 
-        # 🔥 Création ou récupération du profil
-        profile, created = UserProfile.objects.get_or_create(
-            clerk_user_id=user_id,
-            defaults={
-                "email": email or f"{user_id}@placeholder.local",
-                "first_name": first_name,
-                "last_name": last_name,
-            }
+        return (
+            user_id,
+            payload.get("email"),
+            payload.get("first_name"),
+            payload.get("last_name"),
         )
 
-        # 🔥 Mise à jour automatique si les infos changent
-        updated = False
+    def authenticate(self, request):
+        token = self.get_token(request)
+
+        if token is None:
+            return None
+
+        token_cache = get_token_cache()
+
+        # 0️⃣ Token déjà vérifié : on saute la vérification RS256
+        payload = token_cache.get(token)
+
+        if payload is None:
+            payload = self.verify_token(token)
+            token_cache.set(token, payload)
+
+        # 🔥 Profil résolu une seule fois par requête (cache entre requêtes)
+        profile = resolve_profile(*self.get_claims(payload))
+
+        user = ClerkUser(payload, profile)
+
+        return (user, None)
+
+    async def aauthenticate(self, request):
+        """
+        authenticate() pour les vues async : le fetch JWKS et la
+        vérification RS256 tournent dans un thread, jamais dans la boucle
+        d'événements.
+        """
+        token = self.get_token(request)
+
+        if token is None:
+            return None
 
-        if email and profile.email != email:
-            profile.email = email
-            updated = True
+        token_cache = get_token_cache()
 
-        if first_name and profile.first_name != first_name:
-            profile.first_name = first_name
-            updated = True
+        payload = token_cache.get(token)
 
-        if last_name and profile.last_name != last_name:
-            profile.last_name = last_name
-            updated = True
+        if payload is None:
+            payload = await sync_to_async(
+                self.verify_token, thread_sensitive=False
+            )(token)
+            token_cache.set(token, payload)
 
-        if updated:
-            profile.save()
+        profile = await aresolve_profile(*self.get_claims(payload))
 
         user = ClerkUser(payload, profile)
 
-        return (user, None)
\ No newline at end of file
+        return (user, None)
@@ -0,0 +1,277 @@
+import json
+import os
+import sqlite3
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from urllib.parse import urlencode
+
+import requests
+from django.conf import settings
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+
+from .models import Reservation, Resource, ResourceOptionValue, UserProfile
+from .versions import CATALOG, CATEGORY_TREE, bump_version
+
+
+# =========================
+# BENCHMARK DE L'API (scénario + mesures)
+# =========================
+
+BenchRequest = namedtuple("BenchRequest", "method path data token")
+
+ADMIN_ID = "bench_admin"
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+@contextmanager
+def restored_database():
+    """
+    Les routes en écriture (création, statuts, statuts en masse) modifient
+    la base mesurée : copie avant la mesure (API backup de SQLite),
+    recopiée par-dessus ensuite. Les versions sont relevées : aucune
+    réponse en cache ne décrit les écritures annulées.
+    """
+    connection.ensure_connection()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot = sqlite3.connect(os.path.join(tmp, "snapshot.sqlite3"))
+        try:
+            connection.connection.backup(snapshot)
+            yield
+        finally:
+            connection.ensure_connection()
+            snapshot.backup(connection.connection)
+            snapshot.close()
+
+    bump_version(CATEGORY_TREE)
+    bump_version(CATALOG)
+
+
+def build_scenario(clerk):
+    """
+    Une requête par route de core.urls, sur les données existantes.
+    Tokens signés par `clerk` (LocalClerk) pour un user semé et un admin.
+    """
+    resource = Resource.objects.filter(
+        is_active=True, options__values__isnull=False
+    ).order_by("id").first()
+    reservation = Reservation.objects.order_by("-created_at", "-id").first()
+
+    if resource is None or reservation is None:
+        return None
+
+    option_value = ResourceOptionValue.objects.filter(
+        option__resource=resource
+    ).order_by("id").first()
+
+    UserProfile.objects.update_or_create(
+        clerk_user_id=ADMIN_ID,
+        defaults={"email": f"{ADMIN_ID}@example.com", "is_admin": True},
+    )
+
+    user = clerk.mint(reservation.user_clerk_id)
+    admin = clerk.mint(ADMIN_ID)
+
+    def get(name, args=None, query=None, token=None):
+        path = reverse(name, args=args)
+        if query:
+            path += "?" + urlencode(query)
+        return BenchRequest("GET", path, None, token)
+
+    def post(name, data, args=None, token=None):
+        return BenchRequest("POST", reverse(name, args=args), data, token)
+
+    return {
+        "category-list": get("category-list"),
+        "resource-list": get("resource-list"),
+        "resource-search": get("resource-search", query={"q": "ressource"}),
+        "resource-detail": get("resource-detail", args=[resource.pk]),
+        "protected": get("protected", token=user),
+        "reservation-create": post(
+            "reservation-create",
+            {"resource": resource.pk, "selected_options": [option_value.pk]},
+            token=user,
+        ),
+        "my-reservations": get("my-reservations", token=user),
+        "admin-reservations": get("admin-reservations", token=admin),
+        "admin-reservation-update-status": post(
+            "admin-reservation-update-status",
+            {"status": "confirmed"},
+            args=[reservation.pk],
+            token=admin,
+        ),
+        "admin-reservation-bulk-update-status": post(
+            "admin-reservation-bulk-update-status",
+            {"status": "confirmed", "filter": {"status": "pending"}},
+            token=admin,
+        ),
+        "admin-reservation-export": get(
+            "admin-reservation-export",
+            query={"output": "ndjson", "status": "cancelled"},
+            token=admin,
+        ),
+        "admin-stats": get("admin-stats", token=admin),
+    }
+
+
+# -------------------------
+# Transports
+# -------------------------
+
+class InProcessTransport:
+    """
+    django.test.Client (WSGI en process), un client par thread.
+    Nécessite QUERY_BUDGET_ENABLED pour X-Query-Count.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def send(self, request):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = Client()
+
+        headers = {}
+        if request.token:
+            headers["HTTP_AUTHORIZATION"] = f"Bearer {request.token}"
+
+        response = client.generic(
+            request.method,
+            request.path,
+            json.dumps(request.data) if request.data is not None else "",
+            content_type="application/json",
+            **headers,
+        )
+        if response.streaming:
+            b"".join(response.streaming_content)
+
+        return response.status_code, response.headers.get("X-Query-Count")
+
+    def close(self):
+        # Chaque thread a sa propre connexion : on la ferme en sortant
+        connection.close()
+
+
+class HTTPTransport:
+    """
+    Serveur réel (runserver, gunicorn, uvicorn). X-Query-Count n'est
+    présent que si le serveur tourne avec QUERY_BUDGET_ENABLED=true.
+    """
+
+    def __init__(self, base_url, timeout=30):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def send(self, request):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+
+        headers = {}
+        if request.token:
+            headers["Authorization"] = f"Bearer {request.token}"
+
+        response = session.request(
+            request.method,
+            self.base_url + request.path,
+            json=request.data,
+            headers=headers,
+            timeout=self.timeout,
+        )
+        return response.status_code, response.headers.get("X-Query-Count")
+
+    def close(self):
+        session = getattr(self._local, "session", None)
+        if session is not None:
+            session.close()
+
+
+# -------------------------
+# Mesure
+# -------------------------
+
+def measure(transport, request, total, concurrency):
+    """
+    `total` requêtes envoyées par `concurrency` threads. Retourne débit,
+    latences (p50/p95/p99) et requêtes SQL par requête HTTP.
+    """
+    remaining = iter(range(total))
+    lock = threading.Lock()
+    latencies = []
+    queries = []
+    errors = 0
+
+    def worker():
+        nonlocal errors
+
+        try:
+            while True:
+                with lock:
+                    if next(remaining, None) is None:
+                        return
+
+                started = time.perf_counter()
+                try:
+                    status, query_count = transport.send(request)
+                except Exception:
+                    status, query_count = None, None
+                elapsed = time.perf_counter() - started
+
+                with lock:
+                    latencies.append(elapsed)
+                    if status is None or status >= 400:
+                        errors += 1
+                    if query_count is not None:
+                        queries.append(int(query_count))
+        finally:
+            transport.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    return {
+        "method": request.method,
+        "path": request.path,
+        "requests": total,
+        "errors": errors,
+        "rps": round(total / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "queries_per_request": (
+            round(statistics.mean(queries), 2) if queries else None
+        ),
+    }
@@ -0,0 +1,92 @@
+import threading
+
+from asgiref.sync import sync_to_async
+
+from .models import Category
+from .versions import CATEGORY_TREE, aget_version, get_version
+
+
+# =========================
+# ARBRE DES CATÉGORIES (en mémoire)
+# =========================
+
+class CategoryTree:
+    """
+    Arbre des catégories construit en une seule requête.
+
+    Chaque noeud a la forme de `CategorySerializer` (id, name, slug, parent,
+    children) ; `children` ne contient que les catégories actives. Les dicts
+    sont partagés entre requêtes : ils doivent être traités en lecture seule.
+    """
+
+    def __init__(self, rows):
+        self.nodes = {}
+        self.roots = []
+
+        for row in rows:
+            self.nodes[row["id"]] = {
+                "id": row["id"],
+                "name": row["name"],
+                "slug": row["slug"],
+                "parent": row["parent_id"],
+                "children": [],
+            }
+
+        for row in rows:
+            if not row["is_active"]:
+                continue
+
+            node = self.nodes[row["id"]]
+            parent = self.nodes.get(row["parent_id"])
+
+            if row["parent_id"] is None:
+                self.roots.append(node)
+            elif parent is not None:
+                parent["children"].append(node)
+
+    @classmethod
+    def build(cls):
+        rows = list(
+            Category.objects.order_by("id").values(
+                "id", "name", "slug", "parent_id", "is_active"
+            )
+        )
+        return cls(rows)
+
+    def get(self, category_id):
+        return self.nodes.get(category_id)
+
+
+# =========================
+# CACHE PAR PROCESS + VERSION
+# =========================
+
+_tree = None
+_tree_version = None
+_tree_lock = threading.Lock()
+
+
+def get_category_tree():
+    global _tree, _tree_version
+
+    version = get_version(CATEGORY_TREE)
+
+    if _tree is None or _tree_version != version:
+        with _tree_lock:
+            if _tree is None or _tree_version != version:
+                _tree = CategoryTree.build()
+                _tree_version = version
+
+    return _tree
+
+
+async def aget_category_tree():
+    """
+    Version async : aucun thread tant que l'arbre en mémoire est à jour.
+    L'arbre est propre au process, sa version est lue dans le cache
+    "default" (partagé en production, cf. core.checks).
+    """
+    if _tree is not None and _tree_version == await aget_version(CATEGORY_TREE):
+        return _tree
+
+    return await sync_to_async(get_category_tree)()
@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+
+# =========================
+# CHECKS (manage.py check --deploy)
+# =========================
+
+# Backends dont le contenu n'est visible que du process qui l'a écrit
+PROCESS_LOCAL_CACHES = {
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+}
+
+
+def is_process_local(alias="default"):
+    return settings.CACHES[alias]["BACKEND"] in PROCESS_LOCAL_CACHES
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Le cache "default" porte les profils Clerk (dont is_admin) et les
+    versions (catalogue, arbre des catégories) qui invalident l'ETag et le
+    cache de réponses : avec un cache local au process, une invalidation
+    n'atteint que le process qui a écrit.
+    """
+    if not is_process_local("default"):
+        return []
+
+    return [
+        Error(
+            "Le cache 'default' est local au process "
+            f"({settings.CACHES['default']['BACKEND']}).",
+            hint=(
+                "Les profils (is_admin) et les versions du catalogue ne "
+                "sont pas invalidés dans les autres workers. Définir CACHE_BACKEND / "
+                "CACHE_LOCATION vers un cache partagé (Redis, Memcached, "
+                "FileBasedCache, DatabaseCache)."
+            ),
+            id="core.E001",
+        )
+    ]
@@ -0,0 +1,370 @@
+from collections import Counter, defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db import connection, transaction
+from django.db.models import Case, Count, F, QuerySet, Sum, Value, When
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Reservation, ReservationDailyStat, ReservationStats, Resource
+
+
+# =========================
+# COMPTEURS DE RÉSERVATIONS (Resource + ReservationStats + rollup quotidien)
+# =========================
+
+STATS_PK = 1
+
+BATCH_SIZE = 500
+
+STATUSES = [choice[0] for choice in Reservation.STATUS_CHOICES]
+
+RESOURCE_FIELDS = list(Resource.COUNTER_FIELDS)
+STATS_FIELDS = ["total"] + STATUSES
+
+
+def resource_field(status=None):
+    return f"reservations_{status}" if status else "reservations_total"
+
+
+def reservation_key(created_at, resource_id, status):
+    """
+    Clé des deltas : (jour de création dans TIME_ZONE, ressource, statut).
+    """
+    return (timezone.localdate(created_at), resource_id, status)
+
+
+def apply(deltas):
+    """
+    deltas : {(day, resource_id, status): n}. Un seul UPDATE (F() + CASE)
+    pour toutes les ressources concernées, un pour la ligne globale, un
+    upsert pour le rollup. À appeler dans la transaction de l'écriture des
+    réservations.
+    """
+    per_resource = defaultdict(Counter)
+    totals = Counter()
+    per_day = Counter()
+
+    for (day, resource_id, status), n in deltas.items():
+        per_resource[resource_id][resource_field()] += n
+        per_resource[resource_id][resource_field(status)] += n
+        totals["total"] += n
+        totals[status] += n
+        per_day[(day, resource_id, status)] += n
+
+    changes = {}
+    for field in RESOURCE_FIELDS:
+        whens = [
+            When(pk=pk, then=Value(counts[field]))
+            for pk, counts in per_resource.items()
+            if counts[field]
+        ]
+        if whens:
+            changes[field] = F(field) + Case(*whens, default=Value(0))
+
+    if changes:
+        Resource.objects.filter(pk__in=per_resource).update(**changes)
+
+    update_stats(totals)
+    upsert_rollups(per_day)
+
+
+def update_stats(totals):
+    """
+    totals : {champ de ReservationStats: delta}. Si la ligne globale
+    n'existe pas (flush de la base), elle est créée à partir des
+    réservations, qui incluent déjà l'écriture en cours.
+    """
+    changes = {field: F(field) + n for field, n in totals.items() if n}
+    if not changes:
+        return
+
+    if not ReservationStats.objects.filter(pk=STATS_PK).update(**changes):
+        _, actual = actual_counts()
+        ReservationStats.objects.get_or_create(
+            pk=STATS_PK, defaults={field: actual[field] for field in STATS_FIELDS}
+        )
+
+
+def upsert_rollups(deltas):
+    """
+    INSERT ... ON CONFLICT DO UPDATE (SQLite >= 3.24, PostgreSQL) : la
+    ligne du jour est créée ou incrémentée en une requête par paquet.
+    """
+    rows = [
+        (connection.ops.adapt_datefield_value(day), resource_id, status, n)
+        for (day, resource_id, status), n in deltas.items()
+        if n
+    ]
+    if not rows:
+        return
+
+    qn = connection.ops.quote_name
+    table = qn(ReservationDailyStat._meta.db_table)
+    count = qn("count")
+
+    with connection.cursor() as cursor:
+        for i in range(0, len(rows), BATCH_SIZE):
+            chunk = rows[i:i + BATCH_SIZE]
+            cursor.execute(
+                f"INSERT INTO {table} ({qn('day')}, {qn('resource_id')}, "
+                f"{qn('status')}, {count}) "
+                f"VALUES {', '.join(['(%s, %s, %s, %s)'] * len(chunk))} "
+                f"ON CONFLICT ({qn('day')}, {qn('resource_id')}, {qn('status')}) "
+                f"DO UPDATE SET {count} = {table}.{count} + excluded.{count}",
+                [param for row in chunk for param in row],
+            )
+
+
+def move(before=None, after=None):
+    """
+    Une réservation passe de `before` à `after`, chacun une clé
+    reservation_key() ou None (création, suppression).
+    """
+    deltas = Counter()
+    if before is not None:
+        deltas[before] -= 1
+    if after is not None:
+        deltas[after] += 1
+
+    apply(deltas)
+
+
+def status_groups(queryset):
+    """
+    [(day, resource_id, status, n)] des réservations de `queryset`.
+    """
+    return list(
+        queryset.order_by().annotate(
+            day=TruncDate("created_at")
+        ).values_list("day", "resource_id", "status").annotate(count=Count("id"))
+    )
+
+
+def deletion_deltas(groups):
+    """
+    groups : status_groups() des réservations supprimées.
+    """
+    return Counter({
+        (day, resource_id, status): -n for day, resource_id, status, n in groups
+    })
+
+
+def counted_in_batch(origin):
+    """
+    Suppression décomptée en un lot : QuerySet.delete() des réservations
+    (ReservationQuerySet) ou cascade depuis une ressource supprimée
+    (forget_resources). post_delete ne décrémente alors rien.
+    """
+    if isinstance(origin, QuerySet):
+        return origin.model in (Reservation, Resource)
+
+    return isinstance(origin, Resource)
+
+
+def forget_resources(resource_ids):
+    """
+    Ressources supprimées : leurs réservations (supprimées en cascade)
+    sortent de la ligne globale et leurs lignes du rollup sont supprimées.
+    Un GROUP BY, un UPDATE, un DELETE quel que soit le nombre de
+    réservations.
+    """
+    rows = ReservationDailyStat.objects.filter(resource_id__in=resource_ids)
+
+    totals = Counter()
+    for status, n in rows.order_by().values_list("status").annotate(n=Sum("count")):
+        totals["total"] -= n
+        totals[status] -= n
+
+    update_stats(totals)
+    rows.delete()
+
+
+def prune_orphan_rollups():
+    """
+    Lignes du rollup dont la ressource n'existe plus (FK sans contrainte).
+    """
+    return ReservationDailyStat.objects.exclude(
+        resource_id__in=Resource.objects.values("pk")
+    ).delete()[0]
+
+
+def status_change_deltas(groups, new_status):
+    """
+    groups : status_groups() des réservations passées à `new_status`
+    (celles déjà au bon statut ne changent pas).
+    """
+    deltas = Counter()
+    for day, resource_id, status, n in groups:
+        if status != new_status:
+            deltas[(day, resource_id, status)] -= n
+            deltas[(day, resource_id, new_status)] += n
+
+    return deltas
+
+
+# -------------------------
+# Lecture
+# -------------------------
+
+def count_reservations(status=None, resource_id=None):
+    """
+    Nombre de réservations (toutes, d'un statut, d'une ressource) lu dans
+    les compteurs. None si la ligne n'existe pas.
+    """
+    if resource_id is not None:
+        return Resource.objects.filter(pk=resource_id).values_list(
+            resource_field(status), flat=True
+        ).first()
+
+    return ReservationStats.objects.filter(pk=STATS_PK).values_list(
+        status or "total", flat=True
+    ).first()
+
+
+def empty_counts():
+    return {field: 0 for field in STATS_FIELDS}
+
+
+def all_time_stats():
+    stats = ReservationStats.objects.filter(pk=STATS_PK).values(*STATS_FIELDS).first()
+    return stats or empty_counts()
+
+
+def daily_stats(start, end, resource_id=None, status=None):
+    """
+    Réservations créées entre `start` et `end` (inclus) : par jour (tous
+    les jours, même vides), par ressource et au total. Une seule lecture
+    du rollup, par plage sur l'index (day, ...).
+    """
+    rows = ReservationDailyStat.objects.filter(day__range=(start, end))
+    if resource_id is not None:
+        rows = rows.filter(resource_id=resource_id)
+    if status is not None:
+        rows = rows.filter(status=status)
+
+    rows = rows.order_by("day").values_list(
+        "day", "resource_id", "resource__name", "status", "count"
+    )
+
+    days = {
+        start + timedelta(days=i): empty_counts()
+        for i in range((end - start).days + 1)
+    }
+    resources = {}
+    totals = empty_counts()
+
+    for day, pk, name, row_status, count in rows:
+        resource = resources.setdefault(
+            pk, {"id": pk, "name": name, **empty_counts()}
+        )
+
+        for counts in (days[day], resource, totals):
+            counts["total"] += count
+            counts[row_status] += count
+
+    return {
+        "start": start,
+        "end": end,
+        "totals": totals,
+        "days": [{"day": day, **counts} for day, counts in days.items()],
+        "resources": sorted(
+            resources.values(), key=lambda row: (-row["total"], row["id"])
+        ),
+    }
+
+
+# -------------------------
+# Réparation
+# -------------------------
+
+def actual_counts():
+    per_resource = defaultdict(Counter)
+    totals = Counter()
+
+    rows = Reservation.objects.order_by().values_list(
+        "resource_id", "status"
+    ).annotate(count=Count("id"))
+
+    for resource_id, status, n in rows:
+        per_resource[resource_id][resource_field()] += n
+        per_resource[resource_id][resource_field(status)] += n
+        totals["total"] += n
+        totals[status] += n
+
+    return per_resource, totals
+
+
+def reconcile(batch_size=BATCH_SIZE, dry_run=False):
+    """
+    Recompte tout (un GROUP BY) et ne réécrit que ce qui a dérivé.
+    Retourne (ressources corrigées, ligne globale corrigée).
+    """
+    with transaction.atomic():
+        per_resource, totals = actual_counts()
+
+        drifted = []
+        resources = Resource.objects.only(*RESOURCE_FIELDS).order_by("pk")
+
+        for resource in resources.iterator(chunk_size=batch_size):
+            counts = per_resource.get(resource.pk, Counter())
+            if any(getattr(resource, f) != counts[f] for f in RESOURCE_FIELDS):
+                for field in RESOURCE_FIELDS:
+                    setattr(resource, field, counts[field])
+                drifted.append(resource)
+
+        stats = ReservationStats.objects.filter(pk=STATS_PK).first()
+        stats_drifted = stats is None or any(
+            getattr(stats, f) != totals[f] for f in STATS_FIELDS
+        )
+
+        if not dry_run:
+            Resource.objects.bulk_update(drifted, RESOURCE_FIELDS, batch_size=batch_size)
+
+            if stats_drifted:
+                ReservationStats.objects.update_or_create(
+                    pk=STATS_PK,
+                    defaults={field: totals[field] for field in STATS_FIELDS},
+                )
+
+    return len(drifted), stats_drifted
+
+
+def day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def rebuild_rollups(start, end, chunk_days=7):
+    """
+    Reconstruit le rollup des jours `start` à `end` par tranches de
+    `chunk_days` jours, une transaction par tranche (les écritures
+    concurrentes ne sont bloquées que le temps d'une tranche). Génère
+    (premier jour, dernier jour, lignes écrites) pour chaque tranche.
+    """
+    first = start
+
+    while first <= end:
+        last = min(first + timedelta(days=chunk_days - 1), end)
+
+        with transaction.atomic():
+            ReservationDailyStat.objects.filter(day__range=(first, last)).delete()
+
+            groups = status_groups(
+                Reservation.objects.filter(
+                    created_at__gte=day_start(first),
+                    created_at__lt=day_start(last + timedelta(days=1)),
+                )
+            )
+            rows = ReservationDailyStat.objects.bulk_create(
+                (
+                    ReservationDailyStat(
+                        day=day, resource_id=resource_id, status=status, count=n
+                    )
+                    for day, resource_id, status, n in groups
+                ),
+                batch_size=BATCH_SIZE,
+            )
+
+        yield first, last, len(rows)
+
+        first = last + timedelta(days=1)
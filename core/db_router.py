@@ -0,0 +1,140 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+
+# =========================
+# ROUTAGE LECTURE / ÉCRITURE (primaire + réplique)
+# =========================
+
+PRIMARY = "default"
+REPLICA = "replica"
+
+PIN_KEY = "core:db:pin:{}"
+
+# Base des lectures de la requête en cours : "default" sauf si la vue
+# appelle use_replica() (cf. ReplicaReadMixin)
+_read_alias = ContextVar("core_read_alias", default=PRIMARY)
+
+
+class PrimaryReplicaRouter:
+    """
+    Écritures et migrations sur "default". Lectures sur "replica"
+    uniquement dans une vue en lecture seule qui l'a demandé.
+    """
+
+    def db_for_read(self, model, **hints):
+        # Objets liés (prefetch, FK) : même base que l'instance d'origine
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            return instance._state.db
+
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return {obj1._state.db, obj2._state.db} <= {PRIMARY, REPLICA}
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # La réplique est une copie de la primaire (cf. sync_replica)
+        return db == PRIMARY
+
+
+def read_alias():
+    return _read_alias.get()
+
+
+@contextmanager
+def read_scope():
+    """
+    Portée d'une requête : lectures sur "default" tant que use_replica()
+    n'a pas été appelé, valeur précédente restaurée en sortie.
+    """
+    token = _read_alias.set(PRIMARY)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def replica_available():
+    """
+    Réplique distincte de la primaire. Sinon (DATABASE_REPLICA_NAME absent,
+    base de test miroir) les lectures restent sur "default" : pas de
+    seconde connexion vers la même base.
+    """
+    if REPLICA not in settings.DATABASES:
+        return False
+
+    return (
+        connections[REPLICA].settings_dict["NAME"]
+        != connections[PRIMARY].settings_dict["NAME"]
+    )
+
+
+def use_replica():
+    if replica_available():
+        _read_alias.set(REPLICA)
+
+
+def sync_replica():
+    """
+    Copie la primaire dans la réplique (API backup de SQLite) : la
+    "réplication" d'un environnement local.
+    """
+    source = connections[PRIMARY]
+    target = connections[REPLICA]
+
+    source.ensure_connection()
+    target.ensure_connection()
+    source.connection.backup(target.connection)
+
+
+# -------------------------
+# Lectures collées à la primaire après une écriture
+# -------------------------
+
+def user_scope(user):
+    return f"user:{user.id}"
+
+
+def read_scopes(user, extra=()):
+    scopes = list(extra)
+    if user is not None and getattr(user, "is_authenticated", False):
+        scopes.append(user_scope(user))
+    return scopes
+
+
+def pin_to_primary(*scopes):
+    """
+    Pendant REPLICA_PIN_SECONDS, les lectures de ces scopes restent sur la
+    primaire : la réplique a le temps de rattraper l'écriture.
+    """
+    cache.set_many(
+        {PIN_KEY.format(scope): True for scope in scopes},
+        settings.REPLICA_PIN_SECONDS,
+    )
+
+
+async def apin_to_primary(*scopes):
+    await cache.aset_many(
+        {PIN_KEY.format(scope): True for scope in scopes},
+        settings.REPLICA_PIN_SECONDS,
+    )
+
+
+def is_pinned(*scopes):
+    return bool(scopes) and bool(
+        cache.get_many([PIN_KEY.format(scope) for scope in scopes])
+    )
+
+
+async def ais_pinned(*scopes):
+    return bool(scopes) and bool(
+        await cache.aget_many([PIN_KEY.format(scope) for scope in scopes])
+    )
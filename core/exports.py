@@ -0,0 +1,148 @@
+import csv
+import json
+from itertools import islice
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .models import Reservation
+from .profiles import profiles_by_clerk_id
+
+
+# =========================
+# EXPORT DES RÉSERVATIONS (streaming)
+# =========================
+
+CHUNK_SIZE = 2000
+
+FIELDS = (
+    "id",
+    "created_at",
+    "status",
+    "resource_id",
+    "resource_name",
+    "user_clerk_id",
+    "user_email",
+    "user_first_name",
+    "user_last_name",
+    "selected_options",
+)
+
+CONTENT_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def options_by_reservation(reservation_ids, using=None):
+    """
+    {reservation_id: "Taille: M; Couleur: Rouge"} en une seule requête.
+    """
+    through = Reservation.selected_options.through
+    rows = through.objects.using(using).filter(
+        reservation_id__in=reservation_ids
+    ).order_by(
+        "reservation_id", "resourceoptionvalue_id"
+    ).values_list(
+        "reservation_id",
+        "resourceoptionvalue__option__name",
+        "resourceoptionvalue__value",
+    )
+
+    labels = {}
+    for reservation_id, option, value in rows:
+        labels.setdefault(reservation_id, []).append(f"{option}: {value}")
+
+    return {pk: "; ".join(values) for pk, values in labels.items()}
+
+
+def iter_rows(queryset, chunk_size=CHUNK_SIZE):
+    """
+    Dicts prêts à exporter. Les réservations sont lues par paquets de
+    `chunk_size` (.iterator) ; profils et options sont chargés une fois par
+    paquet : la mémoire reste constante quel que soit le volume.
+    """
+    rows = queryset.order_by("-created_at", "-id").values_list(
+        "id",
+        "created_at",
+        "status",
+        "resource_id",
+        "resource__name",
+        "user_clerk_id",
+    ).iterator(chunk_size=chunk_size)
+
+    # Profils et options lus sur la même base que les réservations
+    db = queryset.db
+
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+
+        profiles = profiles_by_clerk_id((row[5] for row in chunk), using=db)
+        options = options_by_reservation([row[0] for row in chunk], using=db)
+
+        for pk, created_at, status, resource_id, resource_name, clerk_id in chunk:
+            profile = profiles.get(clerk_id)
+
+            yield {
+                "id": pk,
+                "created_at": timezone.localtime(created_at).isoformat(),
+                "status": status,
+                "resource_id": resource_id,
+                "resource_name": resource_name,
+                "user_clerk_id": clerk_id,
+                "user_email": profile.email if profile else None,
+                "user_first_name": profile.first_name if profile else None,
+                "user_last_name": profile.last_name if profile else None,
+                "selected_options": options.get(pk, ""),
+            }
+
+
+class Echo:
+    """
+    Pseudo-fichier pour csv.writer : renvoie la ligne au lieu de l'écrire.
+    """
+
+    def write(self, value):
+        return value
+
+
+# Caractères qu'un tableur interprète comme le début d'une formule.
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def escape_formula(value):
+    """
+    Neutralise les valeurs (claims Clerk, saisies admin) qu'Excel ou
+    LibreOffice exécuteraient comme formule : préfixe « ' ».
+    """
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def iter_csv(rows):
+    writer = csv.DictWriter(Echo(), fieldnames=FIELDS)
+    yield writer.writeheader()
+
+    for row in rows:
+        yield writer.writerow(
+            {key: escape_formula(value) for key, value in row.items()}
+        )
+
+
+def iter_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + "\n"
+
+
+def export_response(queryset, output="csv", chunk_size=CHUNK_SIZE):
+    rows = iter_rows(queryset, chunk_size=chunk_size)
+    content = iter_csv(rows) if output == "csv" else iter_ndjson(rows)
+
+    response = StreamingHttpResponse(content, content_type=CONTENT_TYPES[output])
+    response["Content-Disposition"] = (
+        f'attachment; filename="reservations.{output}"'
+    )
+    return response
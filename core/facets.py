@@ -0,0 +1,174 @@
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .models import FacetCount, ResourceFacet, ResourceOptionValue
+
+
+# =========================
+# FACETTES (options des ressources)
+# =========================
+
+SEPARATOR = ":"
+BATCH_SIZE = 1000
+
+
+def facet_key(option, value):
+    return f"{option}{SEPARATOR}{value}"
+
+
+def parse_facet_key(key):
+    """
+    "Couleur:Rouge" -> ("Couleur", "Rouge"), None si le format est invalide.
+    """
+    option, separator, value = key.partition(SEPARATOR)
+
+    if not separator or not option or not value:
+        return None
+
+    return option, value
+
+
+# -------------------------
+# Mise à jour (appelée par les signaux)
+# -------------------------
+
+def facet_rows(resource_filter):
+    values = ResourceOptionValue.objects.filter(
+        option__resource__is_active=True,
+        **resource_filter,
+    ).values_list(
+        "option__resource_id",
+        "option__resource__category_id",
+        "option__name",
+        "value",
+    ).distinct()
+
+    return [
+        ResourceFacet(
+            resource_id=resource_id,
+            category_id=category_id,
+            option=option,
+            value=value,
+        )
+        for resource_id, category_id, option, value in values
+    ]
+
+
+def recount(category_ids):
+    """
+    Recalcule les compteurs des catégories données et du catalogue entier.
+    Un GROUP BY à l'écriture, aucun à la lecture. DELETE + INSERT dans une
+    transaction : un lecteur ne voit jamais les compteurs vides.
+    """
+    category_ids = set(category_ids)
+
+    with transaction.atomic():
+        FacetCount.objects.filter(
+            Q(category_id__in=category_ids) | Q(category__isnull=True)
+        ).delete()
+
+        per_category = ResourceFacet.objects.filter(
+            category_id__in=category_ids
+        ).values("category_id", "option", "value").annotate(count=Count("id"))
+
+        overall = ResourceFacet.objects.values(
+            "option", "value"
+        ).annotate(count=Count("id"))
+
+        FacetCount.objects.bulk_create(
+            [FacetCount(**row) for row in per_category]
+            + [FacetCount(category_id=None, **row) for row in overall],
+            batch_size=BATCH_SIZE,
+        )
+
+
+def sync_resources(resource_ids, category_ids=()):
+    """
+    Réécrit les facettes des ressources données puis leurs compteurs, en
+    une transaction (appelée depuis on_commit, donc hors de celle de
+    l'écriture d'origine).
+    `category_ids` : catégories à recompter en plus (ex: ressource supprimée).
+    """
+    resource_ids = set(resource_ids)
+    if not resource_ids:
+        return
+
+    with transaction.atomic():
+        affected = set(category_ids)
+        affected.update(
+            ResourceFacet.objects.filter(
+                resource_id__in=resource_ids
+            ).values_list("category_id", flat=True)
+        )
+
+        ResourceFacet.objects.filter(resource_id__in=resource_ids).delete()
+
+        rows = facet_rows({"option__resource_id__in": resource_ids})
+        ResourceFacet.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+        affected.update(row.category_id for row in rows)
+
+        recount(affected)
+
+
+def rebuild():
+    """
+    Reconstruit toutes les facettes et tous les compteurs.
+    """
+    with transaction.atomic():
+        ResourceFacet.objects.all().delete()
+        FacetCount.objects.all().delete()
+
+        rows = facet_rows({})
+        ResourceFacet.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+
+        recount({row.category_id for row in rows})
+
+    return len(rows)
+
+
+# -------------------------
+# Lecture
+# -------------------------
+
+def filter_by_option_values(queryset, keys):
+    """
+    Ressources ayant toutes les valeurs demandées (une sous-requête indexée
+    par valeur).
+    """
+    for option, value in keys:
+        queryset = queryset.filter(
+            id__in=ResourceFacet.objects.filter(
+                option=option,
+                value=value,
+            ).values("resource_id")
+        )
+
+    return queryset
+
+
+def get_facets(category_slug=None):
+    """
+    [{"option": "Couleur", "values": [{"value", "key", "count"}, ...]}, ...]
+    """
+    counts = FacetCount.objects.order_by("option", "value")
+
+    if category_slug:
+        counts = counts.filter(
+            category__slug=category_slug,
+            category__is_active=True,
+        )
+    else:
+        counts = counts.filter(category__isnull=True)
+
+    facets = []
+    for row in counts.values("option", "value", "count"):
+        if not facets or facets[-1]["option"] != row["option"]:
+            facets.append({"option": row["option"], "values": []})
+
+        facets[-1]["values"].append({
+            "value": row["value"],
+            "key": facet_key(row["option"], row["value"]),
+            "count": row["count"],
+        })
+
+    return facets
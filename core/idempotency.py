@@ -0,0 +1,180 @@
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import IdempotencyKey
+
+
+# =========================
+# IDEMPOTENCY-KEY (POST rejoués par le client)
+# =========================
+
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyKeyInProgress(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "A request with this Idempotency-Key is still in progress."
+    default_code = "idempotency_key_in_progress"
+
+
+class IdempotencyKeyReused(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = "This Idempotency-Key was already used with another request body."
+    default_code = "idempotency_key_reused"
+
+
+def get_idempotency_key(request):
+    key = request.headers.get(HEADER)
+
+    if key is None:
+        return None
+
+    key = key.strip()
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise ValidationError({
+            HEADER: f"Expected 1 to {MAX_KEY_LENGTH} characters."
+        })
+
+    return key
+
+
+def request_hash(data):
+    raw = json.dumps(data, sort_keys=True, cls=JSONEncoder)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def expiry_cutoff():
+    return timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+
+
+def in_progress_cutoff():
+    return timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_IN_PROGRESS_TIMEOUT)
+
+
+def is_stale(record):
+    """
+    Expirée, ou réservée sans réponse depuis trop longtemps : le process
+    qui l'a prise est mort entre le claim et store_response().
+    """
+    if record.created_at < expiry_cutoff():
+        return True
+
+    return record.status_code is None and record.created_at < in_progress_cutoff()
+
+
+def claim(user_clerk_id, key, fingerprint):
+    """
+    Réserve la clé pour cette requête : (record, True). Si une réponse est
+    déjà enregistrée pour la clé : (record, False).
+
+    Deux requêtes concurrentes : l'INSERT de la seconde échoue sur la
+    contrainte unique et elle reçoit un 409.
+    """
+    for _ in range(2):
+        # Cas courant d'un rejeu : une seule lecture, aucune écriture
+        record = IdempotencyKey.objects.filter(
+            user_clerk_id=user_clerk_id, key=key
+        ).first()
+
+        if record is not None and is_stale(record):
+            # La clé redevient libre
+            IdempotencyKey.objects.filter(pk=record.pk).delete()
+            record = None
+
+        if record is not None:
+            if record.request_hash != fingerprint:
+                raise IdempotencyKeyReused()
+            if record.status_code is None:
+                raise IdempotencyKeyInProgress()
+
+            return record, False
+
+        try:
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(
+                    user_clerk_id=user_clerk_id,
+                    key=key,
+                    request_hash=fingerprint,
+                )
+            return record, True
+        except IntegrityError:
+            # Doublon concurrent : on relit la ligne de l'autre requête
+            continue
+
+    raise IdempotencyKeyInProgress()
+
+
+def store_response(record, status_code, data):
+    IdempotencyKey.objects.filter(pk=record.pk).update(
+        status_code=status_code, response=data
+    )
+
+
+async def astore_response(record, status_code, data):
+    await IdempotencyKey.objects.filter(pk=record.pk).aupdate(
+        status_code=status_code, response=data
+    )
+
+
+def idempotent(request, user_clerk_id, handler):
+    """
+    Exécute `handler()` (qui renvoie une Response DRF) au plus une fois par
+    Idempotency-Key. Seules les réponses 2xx sont enregistrées : après une
+    erreur, la clé est libérée et le client peut réessayer.
+    """
+    key = get_idempotency_key(request)
+
+    if key is None:
+        return handler()
+
+    record, claimed = claim(user_clerk_id, key, request_hash(request.data))
+
+    if not claimed:
+        return Response(
+            record.response,
+            status=record.status_code,
+            headers={REPLAYED_HEADER: "true"},
+        )
+
+    try:
+        response = handler()
+    except BaseException:
+        record.delete()
+        raise
+
+    if status.is_success(response.status_code):
+        store_response(record, response.status_code, response.data)
+    else:
+        record.delete()
+
+    return response
+
+
+def purge_expired(batch_size=1000):
+    """
+    Supprime les clés expirées par paquets. Retourne le nombre supprimé.
+    """
+    cutoff = expiry_cutoff()
+    deleted = 0
+
+    while True:
+        ids = list(
+            IdempotencyKey.objects.filter(
+                created_at__lt=cutoff
+            ).values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return deleted
+
+        deleted += IdempotencyKey.objects.filter(id__in=ids).delete()[0]
@@ -0,0 +1,178 @@
+import io
+import logging
+import posixpath
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection
+from PIL import Image, ImageOps
+
+from .models import ResourcePhoto
+from .versions import CATALOG, bump_version
+
+
+logger = logging.getLogger(__name__)
+
+
+# =========================
+# VARIANTES RESPONSIVES DES PHOTOS
+# =========================
+
+# Largeur max de chaque variante (pas d'agrandissement au-delà de l'original)
+VARIANTS = {
+    "thumbnail": 320,
+    "medium": 800,
+    "large": 1600,
+}
+
+FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", {"quality": 85, "optimize": True, "progressive": True}),
+}
+
+EXTENSIONS = {"webp": "webp", "jpeg": "jpg"}
+
+
+def variant_name(original, variant, fmt):
+    """
+    resources/robe.3f2a9c01b7de.jpg -> resources/robe.3f2a9c01b7de_medium.webp
+    (à côté de l'original ; le storage y ajoute ensuite son propre hash)
+    """
+    root, _ = posixpath.splitext(original)
+    return f"{root}_{variant}.{EXTENSIONS[fmt]}"
+
+
+def render_variant(image, width, fmt):
+    resized = image.copy()
+    resized.thumbnail((width, width * 4), Image.Resampling.LANCZOS)
+
+    if fmt == "jpeg" and resized.mode not in ("RGB", "L"):
+        resized = resized.convert("RGB")
+
+    pil_format, options = FORMATS[fmt]
+    buffer = io.BytesIO()
+    resized.save(buffer, pil_format, **options)
+
+    return buffer.getvalue(), resized.width
+
+
+def generate_variants(photo_id, force=False):
+    """
+    Génère toutes les variantes d'une photo et les enregistre dans
+    `ResourcePhoto.variants` :
+    {"source": nom, "thumbnail": {"width": 320, "webp": nom, "jpeg": nom}, ...}
+    """
+    photo = ResourcePhoto.objects.filter(pk=photo_id).first()
+    if photo is None or not photo.image:
+        return None
+
+    source = photo.image.name
+    previous = photo.variants
+    if not force and previous.get("source") == source:
+        return previous
+
+    storage = photo.image.storage
+
+    with storage.open(source, "rb") as f:
+        image = ImageOps.exif_transpose(Image.open(f))
+        image.load()
+
+    variants = {"source": source}
+
+    for variant, width in VARIANTS.items():
+        entry = {}
+
+        for fmt in FORMATS:
+            content, actual_width = render_variant(image, width, fmt)
+
+            # Nom hashé par le storage : un contenu identique est réutilisé
+            name = variant_name(source, variant, fmt)
+            entry[fmt] = storage.save(name, ContentFile(content))
+            entry["width"] = actual_width
+
+        variants[variant] = entry
+
+    # update() : pas de post_save, donc pas de nouvelle génération
+    updated = ResourcePhoto.objects.filter(pk=photo_id, image=source).update(
+        variants=variants
+    )
+    bump_version(CATALOG)
+
+    # Image remplacée : les variantes de l'ancienne ne sont plus référencées
+    if updated and previous.get("source") not in (None, source):
+        delete_variants(previous, keep=variant_names(variants))
+
+    return variants
+
+
+def variant_names(variants):
+    return {
+        variants[variant][fmt]
+        for variant in VARIANTS
+        if variant in variants
+        for fmt in FORMATS
+        if fmt in variants[variant]
+    }
+
+
+def delete_variants(variants, keep=()):
+    # Noms hashés : une autre photo au contenu identique partage les fichiers
+    if ResourcePhoto.objects.filter(image=variants.get("source")).exists():
+        return
+
+    storage = ResourcePhoto._meta.get_field("image").storage
+
+    for name in variant_names(variants) - set(keep):
+        if storage.exists(name):
+            storage.delete(name)
+
+
+# =========================
+# POOL DE WORKERS
+# =========================
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.IMAGE_VARIANT_WORKERS,
+                    thread_name_prefix="image-variants",
+                )
+
+    return _executor
+
+
+def safe_generate_variants(photo_id, force=False):
+    try:
+        return generate_variants(photo_id, force=force)
+    except Exception:
+        logger.exception("Image variants failed for photo %s", photo_id)
+        return None
+
+
+def run_in_worker(photo_id, force=False):
+    # Chaque thread a sa propre connexion : on la ferme en sortant
+    try:
+        return safe_generate_variants(photo_id, force=force)
+    finally:
+        connection.close()
+
+
+def schedule_variants(photo_id):
+    """
+    Génération hors requête (l'upload admin n'attend pas). Avec
+    IMAGE_VARIANT_WORKERS = 0, génération immédiate (tests).
+    """
+    if settings.IMAGE_VARIANT_WORKERS <= 0:
+        return safe_generate_variants(photo_id)
+
+    return get_executor().submit(run_in_worker, photo_id)
@@ -0,0 +1,201 @@
+import json
+import re
+import threading
+import time
+
+import requests
+from django.conf import settings
+
+
+# =========================
+# JWKS KEY STORE (Clerk)
+# =========================
+
+MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+class JWKSKeyStore:
+    """
+    Cache en mémoire des clés publiques Clerk, partagé par tous les threads
+    du process.
+
+    - respecte le Cache-Control (max-age) renvoyé par Clerk, sinon `ttl`,
+      jamais moins de `min_ttl` (max-age=0 ne force pas un fetch par requête)
+    - rafraîchit en arrière-plan peu avant l'expiration
+    - refetch une seule fois sur un `kid` inconnu, avec un cooldown
+    - si Clerk ne répond pas, garde les anciennes clés et ne réessaie
+      qu'après `refetch_cooldown`
+    - `path` ou `fetcher` permettent de remplacer Clerk (tests, benchmarks)
+    """
+
+    def __init__(
+        self,
+        url=None,
+        path=None,
+        fetcher=None,
+        ttl=300,
+        min_ttl=30,
+        refresh_margin=30,
+        refetch_cooldown=30,
+        timeout=5,
+    ):
+        self.url = url
+        self.path = path
+        self.fetcher = fetcher
+        self.ttl = ttl
+        self.min_ttl = min_ttl
+        self.refresh_margin = refresh_margin
+        self.refetch_cooldown = refetch_cooldown
+        self.timeout = timeout
+
+        self._keys = {}
+        self._expires_at = 0.0
+        self._last_fetch = 0.0
+        # Durée de validité du dernier chargement (succès ou échec)
+        self._ttl = 0.0
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    # -------------------------
+    # Chargement
+    # -------------------------
+
+    def _load(self):
+        """
+        Retourne (jwks, ttl). Le ttl vient du header Cache-Control si présent.
+        """
+        if self.fetcher is not None:
+            return self.fetcher(), self.ttl
+
+        if self.path:
+            with open(self.path) as f:
+                return json.load(f), self.ttl
+
+        response = requests.get(self.url, timeout=self.timeout)
+        response.raise_for_status()
+
+        ttl = self.ttl
+        match = MAX_AGE_RE.search(response.headers.get("Cache-Control", ""))
+        if match:
+            ttl = int(match.group(1))
+
+        return response.json(), ttl
+
+    def refresh(self):
+        """
+        Recharge les clés. En cas d'échec on garde les anciennes clés et
+        le prochain essai est repoussé de `refetch_cooldown`.
+        """
+        self._last_fetch = time.monotonic()
+
+        try:
+            jwks, ttl = self._load()
+        except Exception:
+            self._ttl = self.refetch_cooldown
+            self._expires_at = self._last_fetch + self._ttl
+            return False
+
+        ttl = max(ttl, self.min_ttl)
+        self._ttl = ttl
+
+        keys = {jwk["kid"]: jwk for jwk in jwks.get("keys", []) if "kid" in jwk}
+
+        # Remplacement atomique du dict : les lecteurs n'ont pas besoin du lock
+        self._keys = keys
+        self._expires_at = time.monotonic() + ttl
+        return True
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                with self._lock:
+                    self.refresh()
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=run, name="jwks-refresh", daemon=True).start()
+
+    # -------------------------
+    # Lecture
+    # -------------------------
+
+    def get_key(self, kid):
+        now = time.monotonic()
+
+        # 1️⃣ Clés absentes ou expirées : rechargement synchrone
+        if now >= self._expires_at:
+            with self._lock:
+                if time.monotonic() >= self._expires_at:
+                    self.refresh()
+
+        # 2️⃣ Bientôt expirées : rechargement en arrière-plan, sauf si le
+        # TTL tient déjà dans la marge (max-age court, échec récent) : on
+        # attend alors l'expiration, au plus un fetch par cooldown
+        elif (
+            self._ttl > self.refresh_margin
+            and now >= self._expires_at - self.refresh_margin
+            and now - self._last_fetch >= self.refetch_cooldown
+        ):
+            self._refresh_in_background()
+
+        key = self._keys.get(kid)
+        if key is not None or not kid:
+            return key
+
+        # 3️⃣ Kid inconnu (rotation des clés) : un seul refetch, avec cooldown
+        with self._lock:
+            key = self._keys.get(kid)
+            if key is None and (
+                time.monotonic() - self._last_fetch >= self.refetch_cooldown
+            ):
+                self.refresh()
+                key = self._keys.get(kid)
+
+        return key
+
+    def clear(self):
+        with self._lock:
+            self._keys = {}
+            self._expires_at = 0.0
+            self._last_fetch = 0.0
+            self._ttl = 0.0
+
+
+# =========================
+# INSTANCE PAR PROCESS
+# =========================
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_key_store():
+    global _store
+
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = JWKSKeyStore(
+                    url=settings.CLERK_JWKS_URL,
+                    path=settings.CLERK_JWKS_FILE,
+                    ttl=settings.CLERK_JWKS_CACHE_TTL,
+                    min_ttl=settings.CLERK_JWKS_MIN_TTL,
+                    refetch_cooldown=settings.CLERK_JWKS_REFETCH_COOLDOWN,
+                )
+
+    return _store
+
+
+def set_key_store(store):
+    """
+    Remplace le store du process (tests, benchmarks). `None` le réinitialise.
+    """
+    global _store
+
+    with _store_lock:
+        _store = store
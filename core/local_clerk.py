@@ -0,0 +1,85 @@
+import json
+import time
+
+import rsa
+from jose import jwk, jwt
+
+from .jwks import JWKSKeyStore, set_key_store
+
+
+# =========================
+# CLERK LOCAL (tests, benchmarks)
+# =========================
+
+class LocalClerk:
+    """
+    Remplaçant hors-ligne de Clerk : une paire de clés RSA, le JWKS public
+    correspondant et un générateur de tokens RS256 signés.
+
+        clerk = LocalClerk()
+        clerk.install()              # ClerkAuthentication utilise ce JWKS
+        token = clerk.mint("user_1", email="a@example.com")
+    """
+
+    def __init__(self, kid="local-key", key_size=2048, private_pem=None):
+        self.kid = kid
+
+        if private_pem is None:
+            public_key, private_key = rsa.newkeys(key_size)
+        else:
+            private_key = rsa.PrivateKey.load_pkcs1(private_pem.encode())
+            public_key = rsa.PublicKey(private_key.n, private_key.e)
+
+        self.private_pem = private_key.save_pkcs1().decode()
+        self.public_jwk = dict(
+            jwk.construct(public_key.save_pkcs1().decode(), "RS256").to_dict(),
+            kid=kid,
+        )
+
+        self.fetches = 0
+
+    def jwks(self):
+        self.fetches += 1
+        return {"keys": [self.public_jwk]}
+
+    # -------------------------
+    # Persistance (serveur et injecteur dans deux process)
+    # -------------------------
+
+    def save(self, path):
+        """
+        Enregistre la clé privée : un autre process peut ensuite signer des
+        tokens acceptés par un serveur démarré avec CLERK_JWKS_FILE.
+        """
+        with open(path, "w") as f:
+            json.dump({"kid": self.kid, "private_pem": self.private_pem}, f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            data = json.load(f)
+        return cls(kid=data["kid"], private_pem=data["private_pem"])
+
+    def write_jwks(self, path):
+        """
+        Écrit le JWKS dans un fichier (à utiliser avec CLERK_JWKS_FILE).
+        """
+        with open(path, "w") as f:
+            json.dump({"keys": [self.public_jwk]}, f)
+
+    def key_store(self, **kwargs):
+        return JWKSKeyStore(fetcher=self.jwks, **kwargs)
+
+    def install(self, **kwargs):
+        store = self.key_store(**kwargs)
+        set_key_store(store)
+        return store
+
+    def mint(self, sub="user_1", ttl=3600, **claims):
+        claims.setdefault("exp", int(time.time()) + ttl)
+        return jwt.encode(
+            dict(claims, sub=sub),
+            self.private_pem,
+            algorithm="RS256",
+            headers={"kid": self.kid},
+        )
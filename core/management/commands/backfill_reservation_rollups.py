@@ -0,0 +1,51 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.counters import prune_orphan_rollups, rebuild_rollups
+from core.models import Reservation
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruit le rollup quotidien des réservations (ReservationDailyStat) "
+        "par tranches de jours, une transaction par tranche. Par défaut : de la "
+        "première réservation à aujourd'hui. Supprime aussi les lignes des "
+        "ressources supprimées."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", type=date.fromisoformat, help="AAAA-MM-JJ")
+        parser.add_argument("--end", type=date.fromisoformat, help="AAAA-MM-JJ")
+        parser.add_argument("--chunk-days", type=int, default=7)
+
+    def handle(self, *args, **options):
+        if options["chunk_days"] < 1:
+            raise CommandError("--chunk-days doit être >= 1.")
+
+        start = options["start"]
+        if start is None:
+            first = Reservation.objects.order_by("created_at").values_list(
+                "created_at", flat=True
+            ).first()
+            if first is None:
+                self.stdout.write("Aucune réservation.")
+                return
+            start = timezone.localdate(first)
+
+        end = options["end"] or timezone.localdate()
+        if start > end:
+            raise CommandError("--start doit précéder --end.")
+
+        total = 0
+        for first, last, rows in rebuild_rollups(start, end, options["chunk_days"]):
+            total += rows
+            self.stdout.write(f"{first} → {last} : {rows} lignes")
+
+        pruned = prune_orphan_rollups()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rollup reconstruit du {start} au {end} ({total} lignes, "
+            f"{pruned} lignes orphelines supprimées)."
+        ))
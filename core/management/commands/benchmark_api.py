@@ -0,0 +1,108 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from django.utils import timezone
+
+from core.benchmark import (
+    HTTPTransport,
+    InProcessTransport,
+    build_scenario,
+    git_commit,
+    measure,
+    restored_database,
+)
+from core.local_clerk import LocalClerk
+
+
+class Command(BaseCommand):
+    help = (
+        "Charge concurrente sur chaque route de core.urls ; rapport JSON "
+        "(req/s, p50/p95/p99, requêtes SQL par requête) comparable d'un "
+        "commit à l'autre. Données : seed_data. La base (SQLite) est "
+        "restaurée à la fin : les écritures mesurées sont annulées."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="Par route.")
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument(
+            "--route", action="append",
+            help="url_name à mesurer (répétable, toutes par défaut).",
+        )
+        parser.add_argument(
+            "--base-url",
+            help=(
+                "Serveur à mesurer (ex: http://127.0.0.1:8000), démarré avec "
+                "CLERK_JWKS_FILE et QUERY_BUDGET_ENABLED=true, sur la même "
+                "base que cette commande. Sans cette option : client WSGI en "
+                "process."
+            ),
+        )
+        parser.add_argument(
+            "--clerk-key", default="local-clerk.json",
+            help="Clé de `local_clerk` (obligatoire avec --base-url).",
+        )
+        parser.add_argument("--output", help="Fichier JSON (stdout par défaut).")
+
+    def handle(self, *args, **options):
+        if options["base_url"]:
+            try:
+                clerk = LocalClerk.load(options["clerk_key"])
+            except OSError:
+                raise CommandError(
+                    "Clé introuvable : lancer `manage.py local_clerk` puis "
+                    "démarrer le serveur avec CLERK_JWKS_FILE."
+                )
+            transport = HTTPTransport(options["base_url"])
+        else:
+            clerk = LocalClerk()
+            clerk.install()
+            transport = InProcessTransport()
+
+        with restored_database():
+            report = self.run(clerk, transport, options)
+
+        output = json.dumps(report, indent=2)
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output + "\n")
+        else:
+            self.stdout.write(output)
+
+    def run(self, clerk, transport, options):
+        scenario = build_scenario(clerk)
+        if scenario is None:
+            raise CommandError("Base vide : lancer `manage.py seed_data`.")
+
+        routes = options["route"] or list(scenario)
+        unknown = set(routes) - set(scenario)
+        if unknown:
+            raise CommandError(f"Routes inconnues : {', '.join(sorted(unknown))}")
+
+        report = {
+            "commit": git_commit(),
+            "started_at": timezone.now().isoformat(),
+            "target": options["base_url"] or "in-process",
+            "requests": options["requests"],
+            "concurrency": options["concurrency"],
+            "routes": {},
+        }
+
+        # En process : X-Query-Count activé, hôte "testserver" accepté
+        with override_settings(
+            QUERY_BUDGET_ENABLED=True,
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+        ):
+            for name in routes:
+                self.stderr.write(f"{name}...")
+                report["routes"][name] = measure(
+                    transport,
+                    scenario[name],
+                    options["requests"],
+                    options["concurrency"],
+                )
+
+        return report
@@ -0,0 +1,133 @@
+import asyncio
+import json
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, override_settings
+
+from core.benchmark import percentile
+from core.local_clerk import LocalClerk
+from core.models import Reservation, Resource
+from core.seeding import seed_catalog, seed_reservations
+
+
+# Endpoint -> (vue DRF synchrone, vue async)
+ENDPOINTS = {
+    "categories": ("/api/categories/", "/api/async/categories/"),
+    "resources": ("/api/resources/", "/api/async/resources/"),
+    "resource-detail": ("/api/resources/{pk}/", "/api/async/resources/{pk}/"),
+    "my-reservations": ("/api/my-reservations/", "/api/async/my-reservations/"),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare les vues DRF synchrones et les vues async sous charge "
+        "concurrente (application ASGI en process) : req/s, p50 et p99."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--concurrency", type=int, default=50)
+        parser.add_argument(
+            "--endpoint",
+            action="append",
+            choices=sorted(ENDPOINTS),
+            help="Endpoint à mesurer (répétable, tous par défaut).",
+        )
+        parser.add_argument(
+            "--seed",
+            action="store_true",
+            help="Crée un jeu de données (conservé) avant la mesure.",
+        )
+        parser.add_argument("--json", action="store_true", dest="as_json")
+
+    def handle(self, *args, **options):
+        if options["seed"]:
+            self.stdout.write("Création du jeu de données...")
+            resources = seed_catalog(categories=20, resources=500)
+            seed_reservations(resources, users=50, reservations=5000)
+
+        resource = Resource.objects.filter(is_active=True).order_by("id").first()
+        reservation = Reservation.objects.order_by("-created_at").first()
+        if resource is None or reservation is None:
+            raise CommandError("Base vide : relancer avec --seed.")
+
+        # JWKS local : token valide sans appel réseau à Clerk. Requêtes
+        # authentifiées, donc jamais servies par le cache de réponses.
+        clerk = LocalClerk()
+        clerk.install()
+        token = clerk.mint(reservation.user_clerk_id)
+
+        endpoints = [
+            name for name in ENDPOINTS if name in (options["endpoint"] or ENDPOINTS)
+        ]
+
+        # Client en process : l'hôte "testserver" doit être accepté
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+            results = asyncio.run(self.run(
+                endpoints,
+                resource.pk,
+                token,
+                options["requests"],
+                options["concurrency"],
+            ))
+
+        if options["as_json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        self.stdout.write(
+            f"{'endpoint':<18}{'mode':<7}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}"
+        )
+        for row in results:
+            self.stdout.write(
+                f"{row['endpoint']:<18}{row['mode']:<7}{row['rps']:>10.1f}"
+                f"{row['p50_ms']:>10.2f}{row['p99_ms']:>10.2f}"
+            )
+
+    async def run(self, endpoints, pk, token, total, concurrency):
+        client = AsyncClient()
+        headers = {"Authorization": f"Bearer {token}"}
+
+        results = []
+        for name in endpoints:
+            for mode, url in zip(("sync", "async"), ENDPOINTS[name]):
+                url = url.format(pk=pk)
+
+                # Échauffement : JWKS, profil, arbre des catégories
+                response = await client.get(url, headers=headers)
+                if response.status_code != 200:
+                    raise CommandError(f"{url} : HTTP {response.status_code}")
+
+                results.append(dict(
+                    endpoint=name,
+                    mode=mode,
+                    **await self.measure(client, url, headers, total, concurrency),
+                ))
+
+        return results
+
+    async def measure(self, client, url, headers, total, concurrency):
+        latencies = []
+        remaining = iter(range(total))
+
+        async def worker():
+            for _ in remaining:
+                started = time.perf_counter()
+                await client.get(url, headers=headers)
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+        return {
+            "requests": total,
+            "concurrency": concurrency,
+            "rps": total / elapsed,
+            "p50_ms": statistics.median(latencies) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+        }
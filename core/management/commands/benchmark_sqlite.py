@@ -0,0 +1,241 @@
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.benchmark import percentile
+
+
+# Lectures des listes (catalogue, /api/my-reservations/)
+READ_QUERIES = (
+    (
+        "SELECT id, name FROM core_resource WHERE is_active = 1 "
+        "ORDER BY created_at DESC, id DESC LIMIT 21",
+        False,
+    ),
+    (
+        "SELECT id, status FROM core_reservation WHERE user_clerk_id = ? "
+        "ORDER BY created_at DESC, id DESC LIMIT 21",
+        True,
+    ),
+)
+
+# Chaque réglage seul, puis les trois ensemble
+CONFIGS = {
+    "stock": set(),
+    # journal WAL + SQLITE_PRAGMAS à chaque connexion
+    "wal": {"wal"},
+    # BEGIN IMMEDIATE (SQLITE_TRANSACTION_MODE)
+    "immediate": {"immediate"},
+    # une connexion par thread (CONN_MAX_AGE > 0)
+    "persistent": {"persistent"},
+    "tuned": {"wal", "immediate", "persistent"},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Lectures et écritures concurrentes sur une copie de la base : "
+        "SQLite par défaut (rollback journal, BEGIN DEFERRED, une connexion "
+        "par requête), puis chaque réglage seul (WAL + SQLITE_PRAGMAS, "
+        "BEGIN IMMEDIATE, connexions persistantes) et les trois ensemble."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--readers", type=int, default=8)
+        parser.add_argument("--writers", type=int, default=4)
+        parser.add_argument("--duration", type=float, default=5.0, help="Secondes.")
+        parser.add_argument(
+            "--database",
+            default=str(settings.DATABASES["default"]["NAME"]),
+            help="Base source (copiée, jamais modifiée). Données : seed_data.",
+        )
+        parser.add_argument(
+            "--config", action="append", choices=list(CONFIGS),
+            help="Configuration à mesurer (répétable, toutes par défaut).",
+        )
+        parser.add_argument("--json", action="store_true", dest="as_json")
+
+    def handle(self, *args, **options):
+        if not os.path.exists(options["database"]):
+            raise CommandError("Base introuvable : lancer migrate puis seed_data.")
+
+        source = sqlite3.connect(options["database"])
+        try:
+            row = source.execute(
+                "SELECT MIN(id), MAX(id) FROM core_reservation"
+            ).fetchone()
+            users = [
+                user for (user,) in source.execute(
+                    "SELECT DISTINCT user_clerk_id FROM core_reservation LIMIT 100"
+                )
+            ]
+            resource_id = source.execute(
+                "SELECT id FROM core_resource ORDER BY id LIMIT 1"
+            ).fetchone()
+        finally:
+            source.close()
+
+        if row[0] is None or resource_id is None:
+            raise CommandError("Base vide : lancer seed_data.")
+
+        self.reservation_ids = row
+        self.users = users
+        self.resource_id = resource_id[0]
+
+        results = []
+        for config in options["config"] or list(CONFIGS):
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, "bench.sqlite3")
+                self.copy_database(options["database"], path, config)
+                results.append(self.run(config, path, options))
+
+        if options["as_json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        self.stdout.write(
+            f"{'config':<12}{'reads/s':>10}{'writes/s':>10}{'read p99':>10}"
+            f"{'write p99':>11}{'locked':>8}"
+        )
+        for row in results:
+            self.stdout.write(
+                f"{row['config']:<12}{row['reads_per_s']:>10.1f}"
+                f"{row['writes_per_s']:>10.1f}{row['read_p99_ms']:>10.2f}"
+                f"{row['write_p99_ms']:>11.2f}{row['locked_errors']:>8}"
+            )
+
+    # -------------------------
+    # Configurations
+    # -------------------------
+
+    def copy_database(self, source_path, path, config):
+        source = sqlite3.connect(source_path)
+        target = sqlite3.connect(path)
+        try:
+            source.backup(target)
+            mode = "WAL" if "wal" in CONFIGS[config] else "DELETE"
+            target.execute(f"PRAGMA journal_mode={mode}")
+        finally:
+            target.close()
+            source.close()
+
+    def connect(self, config, path):
+        # Timeout par défaut de Python (5 s), comme Django sans OPTIONS
+        conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+
+        if "wal" in CONFIGS[config]:
+            for name, value in settings.SQLITE_PRAGMAS.items():
+                conn.execute(f"PRAGMA {name}={value}")
+
+        return conn
+
+    # -------------------------
+    # Charge
+    # -------------------------
+
+    def read(self, conn, rng):
+        sql, needs_user = rng.choice(READ_QUERIES)
+        params = (rng.choice(self.users),) if needs_user else ()
+        conn.execute(sql, params).fetchall()
+
+    def write(self, conn, rng, begin):
+        """
+        Comme update_status() puis une création : lecture puis écriture
+        dans la même transaction.
+        """
+        pk = rng.randint(*self.reservation_ids)
+        status = rng.choice(("pending", "confirmed", "cancelled"))
+
+        conn.execute(begin)
+        try:
+            conn.execute("SELECT COUNT(*) FROM core_reservation WHERE id = ?", (pk,))
+            conn.execute(
+                "UPDATE core_reservation SET status = ? WHERE id = ? AND status != ?",
+                (status, pk, status),
+            )
+            conn.execute(
+                "INSERT INTO core_reservation "
+                "(resource_id, user_clerk_id, status, created_at) "
+                "VALUES (?, ?, 'pending', ?)",
+                (self.resource_id, rng.choice(self.users), timezone.now().isoformat()),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+
+    def run(self, config, path, options):
+        lock = threading.Lock()
+        stats = {"read": [], "write": [], "locked": 0}
+        deadline = time.perf_counter() + options["duration"]
+        enabled = CONFIGS[config]
+        begin = "BEGIN IMMEDIATE" if "immediate" in enabled else "BEGIN"
+        persistent = "persistent" in enabled
+
+        def worker(kind, seed):
+            rng = random.Random(seed)
+            conn = self.connect(config, path) if persistent else None
+
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    # Sinon une connexion par requête (CONN_MAX_AGE = 0)
+                    current = conn or self.connect(config, path)
+                    try:
+                        if kind == "read":
+                            self.read(current, rng)
+                        else:
+                            self.write(current, rng, begin)
+                    finally:
+                        if conn is None:
+                            current.close()
+                except sqlite3.OperationalError as exc:
+                    if "locked" not in str(exc):
+                        raise
+                    with lock:
+                        stats["locked"] += 1
+                    continue
+
+                with lock:
+                    stats[kind].append(time.perf_counter() - started)
+
+            if conn is not None:
+                conn.close()
+
+        threads = [
+            threading.Thread(target=worker, args=("read", i))
+            for i in range(options["readers"])
+        ] + [
+            threading.Thread(target=worker, args=("write", 1000 + i))
+            for i in range(options["writers"])
+        ]
+
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        def p99(values):
+            return percentile(values, 99) * 1000 if values else 0.0
+
+        return {
+            "config": config,
+            "readers": options["readers"],
+            "writers": options["writers"],
+            "reads_per_s": len(stats["read"]) / elapsed,
+            "writes_per_s": len(stats["write"]) / elapsed,
+            "read_p99_ms": p99(stats["read"]),
+            "write_p99_ms": p99(stats["write"]),
+            "locked_errors": stats["locked"],
+        }
@@ -0,0 +1,125 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import Category, Reservation
+from core.seeding import seed_catalog, seed_reservations
+from core.views import ResourceQuerysetMixin
+
+
+KEYSET_ORDER = ("-created_at", "-id")
+
+# Lues en entier volontairement (un SCAN y est attendu)
+FULL_READS = {"categories (arbre)"}
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Crée un gros jeu de données puis affiche EXPLAIN QUERY PLAN et les "
+        "temps de la requête principale de chaque endpoint."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--categories", type=int, default=50)
+        parser.add_argument("--resources", type=int, default=5000)
+        parser.add_argument("--users", type=int, default=500)
+        parser.add_argument("--reservations", type=int, default=50000)
+        parser.add_argument("--page-size", type=int, default=20)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument(
+            "--keep",
+            action="store_true",
+            help="Conserve les données créées (rollback par défaut).",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options)
+                if not options["keep"]:
+                    raise Rollback
+        except Rollback:
+            self.stdout.write("Données de test annulées (rollback).")
+
+    def run(self, options):
+        self.stdout.write("Création du jeu de données...")
+        resources = seed_catalog(
+            categories=options["categories"],
+            resources=options["resources"],
+        )
+        user_ids = seed_reservations(
+            resources,
+            users=options["users"],
+            reservations=options["reservations"],
+        )
+
+        size = options["page_size"] + 1
+        category = Category.objects.filter(
+            is_active=True, resources__isnull=False
+        ).first()
+        middle = Reservation.objects.order_by(*KEYSET_ORDER)[
+            options["reservations"] // 2
+        ]
+        resource_qs = ResourceQuerysetMixin().get_resource_queryset()
+
+        queries = {
+            "categories (arbre)": Category.objects.order_by("id").values(
+                "id", "name", "slug", "parent_id", "is_active"
+            ),
+            "resources": resource_qs.order_by(*KEYSET_ORDER)[:size],
+            "resources?category=": resource_qs.filter(
+                category__slug=category.slug,
+                category__is_active=True,
+            ).order_by(*KEYSET_ORDER)[:size],
+            "resources/<pk>": resource_qs.filter(pk=resources[0].pk),
+            "my-reservations": Reservation.objects.filter(
+                user_clerk_id=user_ids[0]
+            ).order_by(*KEYSET_ORDER)[:size],
+            "admin-reservations": Reservation.objects.order_by(
+                *KEYSET_ORDER
+            )[:size],
+            "admin-reservations (page profonde)": Reservation.objects.filter(
+                created_at__lte=middle.created_at
+            ).order_by(*KEYSET_ORDER)[:size],
+            "admin ?status=pending": Reservation.objects.filter(
+                status="pending"
+            ).order_by(*KEYSET_ORDER)[:size],
+        }
+
+        for label, queryset in queries.items():
+            self.report(label, queryset, options["repeat"])
+
+    def report(self, label, queryset, repeat):
+        plan = queryset.explain()
+
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            list(queryset.prefetch_related(None))
+            timings.append((time.perf_counter() - start) * 1000)
+
+        timings.sort()
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\n{label}"))
+        self.stdout.write(plan)
+
+        # Un SCAN sans index ou un tri temporaire signale un index manquant
+        warnings = [
+            line for line in plan.splitlines()
+            if "USE TEMP B-TREE" in line
+            or ("SCAN" in line and "INDEX" not in line)
+        ]
+        if label in FULL_READS:
+            warnings = []
+        for line in warnings:
+            self.stdout.write(self.style.WARNING(f"  ⚠️ {line.strip()}"))
+
+        self.stdout.write(
+            f"  min {timings[0]:.2f} ms | "
+            f"médiane {timings[len(timings) // 2]:.2f} ms | "
+            f"max {timings[-1]:.2f} ms"
+        )
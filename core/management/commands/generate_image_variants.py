@@ -0,0 +1,37 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from core.images import run_in_worker
+from core.models import ResourcePhoto
+
+
+class Command(BaseCommand):
+    help = "Génère (en parallèle) les variantes responsives des photos existantes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Régénère aussi les photos qui ont déjà leurs variantes.",
+        )
+
+    def handle(self, *args, **options):
+        photo_ids = list(ResourcePhoto.objects.values_list("id", flat=True))
+
+        generated = 0
+        with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+            results = executor.map(
+                lambda pk: run_in_worker(pk, force=options["force"]),
+                photo_ids,
+            )
+            for pk, variants in zip(photo_ids, results):
+                if variants is None:
+                    self.stdout.write(self.style.WARNING(f"Photo {pk} : échec"))
+                else:
+                    generated += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{generated}/{len(photo_ids)} photos traitées."
+        ))
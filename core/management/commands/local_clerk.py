@@ -0,0 +1,43 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand
+
+from core.local_clerk import LocalClerk
+
+
+class Command(BaseCommand):
+    help = (
+        "Remplaçant local de Clerk : écrit un JWKS (à servir via "
+        "CLERK_JWKS_FILE) et signe des tokens pour les users donnés."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--key", default="local-clerk.json",
+            help="Clé privée (créée si absente).",
+        )
+        parser.add_argument("--jwks", default="local-jwks.json")
+        parser.add_argument(
+            "--sub", action="append", default=[],
+            help="clerk_user_id à signer (répétable).",
+        )
+        parser.add_argument("--ttl", type=int, default=3600)
+
+    def handle(self, *args, **options):
+        if os.path.exists(options["key"]):
+            clerk = LocalClerk.load(options["key"])
+        else:
+            clerk = LocalClerk()
+            clerk.save(options["key"])
+
+        clerk.write_jwks(options["jwks"])
+
+        tokens = {
+            sub: clerk.mint(sub, ttl=options["ttl"]) for sub in options["sub"]
+        }
+
+        self.stdout.write(json.dumps(
+            {"jwks": os.path.abspath(options["jwks"]), "tokens": tokens},
+            indent=2,
+        ))
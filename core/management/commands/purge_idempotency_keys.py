@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from core.idempotency import purge_expired
+
+
+class Command(BaseCommand):
+    help = (
+        "Supprime les Idempotency-Key plus anciennes que "
+        "IDEMPOTENCY_KEY_TTL (à lancer périodiquement, ex: cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        deleted = purge_expired(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"{deleted} clés supprimées."))
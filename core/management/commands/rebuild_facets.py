@@ -0,0 +1,19 @@
+from functools import partial
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.facets import rebuild
+from core.versions import CATALOG, bump_version
+
+
+class Command(BaseCommand):
+    help = "Reconstruit les facettes des ressources et leurs compteurs."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            total = rebuild()
+            # Les réponses du catalogue en cache contiennent les compteurs
+            transaction.on_commit(partial(bump_version, CATALOG))
+
+        self.stdout.write(self.style.SUCCESS(f"{total} facettes créées."))
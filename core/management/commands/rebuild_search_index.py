@@ -0,0 +1,28 @@
+from functools import partial
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.search import BATCH_SIZE, is_supported, rebuild_index
+from core.versions import CATALOG, bump_version
+
+
+class Command(BaseCommand):
+    help = "Reconstruit l'index de recherche plein texte (FTS5) des ressources."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        if not is_supported():
+            self.stdout.write(self.style.WARNING(
+                "Index FTS5 disponible uniquement avec SQLite."
+            ))
+            return
+
+        with transaction.atomic():
+            total = rebuild_index(batch_size=options["batch_size"])
+            # Les réponses de recherche en cache sont périmées
+            transaction.on_commit(partial(bump_version, CATALOG))
+
+        self.stdout.write(self.style.SUCCESS(f"{total} ressources indexées."))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from core.counters import BATCH_SIZE, reconcile
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompte les réservations et corrige les compteurs de Resource et "
+        "de ReservationStats qui ont dérivé (ex: écriture SQL directe)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            "--dry-run", action="store_true",
+            help="Affiche les écarts sans rien écrire.",
+        )
+
+    def handle(self, *args, **options):
+        resources, stats = reconcile(
+            batch_size=options["batch_size"], dry_run=options["dry_run"]
+        )
+
+        if options["dry_run"]:
+            message = f"{resources} ressources à corriger, totaux globaux : " + (
+                "à corriger." if stats else "à jour."
+            )
+        else:
+            message = f"{resources} ressources corrigées, totaux globaux : " + (
+                "corrigés." if stats else "à jour."
+            )
+
+        self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,74 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.seeding import is_seeded, reset_data, seed_catalog, seed_reservations
+
+
+class Command(BaseCommand):
+    help = (
+        "Crée en bulk un jeu de données de volume configurable : catégories "
+        "imbriquées, ressources, photos, options, valeurs, profils et "
+        "réservations (benchmarks)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--categories", type=int, default=50)
+        parser.add_argument(
+            "--depth", type=int, default=3,
+            help="Niveaux de catégories (racines comprises).",
+        )
+        parser.add_argument("--resources", type=int, default=5000)
+        parser.add_argument("--photos", type=int, default=3, help="Par ressource.")
+        parser.add_argument("--options", type=int, default=2, help="Par ressource.")
+        parser.add_argument("--values", type=int, default=4, help="Par option.")
+        parser.add_argument("--users", type=int, default=500)
+        parser.add_argument("--reservations", type=int, default=50000)
+        parser.add_argument(
+            "--options-per-reservation", type=int, default=1,
+            help="Valeurs d'options choisies par réservation.",
+        )
+        parser.add_argument("--days", type=int, default=365)
+        parser.add_argument(
+            "--seed", type=int, default=0,
+            help="Graine aléatoire (même graine = mêmes données).",
+        )
+        parser.add_argument(
+            "--reset", action="store_true",
+            help=(
+                "Vide d'abord catalogue, réservations et profils (sinon le "
+                "seed s'ajoute aux données existantes)."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options["reset"]:
+                reset_data()
+            elif is_seeded(options["seed"]):
+                raise CommandError(
+                    f"Données déjà semées avec --seed {options['seed']} : "
+                    "relancer avec --reset ou une autre graine."
+                )
+
+            resources = seed_catalog(
+                categories=options["categories"],
+                resources=options["resources"],
+                options=options["options"],
+                values=options["values"],
+                seed=options["seed"],
+                depth=options["depth"],
+                photos=options["photos"],
+            )
+            user_ids = seed_reservations(
+                resources,
+                users=options["users"],
+                reservations=options["reservations"],
+                days=options["days"],
+                seed=options["seed"],
+                options_per_reservation=options["options_per_reservation"],
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{options['categories']} catégories, {len(resources)} ressources, "
+            f"{len(user_ids)} profils et {options['reservations']} réservations créés."
+        ))
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.db_router import replica_available, sync_replica
+
+
+class Command(BaseCommand):
+    help = (
+        "Copie la base primaire dans DATABASE_REPLICA_NAME (réplique SQLite "
+        "locale). Avec --interval : copie périodique, la réplique est en "
+        "retard comme une vraie réplication."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval", type=float, default=0,
+            help="Secondes entre deux copies (0 : une seule copie).",
+        )
+
+    def handle(self, *args, **options):
+        if not replica_available():
+            raise CommandError(
+                "Pas de réplique distincte : définir DATABASE_REPLICA_NAME."
+            )
+
+        while True:
+            started = time.perf_counter()
+            sync_replica()
+            self.stdout.write(self.style.SUCCESS(
+                f"Réplique à jour ({(time.perf_counter() - started) * 1000:.1f} ms)."
+            ))
+
+            if not options["interval"]:
+                return
+
+            time.sleep(options["interval"])
@@ -0,0 +1,135 @@
+import mimetypes
+import os
+import re
+import stat
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import require_safe
+
+from .storage import HASH_LENGTH
+
+
+# =========================
+# SERVICE DES MEDIA (cache navigateur / proxy)
+# =========================
+
+HASHED_NAME_RE = re.compile(rf"\.[0-9a-f]{{{HASH_LENGTH}}}\.[^./]+$")
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+IMMUTABLE_MAX_AGE = 31536000
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def cache_headers(response, path, etag, last_modified):
+    response.headers["ETag"] = etag
+    response.headers["Last-Modified"] = http_date(last_modified)
+    response.headers["Accept-Ranges"] = "bytes"
+
+    if HASHED_NAME_RE.search(path):
+        # Nom hashé (core.storage) : le contenu ne changera jamais
+        patch_cache_control(
+            response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True
+        )
+    else:
+        # Anciens fichiers sans hash : revalidation (304) à chaque fois
+        patch_cache_control(response, public=True, no_cache=True)
+
+    return response
+
+
+def parse_range(header, size):
+    """
+    "bytes=0-499" -> (0, 499). Une seule plage est gérée ; None si l'en-tête
+    est absent ou invalide (on renvoie alors le fichier complet).
+    """
+    match = RANGE_RE.match(header or "")
+    if not match or match.groups() == ("", ""):
+        return None
+
+    start, end = match.groups()
+
+    if start == "":
+        # bytes=-500 : les 500 derniers octets
+        length = int(end)
+        return max(size - length, 0), size - 1
+
+    start = int(start)
+    if end and start > int(end):
+        return None
+
+    # start >= size : plage non satisfiable (416), gérée par l'appelant
+    end = int(end) if end else size - 1
+    return start, min(end, size - 1)
+
+
+def iter_file_range(fullpath, start, length):
+    with open(fullpath, "rb") as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(STREAM_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+@require_safe
+def serve_media(request, path):
+    try:
+        fullpath = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404("Media not found.")
+
+    try:
+        file_stat = os.stat(fullpath)
+    except OSError:
+        raise Http404("Media not found.")
+
+    if not stat.S_ISREG(file_stat.st_mode):
+        raise Http404("Media not found.")
+
+    size = file_stat.st_size
+    last_modified = int(file_stat.st_mtime)
+    etag = quote_etag(f"{file_stat.st_mtime_ns:x}-{size:x}")
+
+    not_modified = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if not_modified is not None:
+        return cache_headers(not_modified, path, etag, last_modified)
+
+    content_type, encoding = mimetypes.guess_type(fullpath)
+    content_type = content_type or "application/octet-stream"
+
+    byte_range = None
+    if_range = request.headers.get("If-Range")
+    if if_range is None or if_range == etag:
+        byte_range = parse_range(request.headers.get("Range"), size)
+
+    if byte_range is not None and byte_range[0] >= size:
+        response = HttpResponse(status=416)
+        response.headers["Content-Range"] = f"bytes */{size}"
+        return cache_headers(response, path, etag, last_modified)
+
+    if byte_range is None:
+        response = FileResponse(open(fullpath, "rb"), content_type=content_type)
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(
+            iter_file_range(fullpath, start, length),
+            status=206,
+            content_type=content_type,
+        )
+        response.headers["Content-Length"] = str(length)
+        response.headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+
+    return cache_headers(response, path, etag, last_modified)
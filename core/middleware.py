@@ -0,0 +1,141 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from .db_router import apin_to_primary, pin_to_primary, user_scope
+
+
+logger = logging.getLogger("core.queries")
+
+
+# =========================
+# BUDGET DE REQUÊTES SQL PAR VUE
+# =========================
+
+class QueryCounter:
+    """
+    execute_wrapper : compte les requêtes SQL et leur durée totale, même
+    avec DEBUG = False (pas besoin de connection.queries).
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+
+class QueryBudgetMiddleware:
+    """
+    Activé par QUERY_BUDGET_ENABLED. Ajoute X-Query-Count et Server-Timing
+    (requêtes de toutes les bases : primaire et réplique) à la réponse et logue (logger "core.queries") toute requête qui
+    dépasse le budget de sa vue : QUERY_BUDGETS[url_name], sinon
+    QUERY_BUDGET_DEFAULT.
+    """
+
+    def __init__(self, get_response):
+        if not settings.QUERY_BUDGET_ENABLED:
+            raise MiddlewareNotUsed
+
+        self.get_response = get_response
+
+    def get_budget(self, request):
+        match = request.resolver_match
+        url_name = match.view_name if match else None
+
+        return url_name, settings.QUERY_BUDGETS.get(
+            url_name, settings.QUERY_BUDGET_DEFAULT
+        )
+
+    def __call__(self, request):
+        counter = QueryCounter()
+
+        with ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(counter))
+            response = self.get_response(request)
+
+        duration_ms = counter.duration * 1000
+        response.headers["X-Query-Count"] = str(counter.count)
+        response.headers["Server-Timing"] = (
+            f'db;dur={duration_ms:.2f};desc="{counter.count} queries"'
+        )
+
+        url_name, budget = self.get_budget(request)
+        if counter.count > budget:
+            logger.warning(
+                "Query budget exceeded: %s %s (%s) ran %d queries in %.2f ms, budget %d",
+                request.method,
+                request.path,
+                url_name,
+                counter.count,
+                duration_ms,
+                budget,
+            )
+
+        return response
+
+
+# =========================
+# LECTURES SUR LA PRIMAIRE APRÈS UNE ÉCRITURE
+# =========================
+
+class PrimaryPinMiddleware:
+    """
+    Après un POST/PUT/PATCH/DELETE réussi d'un utilisateur authentifié,
+    ses lectures restent sur "default" pendant REPLICA_PIN_SECONDS
+    (lire ses propres écritures malgré le retard de la réplique).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def get_scope(self, request, response):
+        if request.method in ("GET", "HEAD", "OPTIONS"):
+            return None
+        if response.status_code >= 400:
+            return None
+
+        # request.user : affecté par DRF (ClerkAuthentication) ou AsyncAPIView
+        user = getattr(request, "user", None)
+        if not getattr(user, "is_authenticated", False):
+            return None
+
+        return user_scope(user)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        response = self.get_response(request)
+
+        scope = self.get_scope(request, response)
+        if scope is not None:
+            pin_to_primary(scope)
+
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+
+        scope = self.get_scope(request, response)
+        if scope is not None:
+            await apin_to_primary(scope)
+
+        return response
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_alter_reservation_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='reservation',
+            name='user_clerk_id',
+            field=models.CharField(max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['parent'], name='category_active_parent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['user_clerk_id', '-created_at', '-id'], name='reservation_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='reservation_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['-created_at', '-id'], name='reservation_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='resource',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-created_at', '-id'], name='resource_active_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='resource',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['category', '-created_at', '-id'], name='resource_active_cat_idx'),
+        ),
+    ]
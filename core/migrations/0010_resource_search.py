@@ -0,0 +1,68 @@
+from django.db import migrations
+
+
+SEARCH_TABLE = "core_resource_search"
+
+
+def create_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+        "name, description, categories, options, "
+        "tokenize = 'unicode61 remove_diacritics 2')"
+    )
+
+    # Indexation initiale des ressources existantes
+    Resource = apps.get_model("core", "Resource")
+    Category = apps.get_model("core", "Category")
+
+    categories = {
+        row["id"]: row for row in Category.objects.values("id", "name", "parent_id")
+    }
+
+    def category_path(category_id):
+        names = []
+        current = categories.get(category_id)
+        while current is not None and len(names) < len(categories):
+            names.append(current["name"])
+            current = categories.get(current["parent_id"])
+        return " ".join(reversed(names))
+
+    for resource in Resource.objects.prefetch_related("options__values"):
+        options = []
+        for option in resource.options.all():
+            options.append(option.name)
+            options.extend(value.value for value in option.values.all())
+
+        schema_editor.execute(
+            f"INSERT INTO {SEARCH_TABLE} "
+            "(rowid, name, description, categories, options) "
+            "VALUES (%s, %s, %s, %s, %s)",
+            [
+                resource.id,
+                resource.name,
+                resource.description,
+                category_path(resource.category_id),
+                " ".join(options),
+            ],
+        )
+
+
+def drop_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+
+    schema_editor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_table, drop_search_table),
+    ]
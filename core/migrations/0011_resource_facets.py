@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_resource_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FacetCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('option', models.CharField(max_length=100)),
+                ('value', models.CharField(max_length=100)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.category')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['category', 'option', 'value'], name='facet_count_category_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ResourceFacet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('option', models.CharField(max_length=100)),
+                ('value', models.CharField(max_length=100)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.category')),
+                ('resource', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='facets', to='core.resource')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['resource'], name='resource_facet_resource_idx')],
+                'constraints': [models.UniqueConstraint(fields=('option', 'value', 'resource'), name='resource_facet_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_resource_facets'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resourcephoto',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
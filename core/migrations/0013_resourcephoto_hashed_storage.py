@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:39
+
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_resourcephoto_variants'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='resourcephoto',
+            name='image',
+            field=models.ImageField(storage=core.storage.HashedMediaStorage(), upload_to='resources/'),
+        ),
+    ]
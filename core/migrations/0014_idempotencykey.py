@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:46
+
+import rest_framework.utils.encoders
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_resourcephoto_hashed_storage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_clerk_id', models.CharField(max_length=255)),
+                ('key', models.CharField(max_length=255)),
+                ('request_hash', models.CharField(max_length=64)),
+                ('status_code', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('response', models.JSONField(blank=True, encoder=rest_framework.utils.encoders.JSONEncoder, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['created_at'], name='idempotency_created_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user_clerk_id', 'key'), name='idempotency_key_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:07
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_existing_reservations(apps, schema_editor):
+    # Compteurs initiaux (ensuite : core.counters)
+    Resource = apps.get_model("core", "Resource")
+    Reservation = apps.get_model("core", "Reservation")
+    ReservationStats = apps.get_model("core", "ReservationStats")
+
+    per_resource = {}
+    totals = {"total": 0, "pending": 0, "confirmed": 0, "cancelled": 0}
+
+    rows = Reservation.objects.order_by().values(
+        "resource_id", "status"
+    ).annotate(count=Count("id"))
+
+    for row in rows:
+        counts = per_resource.setdefault(row["resource_id"], {})
+        counts["reservations_total"] = counts.get("reservations_total", 0) + row["count"]
+        counts[f"reservations_{row['status']}"] = row["count"]
+        totals["total"] += row["count"]
+        totals[row["status"]] = totals.get(row["status"], 0) + row["count"]
+
+    for resource_id, counts in per_resource.items():
+        Resource.objects.filter(pk=resource_id).update(**counts)
+
+    ReservationStats.objects.create(pk=1, **totals)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReservationStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total', models.IntegerField(default=0)),
+                ('pending', models.IntegerField(default=0)),
+                ('confirmed', models.IntegerField(default=0)),
+                ('cancelled', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'reservation stats',
+            },
+        ),
+        migrations.AddField(
+            model_name='resource',
+            name='reservations_cancelled',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='resource',
+            name='reservations_confirmed',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='resource',
+            name='reservations_pending',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='resource',
+            name='reservations_total',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_existing_reservations, migrations.RunPython.noop),
+    ]
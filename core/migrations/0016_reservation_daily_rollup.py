@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+
+def rollup_existing_reservations(apps, schema_editor):
+    # Rollups initiaux (ensuite : core.counters, backfill_reservation_rollups)
+    Reservation = apps.get_model("core", "Reservation")
+    ReservationDailyStat = apps.get_model("core", "ReservationDailyStat")
+
+    rows = Reservation.objects.order_by().annotate(
+        day=TruncDate("created_at")
+    ).values_list("day", "resource_id", "status").annotate(count=Count("id"))
+
+    ReservationDailyStat.objects.bulk_create(
+        (
+            ReservationDailyStat(day=day, resource_id=resource_id, status=status, count=count)
+            for day, resource_id, status, count in rows
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_reservation_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReservationDailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('confirmed', 'Confirmed'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('count', models.IntegerField(default=0)),
+                ('resource', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.resource')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day', 'resource', 'status'), name='reservation_daily_unique')],
+            },
+        ),
+        migrations.RunPython(rollup_existing_reservations, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:27
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def recount_facets(apps, schema_editor):
+    # Des syncs concurrentes ont pu laisser des doublons : on recompte tout
+    FacetCount = apps.get_model("core", "FacetCount")
+    ResourceFacet = apps.get_model("core", "ResourceFacet")
+
+    FacetCount.objects.all().delete()
+
+    per_category = ResourceFacet.objects.values(
+        "category_id", "option", "value"
+    ).annotate(count=Count("id"))
+    overall = ResourceFacet.objects.values("option", "value").annotate(count=Count("id"))
+
+    FacetCount.objects.bulk_create(
+        [FacetCount(**row) for row in per_category]
+        + [FacetCount(category_id=None, **row) for row in overall],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_reservation_daily_rollup'),
+    ]
+
+    operations = [
+        migrations.RunPython(recount_facets, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='facetcount',
+            name='facet_count_category_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='facetcount',
+            constraint=models.UniqueConstraint(fields=('category', 'option', 'value'), name='facet_count_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='facetcount',
+            constraint=models.UniqueConstraint(condition=models.Q(('category__isnull', True)), fields=('option', 'value'), name='facet_count_overall_unique'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+def prune_orphan_rollups(apps, schema_editor):
+    # Lignes laissées par les ressources supprimées avant forget_resources
+    Resource = apps.get_model("core", "Resource")
+    ReservationDailyStat = apps.get_model("core", "ReservationDailyStat")
+
+    ReservationDailyStat.objects.exclude(
+        resource_id__in=Resource.objects.values("pk")
+    ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_facet_count_unique'),
+    ]
+
+    operations = [
+        migrations.RunPython(prune_orphan_rollups, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,7 @@
-from django.db import models
+from django.db import models, transaction
+from rest_framework.utils.encoders import JSONEncoder
+
+from .storage import HashedMediaStorage
 
 
 # =========================
@@ -50,6 +53,17 @@ class Category(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Catégories actives par parent (index partiel : SQLite n'utilise
+            # pas un index composite pour un filtre booléen nu)
+            models.Index(
+                fields=["parent"],
+                condition=models.Q(is_active=True),
+                name="category_active_parent_idx",
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -70,8 +84,50 @@ class Resource(models.Model):
 
     is_active = models.BooleanField(default=True)
 
+    # 🔥 Compteurs dénormalisés (core.counters) : pas de COUNT(*) sur
+    # Reservation. Réparés par `manage.py reconcile_reservation_counters`
+    reservations_total = models.IntegerField(default=0, editable=False)
+    reservations_pending = models.IntegerField(default=0, editable=False)
+    reservations_confirmed = models.IntegerField(default=0, editable=False)
+    reservations_cancelled = models.IntegerField(default=0, editable=False)
+
+    COUNTER_FIELDS = (
+        "reservations_total",
+        "reservations_pending",
+        "reservations_confirmed",
+        "reservations_cancelled",
+    )
+
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Catalogue paginé (created_at, id), avec ou sans ?category=
+            models.Index(
+                fields=["-created_at", "-id"],
+                condition=models.Q(is_active=True),
+                name="resource_active_created_idx",
+            ),
+            models.Index(
+                fields=["category", "-created_at", "-id"],
+                condition=models.Q(is_active=True),
+                name="resource_active_cat_idx",
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Compteurs écrits uniquement par core.counters (F()) : le save()
+        # d'une instance chargée plus tôt ne les écrase pas
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            skipped = self.get_deferred_fields() | set(self.COUNTER_FIELDS)
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in skipped
+            ]
+
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.name
 
@@ -83,9 +139,13 @@ class ResourcePhoto(models.Model):
         related_name="photos"
     )
 
-    image = models.ImageField(upload_to="resources/")
+    # Noms de fichiers hashés : servis avec Cache-Control immutable
+    image = models.ImageField(upload_to="resources/", storage=HashedMediaStorage())
     position = models.PositiveIntegerField(default=0)
 
+    # Variantes responsives générées par core.images (thumbnail, medium, large)
+    variants = models.JSONField(default=dict, blank=True, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -131,6 +191,27 @@ class ResourceOptionValue(models.Model):
 # RESERVATION SYSTEM
 # =========================
 
+class ReservationQuerySet(models.QuerySet):
+
+    def delete(self):
+        """
+        Suppression en lot : les compteurs sont décrémentés une seule fois
+        (un GROUP BY, puis core.counters.apply) et non ligne par ligne dans
+        post_delete.
+        """
+        from . import counters
+
+        with transaction.atomic(using=self.db):
+            deltas = counters.deletion_deltas(counters.status_groups(self))
+            deleted = super().delete()
+            counters.apply(deltas)
+
+        return deleted
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+
 class Reservation(models.Model):
 
     STATUS_CHOICES = (
@@ -146,7 +227,8 @@ class Reservation(models.Model):
     )
 
     # 🔥 On garde la cohérence avec UserProfile
-    user_clerk_id = models.CharField(max_length=255, db_index=True)
+    # (indexé via reservation_user_created_idx)
+    user_clerk_id = models.CharField(max_length=255)
 
     selected_options = models.ManyToManyField(
         ResourceOptionValue,
@@ -162,8 +244,192 @@ class Reservation(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = ReservationQuerySet.as_manager()
+
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # /api/my-reservations/ : filtre user, tri (created_at, id)
+            models.Index(
+                fields=["user_clerk_id", "-created_at", "-id"],
+                name="reservation_user_created_idx",
+            ),
+            # /api/admin-reservations/ et list_filter de l'admin
+            models.Index(
+                fields=["status", "-created_at", "-id"],
+                name="reservation_status_created_idx",
+            ),
+            models.Index(
+                fields=["-created_at", "-id"],
+                name="reservation_created_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Reservation #{self.id} - {self.resource.name}"
+
+
+class ReservationStats(models.Model):
+    """
+    Ligne unique (pk=1) : totaux de toutes les réservations, maintenus avec
+    les compteurs de Resource (core.counters).
+    """
+
+    total = models.IntegerField(default=0)
+    pending = models.IntegerField(default=0)
+    confirmed = models.IntegerField(default=0)
+    cancelled = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = "reservation stats"
+
+    def __str__(self):
+        return f"{self.total} reservations"
+
+
+class ReservationDailyStat(models.Model):
+    """
+    Rollup quotidien : réservations créées le jour `day` (TIME_ZONE), par
+    ressource et par statut actuel. Maintenu avec les compteurs
+    (core.counters), reconstruit par `backfill_reservation_rollups`.
+    """
+
+    day = models.DateField()
+
+    # Sans contrainte : le DELETE d'une ressource n'attend pas ses lignes,
+    # supprimées ensuite par core.counters.forget_resources (post_delete)
+    resource = models.ForeignKey(
+        Resource,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name="+"
+    )
+
+    status = models.CharField(max_length=20, choices=Reservation.STATUS_CHOICES)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # Index (day, ...) : un graphique sur N jours = une lecture par plage
+            models.UniqueConstraint(
+                fields=["day", "resource", "status"],
+                name="reservation_daily_unique",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.day} - {self.resource_id} - {self.status}: {self.count}"
+
+
+# =========================
+# IDEMPOTENCY KEYS (création de réservation)
+# =========================
+
+class IdempotencyKey(models.Model):
+    """
+    Header Idempotency-Key d'un POST /api/reservations/, par user Clerk.
+    `status_code` vide = requête encore en cours. La contrainte unique
+    départage les doublons concurrents.
+    """
+
+    user_clerk_id = models.CharField(max_length=255)
+    key = models.CharField(max_length=255)
+
+    # sha256 du corps : une même clé avec un autre corps est refusée
+    request_hash = models.CharField(max_length=64)
+
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response = models.JSONField(null=True, blank=True, encoder=JSONEncoder)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user_clerk_id", "key"],
+                name="idempotency_key_unique",
+            ),
+        ]
+        indexes = [
+            # Purge des clés expirées
+            models.Index(fields=["created_at"], name="idempotency_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_clerk_id} - {self.key}"
+
+
+# =========================
+# FACETTES (options) — tables dérivées
+# =========================
+
+class ResourceFacet(models.Model):
+    """
+    Une ligne par (ressource active, option, valeur). Maintenue par
+    core.facets à partir des options : le filtre ?option_value= devient une
+    simple lecture d'index, sans jointure sur les tables d'options.
+    """
+
+    resource = models.ForeignKey(
+        Resource,
+        on_delete=models.CASCADE,
+        related_name="facets"
+    )
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        related_name="+"
+    )
+
+    option = models.CharField(max_length=100)
+    value = models.CharField(max_length=100)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["option", "value", "resource"],
+                name="resource_facet_unique",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["resource"], name="resource_facet_resource_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.option}: {self.value} ({self.resource_id})"
+
+
+class FacetCount(models.Model):
+    """
+    Nombre de ressources actives par (catégorie, option, valeur), précalculé.
+    `category` vide = tout le catalogue.
+    """
+
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="+"
+    )
+
+    option = models.CharField(max_length=100)
+    value = models.CharField(max_length=100)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["category", "option", "value"],
+                name="facet_count_unique",
+            ),
+            # NULL != NULL : ligne "tout le catalogue" contrainte à part
+            models.UniqueConstraint(
+                fields=["option", "value"],
+                condition=models.Q(category__isnull=True),
+                name="facet_count_overall_unique",
+            ),
+        ]
 
     def __str__(self):
-        return f"Reservation #{self.id} - {self.resource.name}"
\ No newline at end of file
+        return f"{self.option}: {self.value} = {self.count}"
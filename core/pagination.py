@@ -0,0 +1,130 @@
+import base64
+import json
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+# =========================
+# KEYSET (CURSOR) PAGINATION
+# =========================
+
+class KeysetPagination(BasePagination):
+    """
+    Pagination par curseur sur (created_at, id), du plus récent au plus
+    ancien. Chaque page est une simple lecture d'index : pas d'OFFSET ni de
+    COUNT(*), la page 1000 coûte autant que la page 1.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    invalid_cursor_message = "Invalid cursor."
+
+    def __init__(self):
+        self.default_page_size = settings.API_PAGE_SIZE
+        self.max_page_size = settings.API_MAX_PAGE_SIZE
+
+    @staticmethod
+    def get_params(request):
+        # Request DRF (query_params) ou HttpRequest Django (vues async)
+        return getattr(request, "query_params", request.GET)
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(self.get_params(request)[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.default_page_size
+
+        if page_size <= 0:
+            return self.default_page_size
+
+        return min(page_size, self.max_page_size)
+
+    # -------------------------
+    # Curseur
+    # -------------------------
+
+    def encode_cursor(self, obj):
+        raw = json.dumps([obj.created_at.isoformat(), obj.pk])
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, request):
+        encoded = self.get_params(request).get(self.cursor_query_param)
+
+        if not encoded:
+            return None
+
+        try:
+            padded = encoded + "=" * (-len(encoded) % 4)
+            created_at, pk = json.loads(base64.urlsafe_b64decode(padded))
+            return datetime.fromisoformat(created_at), int(pk)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    # -------------------------
+    # Pagination
+    # -------------------------
+
+    def get_page_queryset(self, queryset, request):
+        """
+        Requête de la page demandée, avec une ligne de plus pour savoir s'il
+        existe une page suivante.
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by("-created_at", "-id")
+
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            created_at, pk = cursor
+            queryset = queryset.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+            )
+
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, results):
+        self.has_next = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        return self.page
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.set_page(list(self.get_page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request):
+        page_queryset = self.get_page_queryset(queryset, request)
+        return self.set_page([obj async for obj in page_queryset])
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(self.page[-1])
+        )
+
+    def get_paginated_data(self, data):
+        return {
+            "next": self.get_next_link(),
+            "results": data,
+        }
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
@@ -0,0 +1,142 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import UserProfile
+
+
+# =========================
+# PROFIL CLERK (1 fois par requête)
+# =========================
+
+def profile_cache_key(clerk_user_id):
+    return f"core:profile:{clerk_user_id}"
+
+
+def claims_fingerprint(email, first_name, last_name):
+    raw = "\x1f".join(value or "" for value in (email, first_name, last_name))
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def changed_claims(profile, email, first_name, last_name):
+    """
+    Champs du profil à mettre à jour (claims non vides et différents).
+    """
+    claims = {
+        "email": email,
+        "first_name": first_name,
+        "last_name": last_name,
+    }
+
+    changed = [
+        field for field, value in claims.items()
+        if value and getattr(profile, field) != value
+    ]
+
+    for field in changed:
+        setattr(profile, field, claims[field])
+
+    return changed
+
+
+def profile_defaults(clerk_user_id, email, first_name, last_name):
+    return {
+        "email": email or f"{clerk_user_id}@placeholder.local",
+        "first_name": first_name,
+        "last_name": last_name,
+    }
+
+
+def resolve_profile(clerk_user_id, email=None, first_name=None, last_name=None):
+    """
+    Retourne le UserProfile du user Clerk.
+
+    Tant que les claims (email, prénom, nom) ne changent pas, le profil est
+    servi depuis le cache sans aucune requête SQL. Sinon seuls les champs
+    modifiés sont écrits (`update_fields`).
+
+    Le profil en cache porte is_admin : en production le cache "default"
+    doit être partagé entre les workers (cf. core.checks, check --deploy),
+    sinon un changement de droits n'est vu que du process qui l'a écrit.
+    """
+    key = profile_cache_key(clerk_user_id)
+    fingerprint = claims_fingerprint(email, first_name, last_name)
+
+    cached = cache.get(key)
+    if cached is not None and cached[0] == fingerprint:
+        return cached[1]
+
+    profile, created = UserProfile.objects.get_or_create(
+        clerk_user_id=clerk_user_id,
+        defaults=profile_defaults(clerk_user_id, email, first_name, last_name),
+    )
+
+    if not created:
+        # 🔥 Mise à jour uniquement des champs qui changent
+        changed = changed_claims(profile, email, first_name, last_name)
+        if changed:
+            profile.save(update_fields=changed)
+
+    cache.set(key, (fingerprint, profile), settings.CLERK_PROFILE_CACHE_TIMEOUT)
+
+    return profile
+
+
+async def aresolve_profile(clerk_user_id, email=None, first_name=None, last_name=None):
+    """
+    resolve_profile() pour les vues async (cache et ORM async).
+    """
+    key = profile_cache_key(clerk_user_id)
+    fingerprint = claims_fingerprint(email, first_name, last_name)
+
+    cached = await cache.aget(key)
+    if cached is not None and cached[0] == fingerprint:
+        return cached[1]
+
+    profile, created = await UserProfile.objects.aget_or_create(
+        clerk_user_id=clerk_user_id,
+        defaults=profile_defaults(clerk_user_id, email, first_name, last_name),
+    )
+
+    if not created:
+        changed = changed_claims(profile, email, first_name, last_name)
+        if changed:
+            await profile.asave(update_fields=changed)
+
+    await cache.aset(key, (fingerprint, profile), settings.CLERK_PROFILE_CACHE_TIMEOUT)
+
+    return profile
+
+
+def invalidate_profile(clerk_user_id):
+    cache.delete(profile_cache_key(clerk_user_id))
+
+
+def profiles_by_clerk_id(clerk_user_ids, using=None):
+    """
+    Charge en une seule requête les profils d'une page de réservations.
+    """
+    ids = set(clerk_user_ids)
+
+    if not ids:
+        return {}
+
+    return {
+        profile.clerk_user_id: profile
+        for profile in UserProfile.objects.using(using).filter(
+            clerk_user_id__in=ids
+        )
+    }
+
+
+async def aprofiles_by_clerk_id(clerk_user_ids):
+    ids = set(clerk_user_ids)
+
+    if not ids:
+        return {}
+
+    return {
+        profile.clerk_user_id: profile
+        async for profile in UserProfile.objects.filter(clerk_user_id__in=ids)
+    }
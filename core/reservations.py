@@ -0,0 +1,111 @@
+from asgiref.sync import sync_to_async
+from django.db import transaction
+
+from . import counters
+from .models import Reservation, ResourceOptionValue
+
+
+# =========================
+# RÉSERVATIONS : FILTRES ET STATUTS
+# =========================
+
+STATUSES = [choice[0] for choice in Reservation.STATUS_CHOICES]
+
+
+def filter_reservations(queryset, filters):
+    """
+    Applique les filtres validés par ReservationFilterSerializer.
+    """
+    if filters.get("status"):
+        queryset = queryset.filter(status=filters["status"])
+
+    if filters.get("resource"):
+        queryset = queryset.filter(resource_id=filters["resource"])
+
+    if filters.get("created_from"):
+        queryset = queryset.filter(created_at__gte=filters["created_from"])
+
+    if filters.get("created_to"):
+        queryset = queryset.filter(created_at__lt=filters["created_to"])
+
+    return queryset
+
+
+def update_status(queryset, new_status):
+    """
+    Passe les réservations ciblées au statut `new_status` dans une seule
+    transaction, avec un seul UPDATE (les lignes déjà au bon statut ne sont
+    pas réécrites). Retourne (nombre ciblé, nombre modifié).
+    """
+    queryset = queryset.order_by()
+
+    with transaction.atomic():
+        # Un GROUP BY au lieu du COUNT : nombre ciblé et variations des
+        # compteurs. BEGIN IMMEDIATE (SQLite) : rien ne change entre les deux
+        groups = counters.status_groups(queryset)
+        matched = sum(group[-1] for group in groups)
+
+        updated = queryset.exclude(status=new_status).update(status=new_status)
+        counters.apply(counters.status_change_deltas(groups, new_status))
+
+    return matched, updated
+
+
+# =========================
+# CRÉATION (options validées en lot)
+# =========================
+
+def option_values_for(resource, ids):
+    """
+    Valeurs d'options `ids` appartenant à `resource`, en une seule requête
+    et dans l'ordre demandé. Lève ValueError si un id est inconnu ou
+    appartient à une autre ressource, ou si une option reçoit deux valeurs.
+    """
+    values = ResourceOptionValue.objects.filter(
+        pk__in=ids, option__resource=resource
+    ).only("id", "option_id").in_bulk()
+
+    invalid = [pk for pk in ids if pk not in values]
+    if invalid:
+        raise ValueError(
+            f"Invalid option values for this resource: {sorted(set(invalid))}."
+        )
+
+    options = [values[pk].option_id for pk in ids]
+    if len(options) != len(set(options)):
+        raise ValueError("Only one value per option is allowed.")
+
+    return [values[pk] for pk in ids]
+
+
+def selected_option_rows(reservation, values):
+    through = Reservation.selected_options.through
+    return [
+        through(reservation_id=reservation.pk, resourceoptionvalue_id=value.pk)
+        for value in values
+    ]
+
+
+def create_reservation(selected_options=(), **fields):
+    """
+    Un INSERT pour la réservation, un seul INSERT pour ses options (au
+    lieu de selected_options.set() : pas de lecture des liens existants).
+    `m2m_changed` n'est donc pas émis. Compteurs dans la même transaction.
+    """
+    through = Reservation.selected_options.through
+
+    with transaction.atomic():
+        reservation = Reservation.objects.create(**fields)
+        through.objects.bulk_create(
+            selected_option_rows(reservation, selected_options)
+        )
+        counters.move(after=counters.reservation_key(
+            reservation.created_at, reservation.resource_id, reservation.status
+        ))
+
+    return reservation
+
+
+async def acreate_reservation(selected_options=(), **fields):
+    # Pas de transaction.atomic en async : INSERT et compteurs dans un thread
+    return await sync_to_async(create_reservation)(selected_options, **fields)
@@ -0,0 +1,206 @@
+import re
+
+from django.db import connection, connections, router, transaction
+
+from .models import Category, Resource
+
+
+# =========================
+# RECHERCHE PLEIN TEXTE (SQLite FTS5)
+# =========================
+
+SEARCH_TABLE = "core_resource_search"
+
+# Poids bm25 : name, description, categories, options
+BM25_WEIGHTS = (10.0, 2.0, 4.0, 1.0)
+
+BATCH_SIZE = 500
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def is_supported():
+    return connection.vendor == "sqlite"
+
+
+def build_match_query(query):
+    """
+    "robe lon" -> '"robe"* "lon"*' : chaque mot est une recherche par
+    préfixe, tous les mots doivent être présents.
+    """
+    tokens = TOKEN_RE.findall(query or "")
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+# -------------------------
+# Contenu indexé
+# -------------------------
+
+def category_paths():
+    """
+    {category_id: "Parent Enfant"} en une seule requête.
+    """
+    rows = {
+        row["id"]: row
+        for row in Category.objects.values("id", "name", "parent_id")
+    }
+
+    paths = {}
+    for category_id in rows:
+        names = []
+        current = rows.get(category_id)
+        while current is not None and len(names) < len(rows):
+            names.append(current["name"])
+            current = rows.get(current["parent_id"])
+        paths[category_id] = " ".join(reversed(names))
+
+    return paths
+
+
+def resource_documents(queryset, paths):
+    for resource in queryset.prefetch_related("options__values"):
+        options = []
+        for option in resource.options.all():
+            options.append(option.name)
+            options.extend(value.value for value in option.values.all())
+
+        yield (
+            resource.id,
+            resource.name,
+            resource.description,
+            paths.get(resource.category_id, ""),
+            " ".join(options),
+        )
+
+
+def write_documents(cursor, documents):
+    cursor.executemany(
+        f"INSERT INTO {SEARCH_TABLE} "
+        "(rowid, name, description, categories, options) "
+        "VALUES (%s, %s, %s, %s, %s)",
+        documents,
+    )
+
+
+# -------------------------
+# Mise à jour de l'index
+# -------------------------
+
+def index_resources(resource_ids):
+    """
+    (Ré)indexe les ressources données ; celles qui n'existent plus sont
+    retirées de l'index. DELETE + INSERT dans une transaction : une
+    recherche concurrente ne voit jamais la ressource absente de l'index.
+    """
+    if not is_supported():
+        return
+
+    resource_ids = list(set(resource_ids))
+    if not resource_ids:
+        return
+
+    paths = category_paths()
+    queryset = Resource.objects.filter(pk__in=resource_ids)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany(
+            f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s",
+            [(pk,) for pk in resource_ids],
+        )
+        write_documents(cursor, list(resource_documents(queryset, paths)))
+
+
+def index_category(category_id):
+    """
+    Renommer une catégorie change le texte indexé de ses ressources et de
+    celles de toutes ses sous-catégories.
+    """
+    parents = dict(Category.objects.values_list("id", "parent_id"))
+
+    descendants = {category_id}
+    changed = True
+    while changed:
+        changed = False
+        for pk, parent_id in parents.items():
+            if parent_id in descendants and pk not in descendants:
+                descendants.add(pk)
+                changed = True
+
+    index_resources(
+        Resource.objects.filter(
+            category_id__in=descendants
+        ).values_list("id", flat=True)
+    )
+
+
+def rebuild_index(batch_size=BATCH_SIZE):
+    """
+    Reconstruit tout l'index par lots. Retourne le nombre de ressources
+    indexées.
+    """
+    if not is_supported():
+        return 0
+
+    paths = category_paths()
+    total = 0
+    last_id = 0
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+
+        while True:
+            batch = Resource.objects.filter(pk__gt=last_id).order_by("pk")
+            documents = list(resource_documents(batch[:batch_size], paths))
+            if not documents:
+                break
+
+            write_documents(cursor, documents)
+
+            total += len(documents)
+            last_id = documents[-1][0]
+
+    return total
+
+
+# -------------------------
+# Recherche
+# -------------------------
+
+def search_resource_ids(query, limit=None, active_only=True):
+    """
+    Ids des ressources correspondant à `query`, du plus pertinent (bm25) au
+    moins pertinent.
+    """
+    match = build_match_query(query)
+    if not match:
+        return []
+
+    if not is_supported():
+        # Autres bases : simple recherche sur le nom
+        queryset = Resource.objects.filter(name__icontains=query).order_by("name")
+        if active_only:
+            queryset = queryset.filter(is_active=True)
+        ids = queryset.values_list("id", flat=True)
+        return list(ids[:limit] if limit else ids)
+
+    weights = ", ".join(str(weight) for weight in BM25_WEIGHTS)
+    sql = (
+        f"SELECT s.rowid FROM {SEARCH_TABLE} s "
+        f"JOIN {Resource._meta.db_table} r ON r.id = s.rowid "
+        f"WHERE {SEARCH_TABLE} MATCH %s"
+    )
+    params = [match]
+
+    if active_only:
+        sql += " AND r.is_active"
+
+    sql += f" ORDER BY bm25({SEARCH_TABLE}, {weights})"
+
+    if limit:
+        sql += " LIMIT %s"
+        params.append(limit)
+
+    # Même base que les lectures de la vue (primaire ou réplique)
+    with connections[router.db_for_read(Resource)].cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
@@ -0,0 +1,279 @@
+import random
+from collections import Counter
+from datetime import timedelta
+from functools import partial
+
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import counters, facets, search
+from .models import (
+    Category,
+    FacetCount,
+    IdempotencyKey,
+    Reservation,
+    ReservationDailyStat,
+    Resource,
+    ResourceFacet,
+    ResourceOption,
+    ResourceOptionValue,
+    ResourcePhoto,
+    UserProfile,
+)
+from .versions import CATALOG, CATEGORY_TREE, bump_version
+
+
+# =========================
+# JEU DE DONNÉES VOLUMINEUX (benchmarks)
+# =========================
+
+BATCH_SIZE = 1000
+STATUSES = [choice[0] for choice in Reservation.STATUS_CHOICES]
+
+# Tables remplies par le seed (et leurs dérivés), vidées par reset_data()
+SEEDED_MODELS = (
+    Category,
+    Resource,
+    ResourcePhoto,
+    ResourceOption,
+    ResourceOptionValue,
+    Reservation,
+    Reservation.selected_options.through,
+    ReservationDailyStat,
+    ResourceFacet,
+    FacetCount,
+    IdempotencyKey,
+    UserProfile,
+)
+
+
+def category_prefix(seed):
+    # Même graine = mêmes slugs (pas d'horodatage)
+    return f"seed-{seed}"
+
+
+def user_prefix(seed):
+    return f"seed_{seed}"
+
+
+def is_seeded(seed):
+    return Category.objects.filter(slug__startswith=f"{category_prefix(seed)}-").exists()
+
+
+def reset_data():
+    """
+    Vide le catalogue, les réservations et les profils sans signaux (un
+    DELETE par table, comme `flush`) et remet les compteurs à zéro.
+    """
+    tables = [model._meta.db_table for model in SEEDED_MODELS]
+    connection.ops.execute_sql_flush(
+        connection.ops.sql_flush(no_style(), tables)
+    )
+
+    counters.reconcile()
+    search.rebuild_index()
+    transaction.on_commit(partial(bump_version, CATEGORY_TREE))
+    transaction.on_commit(partial(bump_version, CATALOG))
+
+
+def seed_categories(rng, prefix, categories, depth):
+    """
+    Racines (1/4) puis `depth - 1` niveaux de sous-catégories, chacune
+    rattachée à une catégorie du niveau précédent.
+    """
+    root_count = categories if depth <= 1 else max(1, categories // 4)
+    roots = Category.objects.bulk_create(
+        Category(name=f"Catégorie {i}", slug=f"{prefix}-{i}")
+        for i in range(root_count)
+    )
+
+    levels = [roots]
+    remaining = categories - len(roots)
+    index = 0
+
+    for level in range(1, depth):
+        size = remaining // (depth - level)
+        remaining -= size
+
+        parents = levels[-1]
+        children = Category.objects.bulk_create(
+            Category(
+                name=f"Sous-catégorie {i}",
+                slug=f"{prefix}-sub-{i}",
+                parent=rng.choice(parents),
+                is_active=rng.random() > 0.1,
+            )
+            for i in range(index, index + size)
+        )
+        index += size
+
+        if not children:
+            break
+        levels.append(children)
+
+    return [category for level in levels for category in level]
+
+
+def seed_catalog(
+    categories=20, resources=1000, options=2, values=4, seed=0, depth=2, photos=0
+):
+    """
+    Crée des catégories (racines + `depth - 1` niveaux de sous-catégories),
+    des ressources, leurs photos et leurs options en bulk_create. Retourne
+    la liste des ressources.
+    """
+    rng = random.Random(seed)
+    prefix = category_prefix(seed)
+
+    all_categories = seed_categories(rng, prefix, categories, depth)
+
+    resource_objs = Resource.objects.bulk_create(
+        (
+            Resource(
+                category=rng.choice(all_categories),
+                name=f"Ressource {i}",
+                description=f"Description de la ressource {i}",
+                is_active=rng.random() > 0.05,
+            )
+            for i in range(resources)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+    # Noms seulement (pas de fichiers) : suffisant pour la sérialisation
+    ResourcePhoto.objects.bulk_create(
+        (
+            ResourcePhoto(
+                resource=resource,
+                image=f"resources/{prefix}-{resource.pk}-{i}.jpg",
+                position=i,
+            )
+            for resource in resource_objs
+            for i in range(photos)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+    option_objs = ResourceOption.objects.bulk_create(
+        (
+            ResourceOption(resource=resource, name=f"Option {i}")
+            for resource in resource_objs
+            for i in range(options)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+    ResourceOptionValue.objects.bulk_create(
+        (
+            ResourceOptionValue(option=option, value=f"Valeur {i}")
+            for option in option_objs
+            for i in range(values)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+    # bulk_create n'envoie pas de signaux : dérivés et invalidation manuels
+    search.rebuild_index()
+    facets.rebuild()
+    transaction.on_commit(partial(bump_version, CATEGORY_TREE))
+    transaction.on_commit(partial(bump_version, CATALOG))
+
+    return resource_objs
+
+
+def option_values_by_resource(resources):
+    """
+    {resource_id: [[value_id, ...] par option]} en une seule requête.
+    """
+    rows = ResourceOptionValue.objects.filter(
+        option__resource__in=resources
+    ).order_by("option_id", "id").values_list("option__resource_id", "option_id", "id")
+
+    options = {}
+    for resource_id, option_id, value_id in rows:
+        options.setdefault(resource_id, {}).setdefault(option_id, []).append(value_id)
+
+    return {pk: list(by_option.values()) for pk, by_option in options.items()}
+
+
+def seed_reservations(
+    resources,
+    users=200,
+    reservations=10000,
+    days=365,
+    seed=0,
+    options_per_reservation=0,
+):
+    """
+    Crée des profils et des réservations réparties sur `days` jours, avec
+    une valeur choisie pour `options_per_reservation` options au plus.
+    Retourne la liste des clerk_user_id créés.
+    """
+    rng = random.Random(seed)
+    prefix = user_prefix(seed)
+
+    user_ids = [f"{prefix}_{i}" for i in range(users)]
+    UserProfile.objects.bulk_create(
+        (
+            UserProfile(
+                clerk_user_id=user_id,
+                email=f"{user_id}@example.com",
+                first_name="Prénom",
+                last_name=f"Nom {i}",
+            )
+            for i, user_id in enumerate(user_ids)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+    now = timezone.now()
+    reservation_objs = Reservation.objects.bulk_create(
+        (
+            Reservation(
+                resource=rng.choice(resources),
+                user_clerk_id=rng.choice(user_ids),
+                status=rng.choice(STATUSES),
+            )
+            for _ in range(reservations)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+    # created_at est auto_now_add : on l'étale ensuite sur la période
+    for reservation in reservation_objs:
+        reservation.created_at = now - timedelta(seconds=rng.randint(0, days * 86400))
+    Reservation.objects.bulk_update(
+        reservation_objs, ["created_at"], batch_size=BATCH_SIZE
+    )
+
+    # bulk_create : compteurs et rollup mis à jour en une fois
+    counters.apply(Counter(
+        counters.reservation_key(
+            reservation.created_at, reservation.resource_id, reservation.status
+        )
+        for reservation in reservation_objs
+    ))
+
+    if options_per_reservation:
+        values = option_values_by_resource(resources)
+        through = Reservation.selected_options.through
+
+        through.objects.bulk_create(
+            (
+                through(reservation_id=reservation.pk, resourceoptionvalue_id=value_id)
+                for reservation in reservation_objs
+                for value_id in pick_values(
+                    rng, values.get(reservation.resource_id, []), options_per_reservation
+                )
+            ),
+            batch_size=BATCH_SIZE,
+        )
+
+    return user_ids
+
+
+def pick_values(rng, options, count):
+    # Une valeur par option, comme l'exige ReservationSerializer
+    chosen = rng.sample(options, min(count, len(options)))
+    return [rng.choice(option_values) for option_values in chosen]
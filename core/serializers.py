@@ -1,5 +1,12 @@
+from datetime import timedelta
+
+from django.db.models import prefetch_related_objects
+from django.utils import timezone
 from rest_framework import serializers
 
+from .category_tree import get_category_tree
+from .images import FORMATS, VARIANTS
+from .reservations import STATUSES, create_reservation, option_values_for
 from .models import (
     Category,
     Resource,
@@ -15,6 +22,19 @@ from .models import (
 # CATEGORY
 # =======================
 
+def category_tree(context):
+    """
+    Arbre passé par la vue dans le contexte (vues async : déjà chargé,
+    aucun accès cache ni ORM pendant la sérialisation), sinon celui du
+    process, gardé dans le contexte : une seule lecture de version (cache
+    partagé) par requête, quel que soit le nombre de lignes.
+    """
+    tree = context.get("category_tree")
+    if tree is None:
+        tree = context["category_tree"] = get_category_tree()
+    return tree
+
+
 class CategorySerializer(serializers.ModelSerializer):
     children = serializers.SerializerMethodField()
 
@@ -29,30 +49,85 @@ class CategorySerializer(serializers.ModelSerializer):
         )
 
     def get_children(self, obj):
+        # 🔥 Servi depuis l'arbre en mémoire (plus de requête par noeud)
+        node = category_tree(self.context).get(obj.id)
+        if node is not None:
+            return node["children"]
+
         children = obj.children.filter(is_active=True)
-        return CategorySerializer(children, many=True).data
+        return CategorySerializer(children, many=True, context=self.context).data
 
 
 # =======================
 # PHOTOS
 # =======================
 
+def build_srcset(variants):
+    """
+    {"webp": "url 320w, url 800w, ...", "jpeg": "..."} pour <picture>,
+    dérivé des variantes déjà sérialisées.
+    Une seule entrée par largeur (original plus petit que les variantes).
+    """
+    if not variants:
+        return {}
+
+    by_width = {}
+    for entry in variants.values():
+        by_width.setdefault(entry["width"], entry)
+
+    return {
+        fmt: ", ".join(
+            f"{entry[fmt]} {width}w" for width, entry in sorted(by_width.items())
+        )
+        for fmt in FORMATS
+    }
+
+
 class ResourcePhotoSerializer(serializers.ModelSerializer):
     image_url = serializers.SerializerMethodField()
+    variants = serializers.SerializerMethodField()
 
     class Meta:
         model = ResourcePhoto
         fields = (
             "id",
             "image_url",
+            "variants",
             "position",
         )
 
-    def get_image_url(self, obj):
+    def to_representation(self, obj):
+        # srcset réutilise les URLs des variantes : construites une seule fois
+        data = super().to_representation(obj)
+        data["srcset"] = build_srcset(data["variants"])
+        return data
+
+    def build_url(self, obj, name):
+        url = obj.image.storage.url(name)
         request = self.context.get("request")
         if request:
-            return request.build_absolute_uri(obj.image.url)
-        return obj.image.url
+            return request.build_absolute_uri(url)
+        return url
+
+    def get_image_url(self, obj):
+        return self.build_url(obj, obj.image.name)
+
+    def get_variants(self, obj):
+        """
+        {"thumbnail": {"width": 320, "webp": url, "jpeg": url}, ...}
+        Vide tant que les variantes ne sont pas générées.
+        """
+        return {
+            variant: {
+                "width": obj.variants[variant]["width"],
+                **{
+                    fmt: self.build_url(obj, obj.variants[variant][fmt])
+                    for fmt in FORMATS
+                },
+            }
+            for variant in VARIANTS
+            if variant in obj.variants
+        }
 
 
 # =======================
@@ -86,7 +161,7 @@ class ResourceOptionSerializer(serializers.ModelSerializer):
 
 class ResourceSerializer(serializers.ModelSerializer):
     photos = ResourcePhotoSerializer(many=True, read_only=True)
-    category = CategorySerializer(read_only=True)
+    category = serializers.SerializerMethodField()
     options = ResourceOptionSerializer(many=True, read_only=True)
 
     class Meta:
@@ -100,19 +175,35 @@ class ResourceSerializer(serializers.ModelSerializer):
             "options",
         )
 
+    def get_category(self, obj):
+        node = category_tree(self.context).get(obj.category_id)
+        if node is not None:
+            return node
+
+        return CategorySerializer(obj.category, context=self.context).data
+
 
 # =======================
 # RESERVATION
 # =======================
 
+class OptionValueIdsField(serializers.ListField):
+    """
+    Liste d'ids de ResourceOptionValue. Contrairement à
+    PrimaryKeyRelatedField(many=True), aucune requête par id : la
+    vérification se fait en une fois avec la ressource (cf. validate).
+    """
+
+    child = serializers.IntegerField(min_value=1)
+
+    def to_representation(self, data):
+        return [value.pk for value in data.all()]
+
+
 class ReservationSerializer(serializers.ModelSerializer):
 
-    # 🔥 Pour création (on garde les IDs)
-    selected_options = serializers.PrimaryKeyRelatedField(
-        queryset=ResourceOptionValue.objects.all(),
-        many=True,
-        required=False
-    )
+    # 🔥 Pour création (on garde les IDs, validés en lot dans validate())
+    selected_options = OptionValueIdsField(required=False)
 
     # 🔥 Pour affichage lisible
     selected_options_details = ResourceOptionValueSerializer(
@@ -149,6 +240,11 @@ class ReservationSerializer(serializers.ModelSerializer):
         )
 
     def get_user_profile(self, obj):
+        # 🔥 Profils préchargés par la vue (listes) : pas de requête par ligne
+        profiles = self.context.get("profiles")
+        if profiles is not None:
+            return profiles.get(obj.user_clerk_id)
+
         return UserProfile.objects.filter(
             clerk_user_id=obj.user_clerk_id
         ).first()
@@ -165,15 +261,98 @@ class ReservationSerializer(serializers.ModelSerializer):
         profile = self.get_user_profile(obj)
         return profile.last_name if profile else None
 
+    def validate(self, attrs):
+        ids = attrs.get("selected_options")
+
+        if ids:
+            try:
+                attrs["selected_options"] = option_values_for(attrs["resource"], ids)
+            except ValueError as exc:
+                raise serializers.ValidationError({"selected_options": str(exc)})
+
+        return attrs
+
     def create(self, validated_data):
         request = self.context["request"]
-        selected_options = validated_data.pop("selected_options", [])
 
-        reservation = Reservation.objects.create(
-            user_clerk_id=request.user.id,
-            **validated_data
-        )
+        # La vue passe déjà user_clerk_id à save()
+        validated_data.setdefault("user_clerk_id", request.user.id)
+
+        reservation = create_reservation(**validated_data)
+
+        # Options de la réponse : une requête, quel que soit leur nombre
+        prefetch_related_objects([reservation], "selected_options")
+
+        return reservation
+
+
+# =======================
+# ADMIN : FILTRES / MISE À JOUR EN MASSE
+# =======================
+
+class ReservationFilterSerializer(serializers.Serializer):
+    status = serializers.ChoiceField(choices=STATUSES, required=False)
+    resource = serializers.IntegerField(required=False)
+    created_from = serializers.DateTimeField(required=False)
+    created_to = serializers.DateTimeField(required=False)
+
+
+class ReservationBulkStatusSerializer(serializers.Serializer):
+    MAX_IDS = 5000
+
+    status = serializers.ChoiceField(choices=STATUSES)
+    ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False,
+        allow_empty=False,
+        max_length=MAX_IDS,
+    )
+    filter = ReservationFilterSerializer(required=False)
+
+    def validate(self, attrs):
+        has_ids = "ids" in attrs
+        has_filter = "filter" in attrs
+
+        if has_ids == has_filter:
+            raise serializers.ValidationError(
+                "Provide either 'ids' or 'filter'."
+            )
+
+        # 🔥 Un filtre vide mettrait à jour toute la table
+        if has_filter and not attrs["filter"]:
+            raise serializers.ValidationError(
+                {"filter": "At least one filter is required."}
+            )
+
+        return attrs
+
+
+class AdminStatsQuerySerializer(serializers.Serializer):
+    """
+    ?start=&end= (dates incluses, 90 derniers jours par défaut)
+    &resource=&status=
+    """
+
+    DEFAULT_DAYS = 90
+    MAX_DAYS = 366
+
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    resource = serializers.IntegerField(required=False)
+    status = serializers.ChoiceField(choices=STATUSES, required=False)
+
+    def validate(self, attrs):
+        end = attrs.setdefault("end", timezone.localdate())
+        start = attrs.setdefault("start", end - timedelta(days=self.DEFAULT_DAYS - 1))
+
+        if start > end:
+            raise serializers.ValidationError(
+                {"start": "Must be on or before 'end'."}
+            )
 
-        reservation.selected_options.set(selected_options)
+        if (end - start).days >= self.MAX_DAYS:
+            raise serializers.ValidationError(
+                {"start": f"At most {self.MAX_DAYS} days per request."}
+            )
 
-        return reservation
\ No newline at end of file
+        return attrs
@@ -0,0 +1,172 @@
+from functools import partial
+
+from asgiref.local import Local
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import (
+    Category,
+    Reservation,
+    Resource,
+    ResourceOption,
+    ResourceOptionValue,
+    ResourcePhoto,
+    UserProfile,
+)
+from . import counters, facets, images, search
+from .db_router import pin_to_primary
+from .profiles import invalidate_profile
+from .versions import CATALOG, CATEGORY_TREE, bump_version
+
+
+CATALOG_MODELS = (
+    Category,
+    Resource,
+    ResourcePhoto,
+    ResourceOption,
+    ResourceOptionValue,
+)
+
+
+# =========================
+# USER PROFILE
+# =========================
+
+@receiver([post_save, post_delete], sender=UserProfile)
+def invalidate_cached_profile(sender, instance, **kwargs):
+    # Ex: is_admin modifié depuis l'admin Django
+    invalidate_profile(instance.clerk_user_id)
+
+
+# =========================
+# RESERVATION COUNTERS
+# =========================
+
+@receiver(post_delete, sender=Reservation)
+def decrement_reservation_counters(sender, instance, origin=None, **kwargs):
+    # Une seule réservation : même transaction que le DELETE. Les
+    # suppressions en lot sont décomptées une fois (counted_in_batch)
+    if counters.counted_in_batch(origin):
+        return
+
+    counters.move(before=counters.reservation_key(
+        instance.created_at, instance.resource_id, instance.status
+    ))
+
+
+@receiver(post_delete, sender=Resource)
+def forget_resource_reservations(sender, instance, **kwargs):
+    counters.forget_resources([instance.pk])
+
+
+# =========================
+# CATEGORY TREE
+# =========================
+
+@receiver([post_save, post_delete], sender=Category)
+def invalidate_category_tree(sender, instance, **kwargs):
+    # Après commit : les autres process reconstruisent avec les données à jour
+    transaction.on_commit(partial(bump_version, CATEGORY_TREE))
+
+
+# =========================
+# DÉRIVÉS DU CATALOGUE (recherche FTS5, facettes)
+# =========================
+
+# Ressources / catégories touchées depuis le dernier flush (par thread ou
+# contexte async, comme les connexions)
+_pending = Local()
+
+
+def refresh_derived(resource_ids, category_ids=()):
+    search.index_resources(resource_ids)
+    facets.sync_resources(resource_ids, category_ids)
+
+
+def flush_derived():
+    resource_ids = getattr(_pending, "resource_ids", None)
+    if not resource_ids:
+        return
+
+    category_ids = _pending.category_ids
+    _pending.resource_ids = _pending.category_ids = None
+
+    refresh_derived(resource_ids, category_ids)
+
+
+def schedule_refresh(resource_ids, category_ids=()):
+    """
+    Une ressource et ses options/valeurs enregistrées dans une même
+    transaction : un seul index_resources / sync_resources au commit. Le
+    premier flush traite tout, les suivants n'ont plus rien à faire (et
+    après un rollback, les ids restants sont simplement réindexés au
+    prochain commit).
+    """
+    if getattr(_pending, "resource_ids", None) is None:
+        _pending.resource_ids = set()
+        _pending.category_ids = set()
+
+    _pending.resource_ids.update(resource_ids)
+    _pending.category_ids.update(category_ids)
+
+    transaction.on_commit(flush_derived)
+
+
+@receiver([post_save, post_delete], sender=Resource)
+def refresh_resource(sender, instance, **kwargs):
+    # Ressource supprimée : ses facettes ont déjà disparu (CASCADE), on
+    # recompte donc explicitement sa catégorie
+    schedule_refresh([instance.pk], [instance.category_id])
+
+
+@receiver([post_save, post_delete], sender=ResourceOption)
+def refresh_option_resource(sender, instance, **kwargs):
+    schedule_refresh([instance.resource_id])
+
+
+@receiver([post_save, post_delete], sender=ResourceOptionValue)
+def refresh_option_value_resource(sender, instance, **kwargs):
+    resource_ids = ResourceOption.objects.filter(
+        pk=instance.option_id
+    ).values_list("resource_id", flat=True)
+
+    schedule_refresh(list(resource_ids))
+
+
+@receiver(post_save, sender=Category)
+def reindex_category_resources(sender, instance, **kwargs):
+    transaction.on_commit(partial(search.index_category, instance.pk))
+
+
+# =========================
+# PHOTOS : VARIANTES RESPONSIVES
+# =========================
+
+@receiver(post_save, sender=ResourcePhoto)
+def generate_photo_variants(sender, instance, **kwargs):
+    # Seulement si l'image a changé (pas pour un simple changement de position)
+    if instance.image and instance.variants.get("source") != instance.image.name:
+        transaction.on_commit(partial(images.schedule_variants, instance.pk))
+
+
+@receiver(post_delete, sender=ResourcePhoto)
+def delete_photo_variants(sender, instance, **kwargs):
+    transaction.on_commit(partial(images.delete_variants, instance.variants))
+
+
+# =========================
+# CATALOG VERSION
+# =========================
+
+def invalidate_catalog(sender, instance, **kwargs):
+    # Avant le bump : aucune réponse de la nouvelle version n'est lue (et
+    # mise en cache) depuis une réplique en retard
+    transaction.on_commit(partial(pin_to_primary, CATALOG))
+    # Connecté en dernier : l'index de recherche est à jour avant le bump
+    transaction.on_commit(partial(bump_version, CATALOG))
+
+
+for model in CATALOG_MODELS:
+    post_save.connect(invalidate_catalog, sender=model)
+    post_delete.connect(invalidate_catalog, sender=model)
@@ -0,0 +1,51 @@
+import hashlib
+import posixpath
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+# =========================
+# STOCKAGE À NOMS HASHÉS (media)
+# =========================
+
+HASH_LENGTH = 12
+
+
+@deconstructible
+class HashedMediaStorage(FileSystemStorage):
+    """
+    resources/robe.jpg -> resources/robe.3f2a9c01b7de.jpg
+
+    Le nom dépend du contenu : une URL ne change jamais de contenu, elle
+    peut donc être servie avec `Cache-Control: immutable`. Un fichier
+    identique déjà présent est réutilisé au lieu d'être réécrit.
+    """
+
+    def hashed_name(self, name, content):
+        digest = hashlib.sha256()
+
+        if hasattr(content, "seek"):
+            content.seek(0)
+        for chunk in content.chunks():
+            digest.update(chunk)
+        if hasattr(content, "seek"):
+            content.seek(0)
+
+        root, ext = posixpath.splitext(name)
+        return f"{root}.{digest.hexdigest()[:HASH_LENGTH]}{ext}"
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+
+        name = self.hashed_name(self.generate_filename(name), content)
+
+        if self.exists(name):
+            return name
+
+        return super().save(name, content, max_length=max_length)
@@ -1,3 +1,2327 @@
-from django.test import TestCase
+import csv
+import io
+import sqlite3
+import json
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, connections, router, transaction
+from django.test import AsyncClient, Client, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+
+from . import async_views, category_tree, counters, facets, search
+from .authentication import ClerkAuthentication
+from .checks import check_shared_cache
+from .db_router import read_scope, use_replica
+from .exports import iter_rows
+from .idempotency import request_hash
+from .jwks import JWKSKeyStore, set_key_store
+from .local_clerk import LocalClerk
+from .models import (
+    Category,
+    FacetCount,
+    IdempotencyKey,
+    Reservation,
+    Resource,
+    ResourceOption,
+    ResourceOptionValue,
+    ResourcePhoto,
+    ReservationDailyStat,
+    ReservationStats,
+    UserProfile,
+)
+from .reservations import create_reservation as create_counted_reservation
+from .search import search_resource_ids
+from .seeding import seed_catalog, seed_reservations
+from .serializers import ResourcePhotoSerializer
+from .token_cache import VerifiedTokenCache, get_token_cache
+from .versions import CATEGORY_TREE, bump_version
+
+
+# =========================
+# HELPERS (Clerk local)
+# =========================
+
+CLERK = LocalClerk(kid="test-key")
+KID = CLERK.kid
+PUBLIC_JWK = CLERK.public_jwk
+make_token = CLERK.mint
+
+
+def make_jwks():
+    return {"keys": [PUBLIC_JWK]}
+
+
+def create_resource(name="Robe", category=None, options=1, values=2, photos=0):
+    if category is None:
+        category, _ = Category.objects.get_or_create(
+            slug="robes", defaults={"name": "Robes"}
+        )
+
+    resource = Resource.objects.create(category=category, name=name)
+
+    for i in range(photos):
+        ResourcePhoto.objects.create(
+            resource=resource, image=f"resources/{name}-{i}.jpg", position=i
+        )
+
+    for i in range(options):
+        option = ResourceOption.objects.create(resource=resource, name=f"Option {i}")
+        for j in range(values):
+            ResourceOptionValue.objects.create(option=option, value=f"Valeur {j}")
+
+    return resource
+
+
+def create_reservation(resource, clerk_user_id="user_1"):
+    UserProfile.objects.get_or_create(
+        clerk_user_id=clerk_user_id,
+        defaults={"email": f"{clerk_user_id}@example.com"},
+    )
+    reservation = Reservation.objects.create(
+        resource=resource, user_clerk_id=clerk_user_id
+    )
+    reservation.selected_options.set(
+        ResourceOptionValue.objects.filter(option__resource=resource)[:1]
+    )
+    return reservation
+
+
+class APITestCase(TestCase):
+    """
+    Client authentifié via un JWKS local (aucun appel réseau à Clerk).
+    """
+
+    def setUp(self):
+        set_key_store(JWKSKeyStore(fetcher=CountingFetcher()))
+        self.addCleanup(set_key_store, None)
+        get_token_cache().clear()
+        cache.clear()
+        caches["catalog"].clear()
+        self.client = APIClient()
+
+    def authenticate(self, sub="user_1", **claims):
+        token = make_token(sub=sub, **claims)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response
+
+
+class CountingFetcher:
+    def __init__(self, jwks=None):
+        self.jwks = jwks or make_jwks()
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.jwks
+
+
+# =========================
+# JWKS KEY STORE
+# =========================
+
+class JWKSKeyStoreTests(TestCase):
+
+    def test_keys_are_cached_between_lookups(self):
+        fetcher = CountingFetcher()
+        store = JWKSKeyStore(fetcher=fetcher)
+
+        for _ in range(5):
+            self.assertEqual(store.get_key(KID), PUBLIC_JWK)
+
+        self.assertEqual(fetcher.calls, 1)
+
+    def test_expired_keys_are_refetched(self):
+        fetcher = CountingFetcher()
+        store = JWKSKeyStore(fetcher=fetcher, ttl=0, min_ttl=0, refresh_margin=0)
+
+        store.get_key(KID)
+        store.get_key(KID)
+
+        self.assertEqual(fetcher.calls, 2)
+
+    def test_ttl_is_clamped_to_a_minimum(self):
+        fetcher = CountingFetcher()
+        store = JWKSKeyStore(fetcher=fetcher, ttl=0, min_ttl=60, refresh_margin=0)
+
+        store.get_key(KID)
+        store.get_key(KID)
+
+        self.assertEqual(fetcher.calls, 1)
+
+    def test_failed_refresh_keeps_stale_keys_until_cooldown(self):
+        fetcher = CountingFetcher()
+        store = JWKSKeyStore(fetcher=fetcher, ttl=0, min_ttl=0, refresh_margin=0)
+        store.get_key(KID)
+
+        def failing():
+            fetcher.calls += 1
+            raise OSError("clerk down")
+
+        store.fetcher = failing
+        for _ in range(5):
+            self.assertEqual(store.get_key(KID), PUBLIC_JWK)
+
+        self.assertEqual(fetcher.calls, 2)
+
+    def wait_for_background_refresh(self):
+        for thread in threading.enumerate():
+            if thread.name == "jwks-refresh":
+                thread.join()
+
+    def test_short_ttl_does_not_refresh_on_every_request(self):
+        fetcher = CountingFetcher()
+        store = JWKSKeyStore(fetcher=fetcher, ttl=10, min_ttl=10)
+
+        for _ in range(50):
+            self.assertEqual(store.get_key(KID), PUBLIC_JWK)
+        self.wait_for_background_refresh()
+
+        self.assertEqual(fetcher.calls, 1)
+
+    def test_failed_refresh_backs_off_with_default_margin(self):
+        fetcher = CountingFetcher()
+        store = JWKSKeyStore(fetcher=fetcher, ttl=0, min_ttl=0)
+        store.get_key(KID)
+
+        def failing():
+            fetcher.calls += 1
+            raise OSError("clerk down")
+
+        store.fetcher = failing
+        for _ in range(50):
+            self.assertEqual(store.get_key(KID), PUBLIC_JWK)
+        self.wait_for_background_refresh()
+
+        self.assertEqual(fetcher.calls, 2)
+
+    def test_unknown_kid_refetches_once_per_cooldown(self):
+        fetcher = CountingFetcher()
+        store = JWKSKeyStore(fetcher=fetcher, refetch_cooldown=0)
+        store.get_key(KID)
+
+        self.assertIsNone(store.get_key("unknown"))
+        self.assertEqual(fetcher.calls, 2)
+
+        store.refetch_cooldown = 60
+        for _ in range(10):
+            self.assertIsNone(store.get_key("unknown"))
+        self.assertEqual(fetcher.calls, 2)
+
+    def test_keys_can_be_loaded_from_a_local_file(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".json") as f:
+            json.dump(make_jwks(), f)
+            f.flush()
+
+            store = JWKSKeyStore(path=f.name)
+            self.assertEqual(store.get_key(KID), PUBLIC_JWK)
+
+
+# =========================
+# VERIFIED TOKEN CACHE
+# =========================
+
+class VerifiedTokenCacheTests(TestCase):
+
+    def test_hits_and_misses_are_counted(self):
+        cache = VerifiedTokenCache(max_size=10)
+        payload = {"sub": "user_1", "exp": time.time() + 60}
+
+        self.assertIsNone(cache.get("token"))
+        cache.set("token", payload)
+        self.assertEqual(cache.get("token"), payload)
+
+        self.assertEqual(cache.stats["hits"], 1)
+        self.assertEqual(cache.stats["misses"], 1)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = VerifiedTokenCache(max_size=2)
+        exp = time.time() + 60
+
+        cache.set("a", {"exp": exp})
+        cache.set("b", {"exp": exp})
+        cache.get("a")
+        cache.set("c", {"exp": exp})
+
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(len(cache), 2)
+
+    def test_entries_expire_with_the_token(self):
+        cache = VerifiedTokenCache()
+
+        cache.set("expired", {"exp": time.time() - 1})
+        cache.set("no-exp", {"sub": "user_1"})
+
+        self.assertIsNone(cache.get("expired"))
+        self.assertIsNone(cache.get("no-exp"))
+
+
+# =========================
+# AUTHENTICATION
+# =========================
+
+class ClerkAuthenticationTests(TestCase):
+
+    def setUp(self):
+        self.fetcher = CountingFetcher()
+        set_key_store(JWKSKeyStore(fetcher=self.fetcher))
+        self.addCleanup(set_key_store, None)
+        get_token_cache().clear()
+        cache.clear()
+        self.client = APIClient()
+
+    def test_valid_token_is_accepted_without_refetching_keys(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {make_token()}")
+
+        for _ in range(3):
+            response = self.client.get("/api/protected/")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data["clerk_user_id"], "user_1")
+
+        self.assertEqual(self.fetcher.calls, 1)
+
+    def test_repeated_token_skips_signature_verification(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {make_token()}")
+
+        self.client.get("/api/protected/")
+        self.client.get("/api/protected/")
+
+        self.assertEqual(get_token_cache().stats["misses"], 1)
+        self.assertEqual(get_token_cache().stats["hits"], 1)
+
+    def test_invalid_token_is_rejected(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer not-a-token")
+
+        response = self.client.get("/api/protected/")
+
+        self.assertEqual(response.status_code, 403)
+
+
+# =========================
+# USER PROFILE
+# =========================
+
+class ProfileResolutionTests(APITestCase):
+
+    def test_steady_state_request_runs_no_profile_query(self):
+        self.authenticate(email="a@example.com", first_name="Ana")
+        self.client.get("/api/protected/")
+
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/protected/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(UserProfile.objects.count(), 1)
+
+    def test_changed_claims_only_write_changed_fields(self):
+        self.authenticate(email="a@example.com", first_name="Ana")
+        self.client.get("/api/protected/")
+
+        self.authenticate(email="a@example.com", first_name="Anna")
+        with self.assertNumQueries(2) as ctx:
+            self.client.get("/api/protected/")
+
+        update = ctx.captured_queries[-1]["sql"]
+        self.assertIn('"first_name"', update)
+        self.assertNotIn('"email"', update)
+        self.assertEqual(UserProfile.objects.get().first_name, "Anna")
+
+    def test_admin_flag_change_is_picked_up(self):
+        self.authenticate(email="a@example.com")
+        self.assertFalse(self.client.get("/api/protected/").data["is_admin"])
+
+        profile = UserProfile.objects.get()
+        profile.is_admin = True
+        profile.save()
+
+        self.assertTrue(self.client.get("/api/protected/").data["is_admin"])
+
+    @override_settings(CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    })
+    def test_deploy_check_rejects_process_local_cache(self):
+        errors = check_shared_cache(None)
+
+        self.assertEqual([error.id for error in errors], ["core.E001"])
+
+    @override_settings(CACHES={
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": "/tmp/minette-test-cache",
+        },
+    })
+    def test_deploy_check_accepts_shared_cache(self):
+        self.assertEqual(check_shared_cache(None), [])
+
+
+# =========================
+# RESERVATIONS LIST
+# =========================
+
+class ReservationListQueryTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        UserProfile.objects.create(clerk_user_id="admin", is_admin=True)
+        self.authenticate(sub="admin")
+        self.client.get("/api/protected/")
+
+    def test_admin_list_query_count_does_not_grow_with_rows(self):
+        resource = create_resource()
+        create_reservation(resource, "user_a")
+        small, _ = self.count_queries("/api/admin-reservations/")
+
+        for i in range(10):
+            create_reservation(create_resource(f"Robe {i}"), f"user_{i}")
+        large, response = self.count_queries("/api/admin-reservations/")
+
+        self.assertEqual(small, large)
+        results = response.data["results"]
+        self.assertEqual(len(results), 11)
+        self.assertEqual(results[-1]["user_email"], "user_a@example.com")
+        self.assertEqual(len(results[-1]["selected_options_details"]), 1)
+
+
+# =========================
+# CATEGORY TREE
+# =========================
+
+class CategoryTreeTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.root = Category.objects.create(name="Robes", slug="robes")
+        self.child = Category.objects.create(
+            name="Longues", slug="longues", parent=self.root
+        )
+        Category.objects.create(
+            name="Archives", slug="archives", parent=self.root, is_active=False
+        )
+
+    def test_tree_is_built_once_then_served_from_memory(self):
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/categories/")
+
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]["slug"], "robes")
+        self.assertEqual(
+            [c["slug"] for c in response.data[0]["children"]], ["longues"]
+        )
+
+        with self.assertNumQueries(0):
+            self.client.get("/api/categories/")
+
+    def test_saving_a_category_invalidates_the_tree(self):
+        self.client.get("/api/categories/")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.create(name="Courtes", slug="courtes", parent=self.root)
+
+        response = self.client.get("/api/categories/")
+        self.assertEqual(len(response.data[0]["children"]), 2)
+
+    def test_resource_payload_uses_the_cached_tree(self):
+        create_resource(category=self.root)
+        create_resource(category=self.child)
+        self.client.get("/api/categories/")
+
+        response = self.client.get("/api/resources/")
+
+        newest, oldest = response.data["results"]
+        self.assertEqual(newest["category"]["parent"], self.root.id)
+        self.assertEqual(oldest["category"]["children"][0]["slug"], "longues")
+
+
+# =========================
+# RESOURCES (prefetch)
+# =========================
+
+class ResourceQueryTests(APITestCase):
+
+    def test_list_query_count_does_not_grow_with_resources(self):
+        create_resource("Robe 0", options=2, photos=2)
+        self.count_queries("/api/categories/")
+        small, _ = self.count_queries("/api/resources/")
+
+        for i in range(1, 15):
+            create_resource(f"Robe {i}", options=3, values=3, photos=3)
+        caches["catalog"].clear()
+        large, response = self.count_queries("/api/resources/")
+
+        self.assertEqual(small, large)
+        results = response.data["results"]
+        self.assertEqual(len(results), 15)
+        self.assertEqual(len(results[0]["options"][0]["values"]), 3)
+        self.assertEqual(
+            [p["position"] for p in results[0]["photos"]], [0, 1, 2]
+        )
+
+    def test_category_tree_version_is_read_once_per_page(self):
+        for i in range(5):
+            create_resource(f"Robe {i}")
+        caches["catalog"].clear()
+
+        with mock.patch(
+            "core.category_tree.get_version", wraps=category_tree.get_version
+        ) as get_version:
+            response = self.client.get("/api/resources/")
+
+        self.assertEqual(len(response.data["results"]), 5)
+        self.assertEqual(get_version.call_count, 1)
+
+    def test_detail_uses_the_same_prefetch_plan(self):
+        resource = create_resource(options=3, values=4, photos=2)
+        self.count_queries("/api/categories/")
+
+        count, response = self.count_queries(f"/api/resources/{resource.id}/")
+
+        self.assertEqual(count, 4)
+        self.assertEqual(len(response.data["options"]), 3)
+
+
+# =========================
+# KEYSET PAGINATION
+# =========================
+
+class KeysetPaginationTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        resource = create_resource()
+        self.reservations = [
+            create_reservation(resource) for _ in range(7)
+        ]
+        self.authenticate()
+
+    def test_pages_follow_created_at_then_id(self):
+        url = "/api/my-reservations/?page_size=3"
+        seen = []
+
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data["results"]), 3)
+            seen += [r["id"] for r in response.data["results"]]
+            url = response.data["next"]
+
+        expected = sorted(
+            self.reservations, key=lambda r: (r.created_at, r.id), reverse=True
+        )
+        self.assertEqual(seen, [r.id for r in expected])
+
+    def test_ties_on_created_at_are_broken_by_id(self):
+        Reservation.objects.update(created_at=self.reservations[0].created_at)
+
+        first = self.client.get("/api/my-reservations/?page_size=4").data
+        second = self.client.get(first["next"]).data
+
+        ids = [r["id"] for r in first["results"] + second["results"]]
+        self.assertEqual(ids, sorted((r.id for r in self.reservations), reverse=True))
+        self.assertIsNone(second["next"])
+
+    def test_page_size_is_capped(self):
+        with self.settings(API_MAX_PAGE_SIZE=5):
+            response = self.client.get("/api/my-reservations/?page_size=500")
+
+        self.assertEqual(len(response.data["results"]), 5)
+
+    def test_deep_pages_do_not_count_or_offset(self):
+        first = self.client.get("/api/my-reservations/?page_size=2").data
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(first["next"])
+
+        sql = " ".join(q["sql"] for q in ctx.captured_queries).upper()
+        self.assertNotIn("COUNT(", sql)
+        self.assertNotIn("OFFSET", sql)
+
+    def test_invalid_cursor_returns_404(self):
+        response = self.client.get("/api/my-reservations/?cursor=garbage")
+
+        self.assertEqual(response.status_code, 404)
+
+
+# =========================
+# INDEXES (EXPLAIN QUERY PLAN)
+# =========================
+
+class ExplainQueriesCommandTests(TestCase):
+
+    def test_endpoint_queries_avoid_scans_and_temp_sorts(self):
+        out = io.StringIO()
+
+        call_command(
+            "explain_queries",
+            categories=8,
+            resources=50,
+            users=10,
+            reservations=200,
+            repeat=1,
+            stdout=out,
+        )
+
+        output = out.getvalue()
+        self.assertIn("reservation_user_created_idx", output)
+        self.assertIn("resource_active_created_idx", output)
+        self.assertNotIn("⚠️", output)
+        self.assertFalse(Reservation.objects.exists())
+
+
+# =========================
+# CATALOGUE : GET CONDITIONNEL
+# =========================
+
+class CatalogConditionalGetTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.resource = create_resource(photos=1)
+
+    def test_matching_etag_returns_304_without_queries(self):
+        for url in (
+            "/api/categories/",
+            "/api/resources/",
+            f"/api/resources/{self.resource.id}/",
+        ):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn("no-cache", response["Cache-Control"])
+
+            with self.assertNumQueries(0):
+                response = self.client.get(
+                    url, HTTP_IF_NONE_MATCH=response["ETag"]
+                )
+            self.assertEqual(response.status_code, 304)
+
+    def test_catalog_write_changes_the_etag(self):
+        etag = self.client.get("/api/resources/")["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.resource.photos.first().delete()
+
+        response = self.client.get("/api/resources/", HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_missing_resource_has_no_etag(self):
+        response = self.client.get("/api/resources/999999/")
+
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.has_header("ETag"))
+
+
+# =========================
+# CATALOGUE : CACHE DES RÉPONSES
+# =========================
+
+class CatalogResponseCacheTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.resource = create_resource(photos=1)
+
+    def test_second_anonymous_request_is_served_from_cache(self):
+        first = self.client.get("/api/resources/")
+        self.assertEqual(first["X-Catalog-Cache"], "MISS")
+
+        with self.assertNumQueries(0):
+            second = self.client.get("/api/resources/")
+
+        self.assertEqual(second["X-Catalog-Cache"], "HIT")
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second["ETag"], first["ETag"])
+
+    def test_query_params_are_part_of_the_key(self):
+        self.client.get("/api/resources/?category=robes")
+
+        response = self.client.get("/api/resources/?category=autre")
+
+        self.assertEqual(response["X-Catalog-Cache"], "MISS")
+        self.assertEqual(json.loads(response.content)["results"], [])
+
+    def test_catalog_write_invalidates_cached_responses(self):
+        self.client.get(f"/api/resources/{self.resource.id}/")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.resource.name = "Robe longue"
+            self.resource.save()
+
+        response = self.client.get(f"/api/resources/{self.resource.id}/")
+
+        self.assertEqual(response["X-Catalog-Cache"], "MISS")
+        self.assertEqual(json.loads(response.content)["name"], "Robe longue")
+
+    def test_authenticated_requests_bypass_the_cache(self):
+        self.authenticate()
+
+        response = self.client.get("/api/categories/")
+
+        self.assertFalse(response.has_header("X-Catalog-Cache"))
+
+
+# =========================
+# RECHERCHE (FTS5)
+# =========================
+
+class ResourceSearchTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category = Category.objects.create(name="Mariage", slug="mariage")
+            self.dress = create_resource("Robe longue", category=self.category)
+            self.dress.description = "Robe de soirée en soie"
+            self.dress.save()
+            self.veil = create_resource("Voile", category=self.category)
+            self.veil.description = "Accessoire pour robe"
+            self.veil.save()
+
+    def search(self, q):
+        response = self.client.get("/api/resources/search/", {"q": q})
+        self.assertEqual(response.status_code, 200)
+        return [r["id"] for r in json.loads(response.content)["results"]]
+
+    def test_results_are_ranked_with_prefix_matching(self):
+        self.assertEqual(self.search("rob"), [self.dress.id, self.veil.id])
+        self.assertEqual(self.search("soiree"), [self.dress.id])
+        self.assertEqual(self.search("mariage voi"), [self.veil.id])
+        self.assertEqual(self.search(""), [])
+
+    def test_option_values_are_searchable(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            option = ResourceOption.objects.create(resource=self.veil, name="Couleur")
+            ResourceOptionValue.objects.create(option=option, value="Ivoire")
+
+        self.assertEqual(self.search("ivoi"), [self.veil.id])
+
+    def test_category_rename_reindexes_its_resources(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.name = "Cérémonie"
+            self.category.save()
+
+        self.assertEqual(len(self.search("ceremonie")), 2)
+        self.assertEqual(self.search("mariage"), [])
+
+    def test_inactive_and_deleted_resources_are_excluded(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.veil.is_active = False
+            self.veil.save()
+            self.dress.delete()
+
+        self.assertEqual(self.search("robe"), [])
+        self.assertEqual(
+            search_resource_ids("robe", active_only=False), [self.veil.id]
+        )
+
+    def test_rebuild_command_indexes_bulk_created_resources(self):
+        Resource.objects.bulk_create([
+            Resource(category=self.category, name="Tiare dorée"),
+        ])
+        self.assertEqual(self.search("tiare"), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("rebuild_search_index", stdout=io.StringIO())
+
+        self.assertEqual(len(self.search("tiare")), 1)
+        self.assertEqual(len(self.search("robe")), 2)
+
+
+# =========================
+# FACETTES
+# =========================
+
+class FacetTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.robes = Category.objects.create(name="Robes", slug="robes")
+            self.voiles = Category.objects.create(name="Voiles", slug="voiles")
+
+            self.red_s = self.create("Robe 1", self.robes, Couleur="Rouge", Taille="S")
+            self.red_m = self.create("Robe 2", self.robes, Couleur="Rouge", Taille="M")
+            self.blue = self.create("Robe 3", self.robes, Couleur="Bleu", Taille="S")
+            self.veil = self.create("Voile", self.voiles, Couleur="Rouge")
+
+    def create(self, name, category, **options):
+        resource = Resource.objects.create(category=category, name=name)
+        for option_name, value in options.items():
+            option = ResourceOption.objects.create(resource=resource, name=option_name)
+            ResourceOptionValue.objects.create(option=option, value=value)
+        return resource
+
+    def get(self, **params):
+        response = self.client.get("/api/resources/", params)
+        self.assertEqual(response.status_code, 200)
+        return json.loads(response.content)
+
+    def counts(self, data):
+        return {
+            value["key"]: value["count"]
+            for facet in data["facets"]
+            for value in facet["values"]
+        }
+
+    def test_facet_counts_for_the_current_category(self):
+        data = self.get(category="robes")
+
+        self.assertEqual(self.counts(data), {
+            "Couleur:Bleu": 1,
+            "Couleur:Rouge": 2,
+            "Taille:M": 1,
+            "Taille:S": 2,
+        })
+        self.assertEqual(self.counts(self.get())["Couleur:Rouge"], 3)
+
+    def test_option_value_filters_are_combined(self):
+        data = self.get(option_value=["Couleur:Rouge", "Taille:S"])
+
+        self.assertEqual([r["id"] for r in data["results"]], [self.red_s.id])
+
+    def test_counts_are_not_computed_per_request(self):
+        self.get()
+        caches["catalog"].clear()
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.get(category="robes")
+
+        sql = " ".join(q["sql"] for q in ctx.captured_queries).upper()
+        self.assertNotIn("GROUP BY", sql)
+
+    def test_signals_keep_counts_up_to_date(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.blue.delete()
+            self.red_m.is_active = False
+            self.red_m.save()
+
+        self.assertEqual(self.counts(self.get(category="robes")), {
+            "Couleur:Rouge": 1,
+            "Taille:S": 1,
+        })
+
+    def test_one_sync_per_transaction(self):
+        with (
+            mock.patch.object(facets, "recount", wraps=facets.recount) as recount,
+            mock.patch.object(search, "index_resources", wraps=search.index_resources) as index,
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            self.create("Robe 4", self.robes, Couleur="Vert", Taille="L")
+
+        self.assertEqual(recount.call_count, 1)
+        self.assertEqual(index.call_count, 1)
+        self.assertEqual(self.counts(self.get(category="robes"))["Couleur:Vert"], 1)
+
+    def test_overall_count_rows_are_unique(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            FacetCount.objects.create(option="Couleur", value="Rouge", count=1)
+
+    def test_invalid_option_value_is_rejected(self):
+        response = self.client.get("/api/resources/", {"option_value": "Rouge"})
+
+        self.assertEqual(response.status_code, 400)
+
+
+# =========================
+# ADMIN : STATUTS EN MASSE
+# =========================
+
+class BulkStatusUpdateTests(APITestCase):
+
+    url = "/api/admin-reservations/bulk-update-status/"
+
+    def setUp(self):
+        super().setUp()
+        UserProfile.objects.create(clerk_user_id="admin", is_admin=True)
+        self.authenticate(sub="admin")
+
+        resource = create_resource()
+        self.reservations = [create_reservation(resource) for _ in range(4)]
+        self.reservations[0].status = "confirmed"
+        self.reservations[0].save()
+
+    def test_ids_are_updated_with_a_single_update(self):
+        ids = [r.id for r in self.reservations] + [999999]
+        self.client.get("/api/protected/")
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(
+                self.url, {"status": "confirmed", "ids": ids}, format="json"
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["updated"], 3)
+        self.assertEqual(response.data["unchanged"], 1)
+        self.assertEqual(response.data["missing"], 1)
+
+        updates = [
+            q for q in ctx.captured_queries
+            if q["sql"].startswith('UPDATE "core_reservation"')
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('SET "status"', updates[0]["sql"])
+        self.assertEqual(
+            Reservation.objects.filter(status="confirmed").count(), 4
+        )
+
+    def test_filter_selects_reservations(self):
+        response = self.client.post(
+            self.url,
+            {"status": "cancelled", "filter": {"status": "pending"}},
+            format="json",
+        )
+
+        self.assertEqual(response.data["updated"], 3)
+        self.assertEqual(Reservation.objects.get(
+            pk=self.reservations[0].pk
+        ).status, "confirmed")
+
+    def test_invalid_payloads_are_rejected(self):
+        for payload in (
+            {"status": "confirmed"},
+            {"status": "confirmed", "filter": {}},
+            {"status": "unknown", "ids": [1]},
+            {"status": "confirmed", "ids": [1], "filter": {"status": "pending"}},
+        ):
+            response = self.client.post(self.url, payload, format="json")
+            self.assertEqual(response.status_code, 400, payload)
+
+    def test_single_update_writes_only_the_status(self):
+        reservation = self.reservations[1]
+        url = f"/api/admin-reservations/{reservation.id}/update-status/"
+
+        response = self.client.post(url, {"status": "cancelled"}, format="json")
+        missing = self.client.post(
+            "/api/admin-reservations/999999/update-status/",
+            {"status": "cancelled"},
+            format="json",
+        )
+
+        self.assertEqual(response.data["new_status"], "cancelled")
+        self.assertEqual(missing.status_code, 404)
+        reservation.refresh_from_db()
+        self.assertEqual(reservation.status, "cancelled")
+
+    def test_non_admin_is_forbidden(self):
+        self.authenticate(sub="user_1")
+
+        response = self.client.post(
+            self.url, {"status": "confirmed", "ids": [1]}, format="json"
+        )
+
+        self.assertEqual(response.status_code, 403)
+
+
+# =========================
+# ADMIN : EXPORT
+# =========================
+
+class ReservationExportTests(APITestCase):
+
+    url = "/api/admin-reservations/export/"
+
+    def setUp(self):
+        super().setUp()
+        UserProfile.objects.create(clerk_user_id="admin", is_admin=True)
+        self.authenticate(sub="admin")
+
+        resource = create_resource("Robe")
+        self.reservations = [
+            create_reservation(resource, f"user_{i}") for i in range(5)
+        ]
+        Reservation.objects.filter(pk=self.reservations[0].pk).update(
+            status="confirmed"
+        )
+
+    def read(self, response):
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content).decode()
+
+    def test_csv_export_joins_resource_profile_and_options(self):
+        content = self.read(self.client.get(self.url))
+
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[-1]["resource_name"], "Robe")
+        self.assertEqual(rows[-1]["user_email"], "user_0@example.com")
+        self.assertEqual(rows[-1]["selected_options"], "Option 0: Valeur 0")
+
+    def test_csv_export_neutralizes_formulas(self):
+        UserProfile.objects.filter(clerk_user_id="user_0").update(
+            first_name='=HYPERLINK("http://evil.example","x")',
+            last_name="-2+3",
+            email="@SUM(A1)",
+        )
+
+        content = self.read(self.client.get(self.url))
+
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(
+            rows[-1]["user_first_name"], '\'=HYPERLINK("http://evil.example","x")'
+        )
+        self.assertEqual(rows[-1]["user_last_name"], "'-2+3")
+        self.assertEqual(rows[-1]["user_email"], "'@SUM(A1)")
+        self.assertEqual(rows[-1]["resource_name"], "Robe")
+
+        # le NDJSON n'est pas destiné à un tableur : valeurs intactes
+        content = self.read(self.client.get(self.url, {"output": "ndjson"}))
+        first_names = [
+            json.loads(line)["user_first_name"] for line in content.splitlines()
+        ]
+        self.assertIn('=HYPERLINK("http://evil.example","x")', first_names)
+
+    def test_ndjson_export_with_status_filter(self):
+        content = self.read(
+            self.client.get(self.url, {"output": "ndjson", "status": "confirmed"})
+        )
+
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([r["id"] for r in rows], [self.reservations[0].id])
+
+    def test_queries_grow_with_chunks_not_rows(self):
+        with CaptureQueriesContext(connection) as ctx:
+            rows = list(iter_rows(Reservation.objects.all(), chunk_size=2))
+
+        self.assertEqual(len(rows), 5)
+        # 1 lecture des réservations + (profils, options) par paquet de 2
+        self.assertEqual(len(ctx.captured_queries), 1 + 2 * 3)
+
+    def test_invalid_parameters_are_rejected(self):
+        self.assertEqual(
+            self.client.get(self.url, {"output": "xml"}).status_code, 400
+        )
+        self.assertEqual(
+            self.client.get(self.url, {"created_from": "hier"}).status_code, 400
+        )
+
+
+# =========================
+# PHOTOS : VARIANTES
+# =========================
+
+def make_image(width=2000, height=1000, name="photo.png"):
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), "purple").save(buffer, "PNG")
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png")
+
+
+class ImageVariantTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+
+        overrides = override_settings(MEDIA_ROOT=media.name, IMAGE_VARIANT_WORKERS=0)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+        self.resource = create_resource()
+
+    def add_photo(self, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            photo = ResourcePhoto.objects.create(
+                resource=self.resource, image=make_image(**kwargs)
+            )
+        photo.refresh_from_db()
+        return photo
+
+    def test_variants_are_generated_next_to_the_original(self):
+        photo = self.add_photo()
+        storage = photo.image.storage
+
+        self.assertEqual(photo.variants["source"], photo.image.name)
+        self.assertEqual(
+            [photo.variants[v]["width"] for v in ("thumbnail", "medium", "large")],
+            [320, 800, 1600],
+        )
+        for variant in ("thumbnail", "medium", "large"):
+            for fmt in ("webp", "jpeg"):
+                name = photo.variants[variant][fmt]
+                self.assertTrue(storage.exists(name))
+                self.assertTrue(name.startswith("resources/photo"))
+
+    def test_small_originals_are_not_upscaled(self):
+        photo = self.add_photo(width=500, height=300)
+
+        self.assertEqual(photo.variants["large"]["width"], 500)
+
+    def test_serializer_exposes_variant_urls_and_srcset(self):
+        self.add_photo()
+
+        response = self.client.get(f"/api/resources/{self.resource.id}/")
+
+        photo = response.data["photos"][0]
+        self.assertTrue(photo["variants"]["thumbnail"]["webp"].endswith(".webp"))
+        self.assertIn(" 320w, ", photo["srcset"]["jpeg"])
+        self.assertTrue(photo["srcset"]["webp"].endswith(" 1600w"))
+
+    def test_srcset_has_one_entry_per_width(self):
+        self.add_photo(width=200, height=100)
+
+        response = self.client.get(f"/api/resources/{self.resource.id}/")
+
+        srcset = response.data["photos"][0]["srcset"]
+        self.assertEqual(srcset["jpeg"].count(" 200w"), 1)
+        self.assertNotIn(",", srcset["webp"])
+
+    def test_each_photo_gets_its_own_srcset(self):
+        small = self.add_photo(width=200, height=100)
+        large = self.add_photo()
+
+        data = ResourcePhotoSerializer([small, large], many=True).data
+
+        self.assertNotIn(",", data[0]["srcset"]["jpeg"])
+        self.assertTrue(data[1]["srcset"]["jpeg"].endswith(" 1600w"))
+        for photo in data:
+            self.assertEqual(
+                photo["srcset"]["webp"].split(", ")[0].split(" ")[0],
+                photo["variants"]["thumbnail"]["webp"],
+            )
+
+    def test_replacing_the_image_deletes_old_variants(self):
+        photo = self.add_photo()
+        old = photo.variants
+        storage = photo.image.storage
+
+        with self.captureOnCommitCallbacks(execute=True):
+            photo.image = make_image(width=1000, height=600)
+            photo.save()
+        photo.refresh_from_db()
+
+        self.assertNotEqual(photo.variants["source"], old["source"])
+        for variant in ("thumbnail", "medium", "large"):
+            for fmt in ("webp", "jpeg"):
+                self.assertFalse(storage.exists(old[variant][fmt]))
+                self.assertTrue(storage.exists(photo.variants[variant][fmt]))
+
+    def test_changing_the_position_does_not_regenerate(self):
+        photo = self.add_photo()
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            photo.position = 3
+            photo.save()
+
+        self.assertFalse(any(
+            getattr(c, "func", None) is not None
+            and c.func.__name__ == "schedule_variants"
+            for c in callbacks
+        ))
+
+
+# =========================
+# MEDIA : NOMS HASHÉS ET CACHE
+# =========================
+
+class MediaServingTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+
+        overrides = override_settings(MEDIA_ROOT=media.name, IMAGE_VARIANT_WORKERS=0)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+        self.photo = ResourcePhoto.objects.create(
+            resource=create_resource(), image=make_image(name="robe.png")
+        )
+        self.url = self.photo.image.url
+
+    def test_file_names_contain_a_content_hash(self):
+        other = ResourcePhoto.objects.create(
+            resource=self.photo.resource, image=make_image(name="robe.png")
+        )
+
+        self.assertRegex(self.photo.image.name, r"^resources/robe\.[0-9a-f]{12}\.png$")
+        # Même contenu : même fichier, pas de copie
+        self.assertEqual(other.image.name, self.photo.image.name)
+
+    def test_hashed_media_are_immutable_and_revalidate_with_304(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertIn("max-age=31536000", response["Cache-Control"])
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_range_requests(self):
+        size = self.photo.image.size
+        etag = self.client.get(self.url)["ETag"]
+
+        response = self.client.get(self.url, HTTP_RANGE="bytes=0-9")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], f"bytes 0-9/{size}")
+        self.assertEqual(len(b"".join(response.streaming_content)), 10)
+
+        response = self.client.get(self.url, HTTP_RANGE="bytes=-4", HTTP_IF_RANGE=etag)
+        self.assertEqual(response["Content-Range"], f"bytes {size - 4}-{size - 1}/{size}")
+
+        response = self.client.get(self.url, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"old"')
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get(self.url, HTTP_RANGE=f"bytes={size}-")
+        self.assertEqual(response.status_code, 416)
+
+    def test_paths_outside_media_root_are_refused(self):
+        response = self.client.get("/media/../manage.py")
+
+        self.assertEqual(response.status_code, 404)
+
+
+# =========================
+# VUES ASYNC (ASGI)
+# =========================
+
+class AsyncViewTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.resource = create_resource("Robe longue", options=1, values=2)
+        create_resource("Jupe")
+        self.reservation = create_reservation(self.resource, "user_1")
+        create_reservation(self.resource, "user_2")
+
+    def auth_headers(self, sub="user_1", **claims):
+        return {"Authorization": f"Bearer {make_token(sub=sub, **claims)}"}
+
+    async def test_resource_list_matches_sync_view(self):
+        sync = await self.async_client.get("/api/resources/")
+        response = await self.async_client.get("/api/async/resources/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), json.loads(sync.content))
+        self.assertIn("ETag", response.headers)
+
+    async def test_tree_version_change_during_request(self):
+        real = async_views.aget_category_tree
+
+        async def tree_then_bump():
+            # Catégorie modifiée ailleurs entre le chargement et la sérialisation
+            tree = await real()
+            bump_version(CATEGORY_TREE)
+            return tree
+
+        with mock.patch.object(async_views, "aget_category_tree", tree_then_bump):
+            response = await self.async_client.get("/api/async/resources/")
+
+        self.assertEqual(response.status_code, 200)
+
+    async def test_resource_list_rejects_invalid_option_value(self):
+        response = await self.async_client.get(
+            "/api/async/resources/?option_value=Couleur"
+        )
+        self.assertEqual(response.status_code, 400)
+
+    async def test_resource_detail_and_not_modified(self):
+        url = f"/api/async/resources/{self.resource.pk}/"
+
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["name"], "Robe longue")
+        self.assertEqual(response.json()["category"]["slug"], "robes")
+
+        not_modified = await self.async_client.get(
+            url, headers={"If-None-Match": response.headers["ETag"]}
+        )
+        self.assertEqual(not_modified.status_code, 304)
+
+        missing = await self.async_client.get("/api/async/resources/999999/")
+        self.assertEqual(missing.status_code, 404)
+
+    async def test_my_reservations_requires_authentication(self):
+        response = await self.async_client.get("/api/async/my-reservations/")
+        self.assertEqual(response.status_code, 403)
+
+        invalid = await self.async_client.get(
+            "/api/async/my-reservations/",
+            headers={"Authorization": "Bearer invalid"},
+        )
+        self.assertEqual(invalid.status_code, 403)
+
+    async def test_my_reservations_lists_only_own_reservations(self):
+        response = await self.async_client.get(
+            "/api/async/my-reservations/", headers=self.auth_headers()
+        )
+
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEqual([row["id"] for row in results], [self.reservation.pk])
+        self.assertEqual(results[0]["user_email"], "user_1@example.com")
+        self.assertEqual(len(results[0]["selected_options_details"]), 1)
+
+    async def test_create_reservation(self):
+        option_value = await ResourceOptionValue.objects.filter(
+            option__resource=self.resource
+        ).alast()
+
+        response = await self.async_client.post(
+            "/api/async/reservations/",
+            {"resource": self.resource.pk, "selected_options": [option_value.pk]},
+            content_type="application/json",
+            headers=self.auth_headers("user_3", email="user3@example.com"),
+        )
+
+        self.assertEqual(response.status_code, 201)
+        data = response.json()
+        self.assertEqual(data["user_clerk_id"], "user_3")
+        self.assertEqual(data["user_email"], "user3@example.com")
+        self.assertEqual(data["status"], "pending")
+        self.assertEqual(data["selected_options"], [option_value.pk])
+
+        reservation = await Reservation.objects.aget(pk=data["id"])
+        self.assertEqual(reservation.user_clerk_id, "user_3")
+
+    async def test_create_reservation_validation_error(self):
+        response = await self.async_client.post(
+            "/api/async/reservations/",
+            {"resource": 999999},
+            content_type="application/json",
+            headers=self.auth_headers(),
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("resource", response.json())
+
+    async def test_create_reservation_without_csrf_cookie(self):
+        client = AsyncClient(enforce_csrf_checks=True)
+
+        response = await client.post(
+            "/api/async/reservations/",
+            {"resource": self.resource.pk},
+            content_type="application/json",
+            headers=self.auth_headers(),
+        )
+
+        self.assertEqual(response.status_code, 201)
+
+
+# =========================
+# IDEMPOTENCY-KEY
+# =========================
+
+class IdempotencyKeyTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.resource = create_resource()
+        self.authenticate()
+
+    def post(self, key="key-1", **data):
+        data.setdefault("resource", self.resource.pk)
+        headers = {"HTTP_IDEMPOTENCY_KEY": key} if key else {}
+        return self.client.post("/api/reservations/", data, format="json", **headers)
+
+    def test_replay_returns_stored_response_without_creating(self):
+        first = self.post()
+        self.assertEqual(first.status_code, 201)
+
+        with self.assertNumQueries(1):
+            replay = self.post()
+
+        self.assertEqual(replay.status_code, 201)
+        self.assertEqual(replay["Idempotent-Replayed"], "true")
+        self.assertEqual(json.loads(replay.content), json.loads(first.content))
+        self.assertEqual(Reservation.objects.count(), 1)
+
+    def test_keys_are_scoped_per_user(self):
+        self.post()
+        self.authenticate(sub="user_2")
+        self.assertEqual(self.post().status_code, 201)
+        self.assertEqual(Reservation.objects.count(), 2)
+
+    def test_key_reused_with_another_body(self):
+        self.post()
+        other = create_resource("Jupe")
+
+        response = self.post(resource=other.pk)
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Reservation.objects.count(), 1)
+
+    def test_in_progress_key_conflicts(self):
+        IdempotencyKey.objects.create(
+            user_clerk_id="user_1",
+            key="key-1",
+            request_hash=request_hash({"resource": self.resource.pk}),
+        )
+
+        self.assertEqual(self.post().status_code, 409)
+        self.assertFalse(Reservation.objects.exists())
+
+    def test_stale_in_progress_key_is_released(self):
+        record = IdempotencyKey.objects.create(
+            user_clerk_id="user_1",
+            key="key-1",
+            request_hash=request_hash({"resource": self.resource.pk}),
+        )
+        IdempotencyKey.objects.filter(pk=record.pk).update(
+            created_at=timezone.now() - timedelta(
+                seconds=settings.IDEMPOTENCY_IN_PROGRESS_TIMEOUT + 1
+            )
+        )
+
+        self.assertEqual(self.post().status_code, 201)
+        self.assertEqual(Reservation.objects.count(), 1)
+
+    def test_failed_request_releases_key(self):
+        self.assertEqual(self.post(resource=999999).status_code, 400)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+        self.assertEqual(self.post(resource=999999).status_code, 400)
+
+    def test_expired_key_is_reused_and_purged(self):
+        self.post()
+        IdempotencyKey.objects.update(
+            created_at=timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL + 1)
+        )
+
+        response = self.post()
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn("Idempotent-Replayed", response)
+        self.assertEqual(Reservation.objects.count(), 2)
+
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(days=30))
+        call_command("purge_idempotency_keys", stdout=io.StringIO())
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_without_key_each_post_creates(self):
+        self.post(key=None)
+        self.post(key=None)
+        self.assertEqual(Reservation.objects.count(), 2)
+
+    async def test_async_view_replays_stored_response(self):
+        headers = {
+            "Authorization": f"Bearer {make_token()}",
+            "Idempotency-Key": "async-1",
+        }
+        data = {"resource": self.resource.pk}
+
+        first = await self.async_client.post(
+            "/api/async/reservations/", data,
+            content_type="application/json", headers=headers,
+        )
+        replay = await self.async_client.post(
+            "/api/async/reservations/", data,
+            content_type="application/json", headers=headers,
+        )
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(replay.status_code, 201)
+        self.assertEqual(replay["Idempotent-Replayed"], "true")
+        self.assertEqual(replay.json(), first.json())
+        self.assertEqual(await Reservation.objects.acount(), 1)
+
+
+# =========================
+# CRÉATION : OPTIONS VALIDÉES EN LOT
+# =========================
+
+class ReservationCreateOptionsTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.resource = create_resource(options=3, values=2)
+        self.other = create_resource("Jupe")
+        self.authenticate()
+        self.client.get("/api/protected/")
+
+    def first_values(self, resource, count):
+        return [
+            option.values.order_by("id").first().pk
+            for option in resource.options.order_by("id")[:count]
+        ]
+
+    def post(self, resource, values):
+        return self.client.post(
+            "/api/reservations/",
+            {"resource": resource.pk, "selected_options": values},
+            format="json",
+        )
+
+    def test_query_count_does_not_grow_with_options(self):
+        single = self.first_values(self.resource, 1)
+        with CaptureQueriesContext(connection) as one:
+            response = self.post(self.resource, single)
+        self.assertEqual(response.status_code, 201)
+
+        values = self.first_values(self.resource, 3)
+        with CaptureQueriesContext(connection) as three:
+            response = self.post(self.resource, values)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(one.captured_queries), len(three.captured_queries))
+        self.assertEqual(response.data["selected_options"], values)
+        self.assertEqual(len(response.data["selected_options_details"]), 3)
+        self.assertEqual(response.data["user_email"], "user_1@placeholder.local")
+
+        reservation = Reservation.objects.get(pk=response.data["id"])
+        self.assertEqual(
+            sorted(reservation.selected_options.values_list("pk", flat=True)),
+            sorted(values),
+        )
+
+    def test_values_of_another_resource_are_rejected(self):
+        response = self.post(self.resource, self.first_values(self.other, 1))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("selected_options", response.data)
+        self.assertFalse(Reservation.objects.exists())
+
+    def test_one_value_per_option(self):
+        option = self.resource.options.order_by("id").first()
+        values = list(option.values.values_list("pk", flat=True))
+
+        response = self.post(self.resource, values)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("selected_options", response.data)
+
+    def test_without_options(self):
+        response = self.post(self.resource, [])
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["selected_options"], [])
+
+
+# =========================
+# BUDGET DE REQUÊTES : TOUTES LES ROUTES DE core.urls
+# =========================
+
+class RouteQueryCountTests(APITestCase):
+    """
+    Nombre exact de requêtes SQL par route, sur un jeu de données semé et
+    avec un JWKS local. Un nouveau champ de serializer qui réintroduit un
+    N+1 fait échouer le test de sa route.
+    """
+
+    # url_name -> (méthode, user, nombre de requêtes attendu)
+    ROUTES = {
+        "category-list": ("get", None, 0),
+        "resource-list": ("get", None, 5),
+        "resource-search": ("get", None, 5),
+        "resource-detail": ("get", None, 4),
+        "protected": ("get", "user", 0),
+        "reservation-create": ("post", "user", 10),
+        "my-reservations": ("get", "user", 3),
+        "admin-reservations": ("get", "admin", 3),
+        "admin-reservation-update-status": ("post", "admin", 4),
+        "admin-reservation-bulk-update-status": ("post", "admin", 7),
+        "admin-reservation-export": ("get", "admin", 3),
+        "admin-stats": ("get", "admin", 2),
+    }
+
+    def setUp(self):
+        super().setUp()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            resources = seed_catalog(categories=8, resources=30)
+            self.user_ids = seed_reservations(resources, users=5, reservations=60)
+
+        UserProfile.objects.create(clerk_user_id="admin", is_admin=True)
+
+        self.resource = Resource.objects.filter(is_active=True).order_by("id").first()
+        self.option_value = ResourceOptionValue.objects.filter(
+            option__resource=self.resource
+        ).order_by("id").first()
+        self.reservation = Reservation.objects.order_by("id").first()
+
+        self.tokens = {
+            "user": make_token(sub=self.user_ids[0]),
+            "admin": make_token(sub="admin"),
+        }
+
+        # Caches chauds (profils, arbre des catégories), comme en production
+        for token in self.tokens.values():
+            self.client.get("/api/protected/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.client.get("/api/categories/")
+
+    def request_for(self, url_name):
+        method, user, _ = self.ROUTES[url_name]
+
+        args = {
+            "resource-detail": [self.resource.pk],
+            "admin-reservation-update-status": [self.reservation.pk],
+        }
+        url = reverse(url_name, args=args.get(url_name))
+
+        payloads = {
+            "resource-search": {"q": "ressource"},
+            "reservation-create": {
+                "resource": self.resource.pk,
+                "selected_options": [self.option_value.pk],
+            },
+            "admin-reservation-update-status": {"status": "confirmed"},
+            "admin-reservation-bulk-update-status": {
+                "status": "confirmed",
+                "filter": {"status": "pending"},
+            },
+        }
+
+        kwargs = {}
+        if user:
+            kwargs["HTTP_AUTHORIZATION"] = f"Bearer {self.tokens[user]}"
+        if method == "post":
+            kwargs["format"] = "json"
+
+        return getattr(self.client, method), url, payloads.get(url_name), kwargs
+
+    def run_route(self, url_name):
+        send, url, data, kwargs = self.request_for(url_name)
+
+        # Réponses anonymes du catalogue : on mesure la vue, pas le cache
+        caches["catalog"].clear()
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = send(url, data, **kwargs)
+            if response.streaming:
+                b"".join(response.streaming_content)
+
+        self.assertLess(response.status_code, 300, f"{url_name}: {response.status_code}")
+        return len(ctx.captured_queries)
+
+    def test_every_route_is_covered(self):
+        from . import urls
+
+        names = {pattern.name for pattern in urls.urlpatterns}
+        self.assertEqual(names, set(self.ROUTES))
+
+    def test_route_query_counts(self):
+        for url_name, (_, _, expected) in self.ROUTES.items():
+            with self.subTest(route=url_name):
+                self.assertEqual(self.run_route(url_name), expected)
+
+    def test_budgets_leave_the_same_cold_cache_margin(self):
+        for url_name, (_, _, expected) in self.ROUTES.items():
+            with self.subTest(route=url_name):
+                self.assertEqual(
+                    settings.QUERY_BUDGETS[url_name],
+                    expected + settings.QUERY_BUDGET_MARGIN,
+                )
+
+
+# =========================
+# MIDDLEWARE : BUDGET DE REQUÊTES
+# =========================
+
+@override_settings(
+    QUERY_BUDGET_ENABLED=True,
+    QUERY_BUDGET_DEFAULT=100,
+    QUERY_BUDGETS={"category-list": 0},
+)
+class QueryBudgetMiddlewareTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        create_resource()
+
+    def test_headers_report_query_count(self):
+        response = self.client.get("/api/resources/")
+
+        count = int(response["X-Query-Count"])
+        self.assertGreater(count, 0)
+        self.assertIn(f'desc="{count} queries"', response["Server-Timing"])
+
+    def test_logs_requests_over_budget(self):
+        with self.assertLogs("core.queries", level="WARNING") as logs:
+            self.client.get("/api/categories/")
+
+        self.assertIn("category-list", logs.output[0])
+
+        with self.assertNoLogs("core.queries", level="WARNING"):
+            self.client.get("/api/resources/")
+
+    @override_settings(QUERY_BUDGET_ENABLED=False)
+    def test_disabled_by_default(self):
+        response = self.client.get("/api/resources/")
+        self.assertNotIn("X-Query-Count", response)
+
+
+# =========================
+# BENCHMARK : SEED, CLERK LOCAL, DRIVER
+# =========================
+
+class SeedDataTests(TestCase):
+
+    def test_seed_data_command(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command(
+                "seed_data",
+                categories=12,
+                depth=3,
+                resources=10,
+                photos=2,
+                options=2,
+                values=3,
+                users=4,
+                reservations=20,
+                options_per_reservation=2,
+                stdout=io.StringIO(),
+            )
+
+        self.assertEqual(Category.objects.count(), 12)
+        self.assertTrue(
+            Category.objects.filter(parent__parent__isnull=False).exists()
+        )
+        self.assertEqual(ResourcePhoto.objects.count(), 20)
+        self.assertEqual(ResourceOptionValue.objects.count(), 60)
+        self.assertEqual(Reservation.objects.count(), 20)
+
+        # Une valeur par option, de la ressource réservée
+        through = Reservation.selected_options.through
+        rows = through.objects.values_list(
+            "reservation_id",
+            "reservation__resource_id",
+            "resourceoptionvalue__option_id",
+            "resourceoptionvalue__option__resource_id",
+        )
+        self.assertEqual(len(rows), 40)
+        self.assertTrue(all(row[1] == row[3] for row in rows))
+        self.assertEqual(len({(row[0], row[2]) for row in rows}), 40)
+
+    def seed(self, **options):
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command(
+                "seed_data",
+                categories=4,
+                depth=2,
+                resources=5,
+                photos=0,
+                users=3,
+                reservations=10,
+                stdout=io.StringIO(),
+                **options,
+            )
+
+        return (
+            sorted(Category.objects.values_list("slug", flat=True)),
+            sorted(UserProfile.objects.values_list("clerk_user_id", flat=True)),
+        )
+
+    def test_reset_reseeds_the_same_identifiers(self):
+        first = self.seed()
+
+        with self.assertRaises(CommandError):
+            self.seed()
+
+        self.assertEqual(self.seed(reset=True), first)
+        self.assertEqual(Reservation.objects.count(), 10)
+        self.assertEqual(counters.count_reservations(), 10)
+
+
+class LocalClerkCommandTests(TestCase):
+
+    def test_writes_jwks_and_mints_verifiable_tokens(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            key = f"{tmp}/clerk.json"
+            jwks = f"{tmp}/jwks.json"
+            out = io.StringIO()
+
+            call_command("local_clerk", key=key, jwks=jwks, sub=["user_1"], stdout=out)
+            token = json.loads(out.getvalue())["tokens"]["user_1"]
+
+            # Même clé au second appel : les anciens tokens restent valides
+            call_command("local_clerk", key=key, jwks=jwks, stdout=io.StringIO())
+
+            set_key_store(JWKSKeyStore(path=jwks))
+            self.addCleanup(set_key_store, None)
+
+            payload = ClerkAuthentication().verify_token(token)
+            self.assertEqual(payload["sub"], "user_1")
+
+
+class BenchmarkAPICommandTests(TransactionTestCase):
+
+    def setUp(self):
+        self.addCleanup(set_key_store, None)
+        get_token_cache().clear()
+        cache.clear()
+
+    def test_reports_every_route(self):
+        from . import urls
+
+        resources = seed_catalog(categories=4, resources=5)
+        seed_reservations(resources, users=2, reservations=10)
+
+        # Un seul thread : la base SQLite en mémoire des tests verrouille
+        # ses tables en écriture concurrente
+        out = io.StringIO()
+        call_command(
+            "benchmark_api", requests=2, concurrency=1, stdout=out, stderr=io.StringIO()
+        )
+        report = json.loads(out.getvalue())
+
+        self.assertEqual(
+            set(report["routes"]), {pattern.name for pattern in urls.urlpatterns}
+        )
+        for name, route in report["routes"].items():
+            with self.subTest(route=name):
+                self.assertEqual(route["requests"], 2)
+                self.assertEqual(route["errors"], 0)
+                self.assertIn("p99_ms", route)
+                self.assertIsNotNone(route["queries_per_request"])
+
+    def test_benchmark_writes_are_rolled_back(self):
+        resources = seed_catalog(categories=4, resources=5)
+        seed_reservations(resources, users=2, reservations=10)
+        before = sorted(Reservation.objects.values_list("id", "status"))
+
+        call_command(
+            "benchmark_api", requests=2, concurrency=1,
+            stdout=io.StringIO(), stderr=io.StringIO(),
+        )
+
+        self.assertEqual(sorted(Reservation.objects.values_list("id", "status")), before)
+        self.assertFalse(UserProfile.objects.filter(clerk_user_id="bench_admin").exists())
+
+
+# =========================
+# SQLITE : PRAGMA ET BENCHMARK
+# =========================
+
+class SQLiteTuningTests(TestCase):
+
+    def test_connection_pragmas(self):
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA synchronous")
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+
+            cursor.execute("PRAGMA busy_timeout")
+            self.assertEqual(
+                cursor.fetchone()[0], settings.SQLITE_PRAGMAS["busy_timeout"]
+            )
+
+            cursor.execute("PRAGMA cache_size")
+            self.assertEqual(
+                cursor.fetchone()[0], settings.SQLITE_PRAGMAS["cache_size"]
+            )
+
+
+class SQLiteBenchmarkCommandTests(TransactionTestCase):
+    # Données validées : la copie (backup) ne voit pas une transaction ouverte
+
+    def test_measures_each_setting_separately(self):
+        resources = seed_catalog(categories=4, resources=5)
+        seed_reservations(resources, users=2, reservations=20)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = f"{tmp}/source.sqlite3"
+            target = sqlite3.connect(path)
+            connection.connection.backup(target)
+            target.close()
+
+            out = io.StringIO()
+            call_command(
+                "benchmark_sqlite",
+                database=path,
+                readers=2,
+                writers=1,
+                duration=0.2,
+                as_json=True,
+                stdout=out,
+            )
+
+        results = {row["config"]: row for row in json.loads(out.getvalue())}
+        self.assertEqual(
+            list(results), ["stock", "wal", "immediate", "persistent", "tuned"]
+        )
+        self.assertGreater(results["tuned"]["reads_per_s"], 0)
+        self.assertGreater(results["tuned"]["writes_per_s"], 0)
+        self.assertEqual(results["tuned"]["locked_errors"], 0)
+
+
+# =========================
+# RÉPLIQUE EN LECTURE
+# =========================
+
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    La réplique est un second fichier SQLite copié par sync_replica : ce
+    qui a été écrit depuis la dernière copie n'existe que sur la primaire.
+    """
+
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        set_key_store(JWKSKeyStore(fetcher=CountingFetcher()))
+        self.addCleanup(set_key_store, None)
+        get_token_cache().clear()
+        caches["catalog"].clear()
+
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+
+        # Base de test miroir -> fichier distinct pour la durée du test
+        replica = connections["replica"]
+        name = replica.settings_dict["NAME"]
+        replica.close()
+        replica.settings_dict["NAME"] = f"{tmp.name}/replica.sqlite3"
+
+        def restore():
+            replica.close()
+            replica.settings_dict["NAME"] = name
+
+        self.addCleanup(restore)
+
+        self.client = APIClient()
+        self.resource = create_resource("Robe")
+        call_command("sync_replica", stdout=io.StringIO())
+        # Efface aussi l'épinglage posé par l'écriture du catalogue
+        cache.clear()
+
+    def authenticate(self, sub="user_1"):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {make_token(sub=sub)}")
+
+    def test_router(self):
+        self.assertEqual(router.db_for_write(Reservation), "default")
+        self.assertEqual(router.db_for_read(Reservation), "default")
+
+        with read_scope():
+            use_replica()
+            self.assertEqual(router.db_for_read(Reservation), "replica")
+            self.assertEqual(router.db_for_write(Reservation), "default")
+
+        self.assertEqual(router.db_for_read(Reservation), "default")
+
+    def test_catalog_reads_replica_unless_pinned(self):
+        resource = create_resource("Jupe")
+        url = reverse("resource-detail", args=[resource.pk])
+
+        # Écriture du catalogue : lectures sur la primaire
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+        cache.clear()
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+        call_command("sync_replica", stdout=io.StringIO())
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    @override_settings(QUERY_BUDGET_ENABLED=True)
+    def test_query_count_includes_replica_queries(self):
+        url = reverse("resource-detail", args=[self.resource.pk])
+
+        with CaptureQueriesContext(connections["replica"]) as ctx:
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(len(ctx), 0)
+        self.assertEqual(int(response["X-Query-Count"]), len(ctx))
+
+    def test_user_reads_own_writes(self):
+        self.authenticate("user_1")
+        response = self.client.post(
+            reverse("reservation-create"), {"resource": self.resource.pk}, format="json"
+        )
+        self.assertEqual(response.status_code, 201)
+
+        response = self.client.get(reverse("my-reservations"))
+        self.assertEqual(len(response.data["results"]), 1)
+
+        # Un autre utilisateur lit la réplique, pas encore à jour
+        self.authenticate("user_2")
+        Reservation.objects.create(resource=self.resource, user_clerk_id="user_2")
+        response = self.client.get(reverse("my-reservations"))
+        self.assertEqual(len(response.data["results"]), 0)
+
+        # Fin de la fenêtre d'épinglage
+        cache.clear()
+        self.authenticate("user_1")
+        response = self.client.get(reverse("my-reservations"))
+        self.assertEqual(len(response.data["results"]), 0)
+
+    def test_export_streams_from_replica(self):
+        create_reservation(self.resource, "user_1")
+        UserProfile.objects.create(
+            clerk_user_id="admin_1", email="admin@example.com", is_admin=True
+        )
+        call_command("sync_replica", stdout=io.StringIO())
+        create_reservation(self.resource, "user_2")
+
+        self.authenticate("admin_1")
+        response = self.client.get(
+            reverse("admin-reservation-export"), {"output": "ndjson"}
+        )
+        rows = [
+            json.loads(line)
+            for line in b"".join(response.streaming_content).splitlines()
+        ]
+
+        self.assertEqual([row["user_clerk_id"] for row in rows], ["user_1"])
+        self.assertEqual(rows[0]["user_email"], "user_1@example.com")
+
+    async def test_async_views_follow_the_same_rules(self):
+        headers = {"Authorization": f"Bearer {make_token(sub='user_1')}"}
+
+        response = await self.async_client.post(
+            "/api/async/reservations/",
+            {"resource": self.resource.pk},
+            content_type="application/json",
+            headers=headers,
+        )
+        self.assertEqual(response.status_code, 201)
+
+        response = await self.async_client.get(
+            "/api/async/my-reservations/", headers=headers
+        )
+        self.assertEqual(len(response.json()["results"]), 1)
+
+        await cache.aclear()
+        response = await self.async_client.get(
+            "/api/async/my-reservations/", headers=headers
+        )
+        self.assertEqual(len(response.json()["results"]), 0)
+
+
+# =========================
+# COMPTEURS DE RÉSERVATIONS
+# =========================
+
+class ReservationCounterTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.robe = create_resource("Robe")
+        self.jupe = create_resource("Jupe")
+        # Ligne globale présente et à zéro (flush d'un TransactionTestCase)
+        counters.reconcile()
+
+        UserProfile.objects.create(
+            clerk_user_id="admin_1", email="admin@example.com", is_admin=True
+        )
+
+    def assertCounts(self, resource, total, pending=0, confirmed=0, cancelled=0):
+        resource.refresh_from_db()
+        self.assertEqual(
+            (
+                resource.reservations_total,
+                resource.reservations_pending,
+                resource.reservations_confirmed,
+                resource.reservations_cancelled,
+            ),
+            (total, pending, confirmed, cancelled),
+        )
+
+    def assertStats(self, total, pending=0, confirmed=0, cancelled=0):
+        stats = ReservationStats.objects.get(pk=counters.STATS_PK)
+        self.assertEqual(
+            (stats.total, stats.pending, stats.confirmed, stats.cancelled),
+            (total, pending, confirmed, cancelled),
+        )
+
+    def test_create_increments_counters(self):
+        self.authenticate("user_1")
+        response = self.client.post(
+            "/api/reservations/", {"resource": self.robe.pk}, format="json"
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertCounts(self.robe, 1, pending=1)
+        self.assertCounts(self.jupe, 0)
+        self.assertStats(1, pending=1)
+
+    async def test_async_create_increments_counters(self):
+        response = await self.async_client.post(
+            "/api/async/reservations/",
+            {"resource": self.robe.pk},
+            content_type="application/json",
+            headers={"Authorization": f"Bearer {make_token(sub='user_1')}"},
+        )
+
+        self.assertEqual(response.status_code, 201)
+        stats = await ReservationStats.objects.aget(pk=counters.STATS_PK)
+        self.assertEqual((stats.total, stats.pending), (1, 1))
+
+    def test_missing_stats_row_is_recreated(self):
+        create_counted_reservation(resource=self.robe, user_clerk_id="user_1")
+        # Ex: manage.py flush, puis de nouvelles réservations
+        ReservationStats.objects.all().delete()
+
+        create_counted_reservation(resource=self.jupe, user_clerk_id="user_2")
+
+        self.assertStats(2, pending=2)
+
+    def test_status_updates_move_counts(self):
+        first = create_counted_reservation(resource=self.robe, user_clerk_id="user_1")
+        ids = [
+            first.pk,
+            create_counted_reservation(resource=self.robe, user_clerk_id="user_2").pk,
+            create_counted_reservation(resource=self.jupe, user_clerk_id="user_1").pk,
+        ]
+
+        self.authenticate("admin_1")
+        response = self.client.post(
+            f"/api/admin-reservations/{first.pk}/update-status/",
+            {"status": "confirmed"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertCounts(self.robe, 2, pending=1, confirmed=1)
+        self.assertStats(3, pending=2, confirmed=1)
+
+        # Plusieurs ressources et statuts : un seul UPDATE des compteurs
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(
+                "/api/admin-reservations/bulk-update-status/",
+                {"status": "cancelled", "ids": ids},
+                format="json",
+            )
+        self.assertEqual(response.data["updated"], 3)
+
+        updates = [
+            q for q in ctx.captured_queries
+            if q["sql"].startswith('UPDATE "core_resource"')
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertCounts(self.robe, 2, cancelled=2)
+        self.assertCounts(self.jupe, 1, cancelled=1)
+        self.assertStats(3, cancelled=3)
+
+    def test_delete_decrements_counters(self):
+        reservation = create_counted_reservation(
+            resource=self.robe, user_clerk_id="user_1"
+        )
+        reservation.delete()
+
+        self.assertCounts(self.robe, 0)
+        self.assertStats(0)
+
+    def test_queryset_delete_applies_counters_once(self):
+        for user in ("user_1", "user_2", "user_3"):
+            create_counted_reservation(resource=self.robe, user_clerk_id=user)
+        create_counted_reservation(resource=self.jupe, user_clerk_id="user_1")
+
+        with CaptureQueriesContext(connection) as ctx:
+            Reservation.objects.filter(user_clerk_id__in=["user_1", "user_2"]).delete()
+
+        stats_updates = [
+            q for q in ctx.captured_queries
+            if q["sql"].startswith('UPDATE "core_reservationstats"')
+        ]
+        self.assertEqual(len(stats_updates), 1)
+        self.assertCounts(self.robe, 1, pending=1)
+        self.assertCounts(self.jupe, 0)
+        self.assertStats(1, pending=1)
+
+    def test_resource_delete_forgets_its_reservations(self):
+        for user in ("user_1", "user_2", "user_3"):
+            create_counted_reservation(resource=self.robe, user_clerk_id=user)
+        create_counted_reservation(resource=self.jupe, user_clerk_id="user_1")
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.robe.delete()
+
+        writes = [
+            q for q in ctx.captured_queries
+            if q["sql"].startswith(('UPDATE "core_reservationstats"', "INSERT"))
+        ]
+        self.assertEqual(len(writes), 1)
+        self.assertStats(1, pending=1)
+        self.assertEqual(
+            list(ReservationDailyStat.objects.values_list("resource_id", "count")),
+            [(self.jupe.pk, 1)],
+        )
+
+    def test_resource_save_keeps_counters(self):
+        stale = Resource.objects.get(pk=self.robe.pk)
+        create_counted_reservation(resource=self.robe, user_clerk_id="user_1")
+
+        stale.name = "Robe longue"
+        stale.save()
+
+        self.assertCounts(self.robe, 1, pending=1)
+
+    def test_reconcile_repairs_drift(self):
+        create_counted_reservation(resource=self.robe, user_clerk_id="user_1")
+        Resource.objects.filter(pk=self.robe.pk).update(reservations_total=42)
+        Resource.objects.filter(pk=self.jupe.pk).update(reservations_cancelled=-1)
+        ReservationStats.objects.update(total=0, pending=7)
+
+        out = io.StringIO()
+        call_command("reconcile_reservation_counters", dry_run=True, stdout=out)
+        self.assertIn("2 ressources à corriger", out.getvalue())
+        self.assertCounts(self.robe, 42, pending=1)
+
+        call_command("reconcile_reservation_counters", stdout=io.StringIO())
+        self.assertCounts(self.robe, 1, pending=1)
+        self.assertCounts(self.jupe, 0)
+        self.assertStats(1, pending=1)
+
+        self.assertEqual(counters.reconcile(), (0, False))
+
+    def test_admin_changelist_counts_without_count_queries(self):
+        create_counted_reservation(resource=self.robe, user_clerk_id="user_1")
+        create_counted_reservation(resource=self.jupe, user_clerk_id="user_1")
+
+        client = Client()
+        client.force_login(User.objects.create_superuser("admin", "a@example.com", "pw"))
+        url = reverse("admin:core_reservation_changelist")
+
+        for params, expected in (
+            ({}, 2),
+            ({"status__exact": "pending"}, 2),
+            ({"resource__id__exact": self.robe.pk, "status__exact": "pending"}, 1),
+        ):
+            with self.subTest(params=params):
+                with CaptureQueriesContext(connection) as ctx:
+                    response = client.get(url, params)
+
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.context["cl"].result_count, expected)
+                self.assertEqual(response.context["cl"].full_result_count, 2)
+                self.assertFalse([
+                    q for q in ctx.captured_queries
+                    if "COUNT(" in q["sql"] and '"core_reservation"' in q["sql"]
+                ])
+
+
+# =========================
+# STATISTIQUES ADMIN (rollup quotidien)
+# =========================
+
+class AdminStatsTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.robe = create_resource("Robe")
+        self.jupe = create_resource("Jupe")
+        counters.reconcile()
+
+        UserProfile.objects.create(
+            clerk_user_id="admin_1", email="admin@example.com", is_admin=True
+        )
+        self.today = timezone.localdate()
+
+    def rollup(self):
+        return {
+            (row.day, row.resource_id, row.status): row.count
+            for row in ReservationDailyStat.objects.exclude(count=0)
+        }
+
+    def test_rollup_follows_creates_and_status_changes(self):
+        self.authenticate("user_1")
+        response = self.client.post(
+            "/api/reservations/", {"resource": self.robe.pk}, format="json"
+        )
+        self.assertEqual(response.status_code, 201)
+        create_counted_reservation(resource=self.jupe, user_clerk_id="user_2")
+
+        self.assertEqual(self.rollup(), {
+            (self.today, self.robe.pk, "pending"): 1,
+            (self.today, self.jupe.pk, "pending"): 1,
+        })
+
+        self.authenticate("admin_1")
+        self.client.post(
+            f"/api/admin-reservations/{response.data['id']}/update-status/",
+            {"status": "confirmed"},
+            format="json",
+        )
+        self.assertEqual(self.rollup(), {
+            (self.today, self.robe.pk, "confirmed"): 1,
+            (self.today, self.jupe.pk, "pending"): 1,
+        })
+
+        response = self.client.get("/api/admin-stats/")
+        self.assertEqual(response.status_code, 200)
+
+        days = response.data["days"]
+        self.assertEqual(len(days), 90)
+        self.assertEqual(days[-1]["day"], self.today)
+        self.assertEqual(
+            (days[-1]["total"], days[-1]["pending"], days[-1]["confirmed"]), (2, 1, 1)
+        )
+        self.assertEqual(days[0]["total"], 0)
+        self.assertEqual(response.data["totals"]["total"], 2)
+        self.assertEqual(response.data["all_time"]["confirmed"], 1)
+        self.assertEqual(
+            [(row["name"], row["total"]) for row in response.data["resources"]],
+            [("Robe", 1), ("Jupe", 1)],
+        )
+
+        response = self.client.get(
+            "/api/admin-stats/", {"resource": self.jupe.pk, "status": "pending"}
+        )
+        self.assertEqual(response.data["totals"]["total"], 1)
+        self.assertEqual([row["id"] for row in response.data["resources"]], [self.jupe.pk])
+
+    def test_backfill_rebuilds_rollup_in_chunks(self):
+        old = create_counted_reservation(resource=self.robe, user_clerk_id="user_1")
+        create_counted_reservation(resource=self.robe, user_clerk_id="user_2")
+        create_counted_reservation(resource=self.jupe, user_clerk_id="user_1")
+
+        # Écritures hors ORM : le rollup a dérivé
+        Reservation.objects.filter(pk=old.pk).update(
+            created_at=timezone.now() - timedelta(days=10), status="cancelled"
+        )
+        ReservationDailyStat.objects.filter(resource=self.jupe).delete()
+
+        out = io.StringIO()
+        call_command("backfill_reservation_rollups", chunk_days=3, stdout=out)
+        self.assertEqual(out.getvalue().count(" lignes\n"), 4)  # 11 jours / 3
+
+        ten_days_ago = self.today - timedelta(days=10)
+        expected = {
+            (ten_days_ago, self.robe.pk, "cancelled"): 1,
+            (self.today, self.robe.pk, "pending"): 1,
+            (self.today, self.jupe.pk, "pending"): 1,
+        }
+        self.assertEqual(self.rollup(), expected)
+
+        call_command("backfill_reservation_rollups", chunk_days=5, stdout=io.StringIO())
+        self.assertEqual(self.rollup(), expected)
+
+    def test_chart_is_a_single_indexed_range_read(self):
+        create_counted_reservation(resource=self.robe, user_clerk_id="user_1")
+
+        with CaptureQueriesContext(connection) as ctx:
+            stats = counters.daily_stats(self.today - timedelta(days=89), self.today)
+
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertEqual(stats["totals"]["total"], 1)
+
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + ctx.captured_queries[0]["sql"])
+            plan = " ".join(str(row[-1]) for row in cursor.fetchall())
+        # Index de la contrainte (day, resource, status), pas de scan
+        self.assertIn("SEARCH core_reservationdailystat USING INDEX", plan)
+        self.assertIn("(day>? AND day<?)", plan)
+
+    def test_validation_and_permissions(self):
+        self.authenticate("user_1")
+        self.assertEqual(self.client.get("/api/admin-stats/").status_code, 403)
+
+        self.authenticate("admin_1")
+        response = self.client.get(
+            "/api/admin-stats/", {"start": "2026-02-01", "end": "2026-01-01"}
+        )
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.get(
+            "/api/admin-stats/", {"start": "2024-01-01", "end": "2026-01-01"}
+        )
+        self.assertEqual(response.status_code, 400)
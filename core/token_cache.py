@@ -0,0 +1,107 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+# =========================
+# CACHE DES TOKENS VÉRIFIÉS
+# =========================
+
+class VerifiedTokenCache:
+    """
+    LRU borné des payloads JWT déjà vérifiés (RS256).
+
+    La clé est le sha256 du token (le token brut n'est jamais stocké) et
+    chaque entrée expire au `exp` du token.
+    """
+
+    def __init__(self, max_size=1024):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token):
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token):
+        key = self._key(token)
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, payload = entry
+
+            if time.time() >= expires_at:
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload
+
+    def set(self, token, payload):
+        exp = payload.get("exp")
+
+        # Sans exp, pas de borne de validité : on ne met pas en cache
+        if not isinstance(exp, (int, float)) or self.max_size <= 0:
+            return
+
+        key = self._key(token)
+
+        with self._lock:
+            self._entries[key] = (exp, payload)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+        }
+
+
+# =========================
+# INSTANCE PAR PROCESS
+# =========================
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_token_cache():
+    global _cache
+
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = VerifiedTokenCache(
+                    max_size=settings.CLERK_TOKEN_CACHE_SIZE,
+                )
+
+    return _cache
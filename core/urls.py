@@ -4,17 +4,22 @@ from .views import (
     CategoryListAPIView,
     ResourceListAPIView,
     ResourceDetailAPIView,
+    ResourceSearchAPIView,
     ProtectedAPIView,
     ReservationCreateAPIView,
     UserReservationListAPIView,
     AdminReservationListAPIView,
     AdminReservationUpdateStatusAPIView,  # 🔥 AJOUTÉ
+    AdminReservationBulkUpdateStatusAPIView,
+    AdminReservationExportAPIView,
+    AdminStatsAPIView,
 )
 
 urlpatterns = [
     path("categories/", CategoryListAPIView.as_view(), name="category-list"),
 
     path("resources/", ResourceListAPIView.as_view(), name="resource-list"),
+    path("resources/search/", ResourceSearchAPIView.as_view(), name="resource-search"),
     path("resources/<int:pk>/", ResourceDetailAPIView.as_view(), name="resource-detail"),
 
     # 🔐 Test
@@ -35,4 +40,21 @@ urlpatterns = [
         AdminReservationUpdateStatusAPIView.as_view(),
         name="admin-reservation-update-status",
     ),
+
+    # 🛠️ Admin - modifier le status en masse
+    path(
+        "admin-reservations/bulk-update-status/",
+        AdminReservationBulkUpdateStatusAPIView.as_view(),
+        name="admin-reservation-bulk-update-status",
+    ),
+
+    # 🛠️ Admin - export CSV / NDJSON (streaming)
+    path(
+        "admin-reservations/export/",
+        AdminReservationExportAPIView.as_view(),
+        name="admin-reservation-export",
+    ),
+
+    # 📊 Admin - statistiques (rollup quotidien)
+    path("admin-stats/", AdminStatsAPIView.as_view(), name="admin-stats"),
 ]
\ No newline at end of file
@@ -0,0 +1,59 @@
+import time
+from datetime import datetime, timezone
+
+from django.core.cache import cache
+
+
+# =========================
+# VERSIONS (invalidation entre process)
+# =========================
+
+CATALOG = "catalog"
+CATEGORY_TREE = "category_tree"
+
+
+def version_key(name):
+    return f"core:version:{name}"
+
+
+def get_version(name):
+    """
+    Version courante (timestamp en ns, sous forme de str) stockée dans le
+    cache "default". Elle n'est partagée entre les process que si ce cache
+    l'est (Redis, Memcached, fichiers...) : avec LocMem chaque worker a sa
+    propre version et sert des 304 / réponses en cache périmés après une
+    écriture faite ailleurs (cf. core.checks, check --deploy).
+    """
+    key = version_key(name)
+    version = cache.get(key)
+
+    if version is None:
+        version = str(time.time_ns())
+        # add() : si un autre process l'a déjà posée, on garde la sienne
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+
+    return version
+
+
+async def aget_version(name):
+    """
+    get_version() pour les vues async (cache.aget / cache.aadd).
+    """
+    key = version_key(name)
+    version = await cache.aget(key)
+
+    if version is None:
+        version = str(time.time_ns())
+        if not await cache.aadd(key, version, None):
+            version = await cache.aget(key, version)
+
+    return version
+
+
+def bump_version(name):
+    cache.set(version_key(name), str(time.time_ns()), None)
+
+
+def version_datetime(version):
+    return datetime.fromtimestamp(int(version) / 1e9, tz=timezone.utc)
@@ -1,37 +1,220 @@
+import hashlib
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Prefetch
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
 from rest_framework import generics
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
-from rest_framework.exceptions import PermissionDenied, NotFound
-
-from .models import Category, Resource, Reservation, UserProfile
+from rest_framework.permissions import SAFE_METHODS, IsAuthenticated
+from rest_framework.exceptions import PermissionDenied, NotFound, ValidationError
+
+from .category_tree import get_category_tree
+from .counters import all_time_stats, daily_stats
+from .db_router import is_pinned, read_alias, read_scope, read_scopes, use_replica
+from .exports import CONTENT_TYPES, export_response
+from .facets import filter_by_option_values, get_facets, parse_facet_key
+from .idempotency import idempotent
+from .models import (
+    Category,
+    Resource,
+    ResourceOption,
+    ResourceOptionValue,
+    ResourcePhoto,
+    Reservation,
+)
+from .pagination import KeysetPagination
+from .profiles import profiles_by_clerk_id
+from .search import search_resource_ids
+from .reservations import STATUSES, filter_reservations, update_status
 from .serializers import (
+    AdminStatsQuerySerializer,
     CategorySerializer,
     ResourceSerializer,
+    ReservationBulkStatusSerializer,
+    ReservationFilterSerializer,
     ReservationSerializer,
 )
+from .versions import CATALOG, get_version, version_datetime
+
+
+# =======================
+# CATALOGUE : GET CONDITIONNEL
+# =======================
+
+class CatalogConditionalMixin:
+    """
+    ETag / Last-Modified dérivés de la version du catalogue : un
+    If-None-Match valide reçoit un 304 avant tout accès ORM ou serializer.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return super().dispatch(request, *args, **kwargs)
+
+        version = get_version(CATALOG)
+        etag = quote_etag(f"{CATALOG}-{version}")
+        last_modified = int(version_datetime(version).timestamp())
+
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if not_modified is not None:
+            return not_modified
+
+        response = super().dispatch(request, *args, **kwargs)
+
+        if response.status_code == 200:
+            response.headers["ETag"] = etag
+            response.headers["Last-Modified"] = http_date(last_modified)
+            # Le navigateur revalide à chaque fois (304 quasi gratuit)
+            patch_cache_control(response, public=True, no_cache=True)
+
+        return response
+
+
+class CatalogResponseCacheMixin:
+    """
+    Cache des octets rendus pour le trafic anonyme. La clé inclut le
+    chemin, les query params, l'Accept et la version du catalogue : toute
+    écriture du catalogue rend donc les anciennes entrées inaccessibles.
+    Le cache "catalog" peut rester local au process ; la version, elle,
+    vient du cache "default" qui doit être partagé.
+    """
+
+    cache_header = "X-Catalog-Cache"
+
+    def get_response_cache_key(self, request):
+        query = sorted(request.GET.lists())
+        raw = "|".join([
+            request.get_host(),
+            request.path,
+            repr(query),
+            request.headers.get("Accept", ""),
+            get_version(CATALOG),
+        ])
+        return "core:catalog:response:" + hashlib.sha256(raw.encode()).hexdigest()
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method != "GET" or "Authorization" in request.headers:
+            return super().dispatch(request, *args, **kwargs)
+
+        response_cache = caches[settings.CATALOG_CACHE_ALIAS]
+        key = self.get_response_cache_key(request)
+
+        cached = response_cache.get(key)
+        if cached is not None:
+            content, content_type = cached
+            response = HttpResponse(content, content_type=content_type)
+            response.headers[self.cache_header] = "HIT"
+            return response
+
+        response = super().dispatch(request, *args, **kwargs)
+
+        if response.status_code == 200:
+            response.render()
+            response_cache.set(key, (response.content, response["Content-Type"]))
+
+        response.headers[self.cache_header] = "MISS"
+        return response
+
+
+# =======================
+# LECTURES SUR LA RÉPLIQUE
+# =======================
+
+class ReplicaReadMixin:
+    """
+    GET/HEAD servis par la base "replica" (core.db_router), sauf pendant
+    REPLICA_PIN_SECONDS après une écriture de l'utilisateur ou d'un des
+    `read_pin_scopes` (ex: le catalogue).
+    """
+
+    read_pin_scopes = ()
+
+    def dispatch(self, request, *args, **kwargs):
+        with read_scope():
+            return super().dispatch(request, *args, **kwargs)
+
+    def initial(self, request, *args, **kwargs):
+        # Après l'authentification : le scope de l'utilisateur est connu
+        super().initial(request, *args, **kwargs)
+
+        scopes = read_scopes(request.user, self.read_pin_scopes)
+        if request.method in SAFE_METHODS and not is_pinned(*scopes):
+            use_replica()
 
 
 # =======================
 # CATEGORIES
 # =======================
 
-class CategoryListAPIView(generics.ListAPIView):
+class CategoryListAPIView(
+    CatalogConditionalMixin,
+    CatalogResponseCacheMixin,
+    ReplicaReadMixin,
+    generics.ListAPIView,
+):
+    read_pin_scopes = (CATALOG,)
     queryset = Category.objects.filter(is_active=True, parent__isnull=True)
     serializer_class = CategorySerializer
 
+    def list(self, request, *args, **kwargs):
+        # 🔥 Arbre complet servi depuis le cache du process
+        return Response(get_category_tree().roots)
+
 
 # =======================
 # RESOURCES
 # =======================
 
-class ResourceListAPIView(generics.ListAPIView):
-    serializer_class = ResourceSerializer
+class ResourceQuerysetMixin:
+    """
+    Plan de préchargement fixe du catalogue : 4 requêtes (resources + category,
+    photos, options, valeurs) quel que soit le nombre de ressources.
+    """
+
+    def get_resource_queryset(self):
+        return Resource.objects.filter(
+            is_active=True
+        ).select_related(
+            "category"
+        ).prefetch_related(
+            Prefetch(
+                "photos",
+                queryset=ResourcePhoto.objects.order_by("position", "id"),
+            ),
+            Prefetch(
+                "options",
+                queryset=ResourceOption.objects.order_by("id").prefetch_related(
+                    Prefetch(
+                        "values",
+                        queryset=ResourceOptionValue.objects.order_by("id"),
+                    )
+                ),
+            ),
+        )
 
-    def get_queryset(self):
-        queryset = Resource.objects.filter(is_active=True)
+    @staticmethod
+    def get_option_values(params):
+        keys = []
+
+        for raw in params.getlist("option_value"):
+            key = parse_facet_key(raw)
+            if key is None:
+                raise ValidationError({
+                    "option_value": "Format attendu : Option:Valeur."
+                })
+            keys.append(key)
+
+        return keys
 
-        category_slug = self.request.query_params.get("category")
+    def filter_resource_queryset(self, queryset, params):
+        category_slug = params.get("category")
 
         if category_slug:
             queryset = queryset.filter(
@@ -39,12 +222,86 @@ class ResourceListAPIView(generics.ListAPIView):
                 category__is_active=True
             )
 
-        return queryset
+        # 🔥 ?option_value=Couleur:Rouge (répétable, toutes requises)
+        return filter_by_option_values(queryset, self.get_option_values(params))
 
 
-class ResourceDetailAPIView(generics.RetrieveAPIView):
-    queryset = Resource.objects.filter(is_active=True)
+class ResourceListAPIView(
+    CatalogConditionalMixin,
+    CatalogResponseCacheMixin,
+    ResourceQuerysetMixin,
+    ReplicaReadMixin,
+    generics.ListAPIView,
+):
     serializer_class = ResourceSerializer
+    pagination_class = KeysetPagination
+    read_pin_scopes = (CATALOG,)
+
+    def get_queryset(self):
+        return self.filter_resource_queryset(
+            self.get_resource_queryset(), self.request.query_params
+        )
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+
+        # Compteurs précalculés pour la catégorie courante
+        response.data["facets"] = get_facets(request.query_params.get("category"))
+
+        return response
+
+
+class ResourceDetailAPIView(
+    CatalogConditionalMixin,
+    CatalogResponseCacheMixin,
+    ResourceQuerysetMixin,
+    ReplicaReadMixin,
+    generics.RetrieveAPIView,
+):
+    serializer_class = ResourceSerializer
+    read_pin_scopes = (CATALOG,)
+
+    def get_queryset(self):
+        return self.get_resource_queryset()
+
+
+# =======================
+# RESOURCE SEARCH (FTS5)
+# =======================
+
+class ResourceSearchAPIView(
+    CatalogConditionalMixin,
+    CatalogResponseCacheMixin,
+    ResourceQuerysetMixin,
+    ReplicaReadMixin,
+    generics.ListAPIView,
+):
+    """
+    /api/resources/search/?q=robe lon : recherche par préfixe dans le nom,
+    la description, les catégories et les options, classée par bm25.
+    """
+
+    serializer_class = ResourceSerializer
+    read_pin_scopes = (CATALOG,)
+
+    def get_limit(self):
+        try:
+            limit = int(self.request.query_params.get("limit", settings.API_PAGE_SIZE))
+        except ValueError:
+            limit = settings.API_PAGE_SIZE
+
+        return max(1, min(limit, settings.API_MAX_PAGE_SIZE))
+
+    def list(self, request, *args, **kwargs):
+        query = request.query_params.get("q", "")
+
+        ids = search_resource_ids(query, limit=self.get_limit())
+
+        resources = self.get_resource_queryset().in_bulk(ids)
+        ranked = [resources[pk] for pk in ids if pk in resources]
+
+        serializer = self.get_serializer(ranked, many=True)
+        return Response({"results": serializer.data})
 
 
 # =======================
@@ -55,29 +312,72 @@ class ReservationCreateAPIView(generics.CreateAPIView):
     serializer_class = ReservationSerializer
     permission_classes = [IsAuthenticated]
 
+    def create(self, request, *args, **kwargs):
+        # 🔥 Idempotency-Key : un POST rejoué renvoie la réponse enregistrée
+        return idempotent(
+            request,
+            request.user.id,
+            partial(super().create, request, *args, **kwargs),
+        )
+
     def perform_create(self, serializer):
-        clerk_user_id = self.request.user.id
+        # Le profil est déjà garanti par ClerkAuthentication
+        serializer.save(user_clerk_id=self.request.user.id)
+
+    def get_serializer_context(self):
+        return {
+            "request": self.request,
+            # Profil déjà résolu par ClerkAuthentication
+            "profiles": {self.request.user.id: self.request.user.profile},
+        }
+
+
+# =======================
+# RESERVATIONS LIST (commun)
+# =======================
 
-        UserProfile.objects.get_or_create(
-            clerk_user_id=clerk_user_id
+class ReservationListMixin:
+    """
+    Nombre de requêtes constant quelle que soit la taille de la liste :
+    resource via select_related, options via prefetch_related et profils
+    de toute la page chargés en une seule requête.
+    """
+
+    def get_reservation_queryset(self):
+        return Reservation.objects.select_related(
+            "resource"
+        ).prefetch_related(
+            "selected_options"
         )
 
-        serializer.save(user_clerk_id=clerk_user_id)
+    def get_serializer(self, *args, **kwargs):
+        if kwargs.get("many") and args:
+            reservations = list(args[0])
 
-    def get_serializer_context(self):
-        return {"request": self.request}
+            context = self.get_serializer_context()
+            context["profiles"] = profiles_by_clerk_id(
+                reservation.user_clerk_id for reservation in reservations
+            )
+
+            kwargs["context"] = context
+            args = (reservations, *args[1:])
+
+        return super().get_serializer(*args, **kwargs)
 
 
 # =======================
 # USER RESERVATIONS LIST
 # =======================
 
-class UserReservationListAPIView(generics.ListAPIView):
+class UserReservationListAPIView(
+    ReservationListMixin, ReplicaReadMixin, generics.ListAPIView
+):
     serializer_class = ReservationSerializer
+    pagination_class = KeysetPagination
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return Reservation.objects.filter(
+        return self.get_reservation_queryset().filter(
             user_clerk_id=self.request.user.id
         )
 
@@ -86,19 +386,18 @@ class UserReservationListAPIView(generics.ListAPIView):
 # ADMIN RESERVATIONS LIST
 # =======================
 
-class AdminReservationListAPIView(generics.ListAPIView):
+class AdminReservationListAPIView(
+    ReservationListMixin, ReplicaReadMixin, generics.ListAPIView
+):
     serializer_class = ReservationSerializer
+    pagination_class = KeysetPagination
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        profile, created = UserProfile.objects.get_or_create(
-            clerk_user_id=self.request.user.id
-        )
-
-        if not profile.is_admin:
+        if not self.request.user.profile.is_admin:
             raise PermissionDenied("Admin access required.")
 
-        return Reservation.objects.all()
+        return self.get_reservation_queryset()
 
 
 # =======================
@@ -109,50 +408,145 @@ class AdminReservationUpdateStatusAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request, pk):
-        profile, created = UserProfile.objects.get_or_create(
-            clerk_user_id=request.user.id
-        )
-
-        if not profile.is_admin:
+        if not request.user.profile.is_admin:
             raise PermissionDenied("Admin access required.")
 
-        try:
-            reservation = Reservation.objects.get(pk=pk)
-        except Reservation.DoesNotExist:
-            raise NotFound("Reservation not found.")
-
         new_status = request.data.get("status")
 
-        if new_status not in ["pending", "confirmed", "cancelled"]:
+        if new_status not in STATUSES:
             return Response(
                 {"error": "Invalid status value."},
                 status=400
             )
 
-        reservation.status = new_status
-        reservation.save()
+        # 🔥 UPDATE de la seule colonne status (plus de save() complet)
+        matched, updated = update_status(
+            Reservation.objects.filter(pk=pk), new_status
+        )
+
+        if not matched:
+            raise NotFound("Reservation not found.")
 
         return Response({
             "message": "Status updated successfully.",
-            "reservation_id": reservation.id,
-            "new_status": reservation.status
+            "reservation_id": pk,
+            "new_status": new_status
         })
 
 
 # =======================
-# TEST PROTECTED
+# ADMIN RESERVATIONS BULK STATUS UPDATE
 # =======================
 
-class ProtectedAPIView(APIView):
+class AdminReservationBulkUpdateStatusAPIView(APIView):
+    """
+    POST {"status": "confirmed", "ids": [1, 2, 3]}
+    ou   {"status": "confirmed", "filter": {"status": "pending", ...}}
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        if not request.user.profile.is_admin:
+            raise PermissionDenied("Admin access required.")
+
+        serializer = ReservationBulkStatusSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        new_status = serializer.validated_data["status"]
+        ids = serializer.validated_data.get("ids")
+
+        if ids is not None:
+            ids = set(ids)
+            queryset = Reservation.objects.filter(id__in=ids)
+        else:
+            queryset = filter_reservations(
+                Reservation.objects.all(),
+                serializer.validated_data["filter"],
+            )
+
+        matched, updated = update_status(queryset, new_status)
+
+        return Response({
+            "new_status": new_status,
+            "updated": updated,
+            "unchanged": matched - updated,
+            "missing": len(ids) - matched if ids is not None else 0,
+        })
+
+
+# =======================
+# ADMIN RESERVATIONS EXPORT (CSV / NDJSON)
+# =======================
+
+class AdminReservationExportAPIView(ReplicaReadMixin, APIView):
+    """
+    GET ?output=csv|ndjson&status=&resource=&created_from=&created_to=
+    (`format` est réservé par DRF à la négociation de contenu)
+    """
+
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        profile, created = UserProfile.objects.get_or_create(
-            clerk_user_id=request.user.id
+        if not request.user.profile.is_admin:
+            raise PermissionDenied("Admin access required.")
+
+        output = request.query_params.get("output", "csv")
+        if output not in CONTENT_TYPES:
+            raise ValidationError({"output": "Expected 'csv' or 'ndjson'."})
+
+        filters = ReservationFilterSerializer(data=request.query_params)
+        filters.is_valid(raise_exception=True)
+
+        # Le flux est lu après dispatch (hors read_scope) : base explicite
+        queryset = filter_reservations(
+            Reservation.objects.using(read_alias()), filters.validated_data
         )
 
+        return export_response(queryset, output=output)
+
+
+# =======================
+# ADMIN STATS (rollup quotidien)
+# =======================
+
+class AdminStatsAPIView(ReplicaReadMixin, APIView):
+    """
+    GET ?start=&end=&resource=&status= : réservations par jour, par
+    ressource et par statut, lues dans ReservationDailyStat (une requête,
+    quelle que soit la plage), plus les totaux de ReservationStats.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        if not request.user.profile.is_admin:
+            raise PermissionDenied("Admin access required.")
+
+        params = AdminStatsQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+
+        stats = daily_stats(
+            params.validated_data["start"],
+            params.validated_data["end"],
+            resource_id=params.validated_data.get("resource"),
+            status=params.validated_data.get("status"),
+        )
+        stats["all_time"] = all_time_stats()
+
+        return Response(stats)
+
+
+# =======================
+# TEST PROTECTED
+# =======================
+
+class ProtectedAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
         return Response({
             "message": "Access granted",
             "clerk_user_id": request.user.id,
-            "is_admin": profile.is_admin
+            "is_admin": request.user.profile.is_admin
         })
\ No newline at end of file
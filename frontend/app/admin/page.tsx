@@ -24,16 +24,19 @@ export default function AdminPage() {
 
   const [reservations, setReservations] = useState<Reservation[]>([]);
   const [loading, setLoading] = useState(true);
+  const [next, setNext] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     fetchAdminReservations();
   }, []);
 
-  const fetchAdminReservations = async () => {
+  // Pagination par curseur : `url` = champ `next` de la page précédente
+  const fetchAdminReservations = async (url?: string) => {
     const token = await getToken({ template: "django" });
 
     const res = await fetch(
-      "http://127.0.0.1:8000/api/admin-reservations/",
+      url ?? "http://127.0.0.1:8000/api/admin-reservations/",
       {
         headers: {
           Authorization: `Bearer ${token}`,
@@ -48,10 +51,21 @@ export default function AdminPage() {
     }
 
     const data = await res.json();
-    setReservations(data);
+    setReservations((prev) =>
+      url ? [...prev, ...data.results] : data.results
+    );
+    setNext(data.next);
     setLoading(false);
   };
 
+  const loadMore = async () => {
+    if (!next) return;
+
+    setLoadingMore(true);
+    await fetchAdminReservations(next);
+    setLoadingMore(false);
+  };
+
   // 🔥 UPDATE STATUS
   const updateStatus = async (id: number, newStatus: string) => {
     const token = await getToken({ template: "django" });
@@ -159,6 +173,16 @@ export default function AdminPage() {
           </p>
         </div>
       ))}
+
+      {next && (
+        <button
+          onClick={loadMore}
+          disabled={loadingMore}
+          className="px-6 py-2 border border-black rounded-lg disabled:opacity-50"
+        >
+          {loadingMore ? "Chargement..." : "Voir plus"}
+        </button>
+      )}
     </div>
   );
 }
\ No newline at end of file
@@ -44,6 +44,7 @@ export default function Home() {
   const [selectedCategory, setSelectedCategory] = useState<string | null>(null);
   const [resources, setResources] = useState<Resource[]>([]);
   const [reservations, setReservations] = useState<Reservation[]>([]);
+  const [nextReservations, setNextReservations] = useState<string | null>(null);
 
   const [isAdmin, setIsAdmin] = useState(false);
 
@@ -95,13 +96,14 @@ export default function Home() {
   // 🔹 Mes réservations
   // ==========================
 
-  const fetchMyReservations = async () => {
+  // Pagination par curseur : `next` = URL de la page suivante (null à la fin)
+  const fetchMyReservations = async (url?: string) => {
     setLoadingReservations(true);
 
     const token = await getToken({ template: "django" });
 
     const res = await fetch(
-      "http://127.0.0.1:8000/api/my-reservations/",
+      url ?? "http://127.0.0.1:8000/api/my-reservations/",
       {
         headers: {
           Authorization: `Bearer ${token}`,
@@ -110,7 +112,10 @@ export default function Home() {
     );
 
     const data = await res.json();
-    setReservations(data);
+    setReservations((previous) =>
+      url ? [...previous, ...data.results] : data.results
+    );
+    setNextReservations(data.next);
     setLoadingReservations(false);
   };
 
@@ -174,7 +179,7 @@ export default function Home() {
             )}
 
             <button
-              onClick={fetchMyReservations}
+              onClick={() => fetchMyReservations()}
               className="px-6 py-2 bg-green-600 text-white rounded-lg"
             >
               Voir mes réservations
@@ -189,6 +194,15 @@ export default function Home() {
               </div>
             ))}
 
+            {nextReservations && !loadingReservations && (
+              <button
+                onClick={() => fetchMyReservations(nextReservations)}
+                className="px-6 py-2 border border-black rounded-lg"
+              >
+                Voir plus
+              </button>
+            )}
+
             <button
               onClick={handleLogout}
               className="px-6 py-2 bg-red-600 text-white rounded-lg"